@@ -11,17 +11,26 @@ ANT+ монитор сердечного ритма — поддержка до
     python ant_hr_monitor.py -n 4         # авто-подключение 4 датчиков
     python ant_hr_monitor.py --ids 45231 78912  # конкретные Device ID
     python ant_hr_monitor.py --log        # с отладочным логированием
+    python ant_hr_monitor.py -n 8 --record class.antlog  # запись страниц в файл
+
+Файл записи — бинарный лог backend/app/services/ant_recording.py;
+воспроизводится бэкендом через CF_ANT_REPLAY=class.antlog.
 """
 
 import argparse
 import logging
+import os
 import sys
+import time
 from datetime import datetime
 
 from openant.devices import ANTPLUS_NETWORK_KEY
 from openant.devices.heart_rate import HeartRate, HeartRateData
 from openant.easy.node import Node
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from app.services.ant_recording import PageRecorder  # noqa: E402
+
 
 def create_node():
     """Создаёт и настраивает ANT+ Node с сетевым ключом ANT+.
@@ -79,7 +88,7 @@ def make_on_sensor_found(sensor_index, device):
     return on_sensor_found
 
 
-def make_on_device_data(sensor_index, device):
+def make_on_device_data(sensor_index, device, recorder=None):
     """Создаёт колбэк для обработки данных от датчика сердечного ритма.
 
     Генерирует функцию-замыкание, которая вызывается при получении
@@ -89,6 +98,7 @@ def make_on_device_data(sensor_index, device):
     Args:
         sensor_index: порядковый номер датчика (0-based) для вывода.
         device: объект HeartRate, из которого читается device_id.
+        recorder: PageRecorder для записи каждой страницы (None — без записи).
 
     Returns:
         callable: функция-колбэк с сигнатурой (page, page_name, data),
@@ -100,6 +110,9 @@ def make_on_device_data(sensor_index, device):
         if not isinstance(data, HeartRateData):
             return
 
+        if recorder is not None:
+            recorder.write(time.monotonic(), device.device_id, data)
+
         timestamp = datetime.now().strftime("%H:%M:%S")
         dev_id = _get_device_id(device)
         hr = data.heart_rate
@@ -137,7 +150,7 @@ def setup_sensor(node, device_id=0):
     return HeartRate(node, device_id=device_id)
 
 
-def main(max_sensors=2, device_ids=None, enable_log=False):
+def main(max_sensors=2, device_ids=None, enable_log=False, record_path=None):
     """Основная функция — создаёт датчики и запускает event loop.
 
     Последовательно создаёт N HeartRate-устройств на одном ANT+ Node,
@@ -148,11 +161,13 @@ def main(max_sensors=2, device_ids=None, enable_log=False):
         max_sensors: количество датчиков при auto-detect (default: 2).
         device_ids: список конкретных Device ID (None = auto-detect).
         enable_log: включить DEBUG-логирование openant (default: False).
+        record_path: файл для записи страниц ЧСС (None — без записи).
     """
     if enable_log:
         logging.basicConfig(level=logging.DEBUG)
 
     sensors = []
+    recorder = PageRecorder(record_path) if record_path else None
 
     try:
         node = create_node()
@@ -161,13 +176,13 @@ def main(max_sensors=2, device_ids=None, enable_log=False):
             for i, did in enumerate(device_ids):
                 hr_device = setup_sensor(node, device_id=did)
                 hr_device.on_found = make_on_sensor_found(i, hr_device)
-                hr_device.on_device_data = make_on_device_data(i, hr_device)
+                hr_device.on_device_data = make_on_device_data(i, hr_device, recorder)
                 sensors.append(hr_device)
         else:
             for i in range(max_sensors):
                 hr_device = setup_sensor(node, device_id=0)
                 hr_device.on_found = make_on_sensor_found(i, hr_device)
-                hr_device.on_device_data = make_on_device_data(i, hr_device)
+                hr_device.on_device_data = make_on_device_data(i, hr_device, recorder)
                 sensors.append(hr_device)
 
         count = len(sensors)
@@ -187,6 +202,9 @@ def main(max_sensors=2, device_ids=None, enable_log=False):
             node.stop()
         except Exception:
             pass
+        if recorder is not None:
+            recorder.close()
+            print(f"Записано страниц: {recorder.pages} ({record_path})")
 
     print("Завершено.")
 
@@ -198,6 +216,7 @@ def parse_args():
         -n, --max-sensors  количество датчиков при auto-detect (default: 2)
         --ids              конкретные Device ID датчиков
         --log              включить отладочное логирование
+        --record           файл для записи страниц ЧСС
 
     Returns:
         argparse.Namespace: распознанные аргументы.
@@ -223,6 +242,11 @@ def parse_args():
         action="store_true",
         help="Включить отладочное логирование openant",
     )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="Записывать все страницы ЧСС в бинарный лог (для воспроизведения бэкендом)",
+    )
     return parser.parse_args()
 
 
@@ -232,4 +256,5 @@ if __name__ == "__main__":
         max_sensors=args.max_sensors,
         device_ids=args.ids,
         enable_log=args.log,
+        record_path=args.record,
     )
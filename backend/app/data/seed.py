@@ -1,48 +1,197 @@
-"""Инициализация БД сид-данными (инвентарь, движения, шаблоны тренировок)."""
+"""Инициализация БД сид-данными (инвентарь, движения, шаблоны тренировок).
 
+Каждый сид-каталог версионируется хэшем содержимого своего файла,
+хэши хранятся в seed_versions. При старте читаются только файлы и одна
+таблица: если хэши совпадают, модули каталогов даже не импортируются.
+Иначе изменившиеся каталоги сравниваются с БД и разница применяется
+пакетными (executemany) upsert/delete в одной транзакции. Строки
+шаблонов сопоставляются по имени и сохраняют id — на них ссылаются
+wods.template_id и template_zone_profiles.
+"""
+
+import hashlib
+import importlib
 import logging
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
 
 from ..database import SessionLocal
-from ..models import Equipment, GymInventory, Movement, WodTemplate, WodTemplateMovement
-from .equipment import EQUIPMENT_SEED
-from .movements import MOVEMENTS_SEED
-from .wod_templates import WOD_TEMPLATES_SEED
+from ..models import Equipment, Movement, SeedVersion, WodTemplate, WodTemplateMovement
 
 _logger = logging.getLogger(__name__)
 
+_DATA_DIR = Path(__file__).parent
+
+# Каталог → (модуль с данными, имя списка)
+SEED_CATALOGS = {
+    "equipment": ("equipment", "EQUIPMENT_SEED"),
+    "movements": ("movements", "MOVEMENTS_SEED"),
+    "wod_templates": ("wod_templates", "WOD_TEMPLATES_SEED"),
+}
+
+_TEMPLATE_FIELDS = ("name", "format", "duration_min", "intensity", "theme", "is_benchmark", "description")
+_TEMPLATE_MOVEMENT_FIELDS = (
+    "movement_key", "movement_name", "reps", "weight_male", "weight_female",
+    "sort_order", "rounds_note",
+)
+
+
+def _content_hash(catalog: str) -> str:
+    """SHA-256 исходного файла каталога — без импорта модуля."""
+    module, _ = SEED_CATALOGS[catalog]
+    return hashlib.sha256((_DATA_DIR / f"{module}.py").read_bytes()).hexdigest()
+
+
+def _load_seed(catalog: str) -> list[dict]:
+    module, name = SEED_CATALOGS[catalog]
+    return getattr(importlib.import_module(f".{module}", __package__), name)
+
+
+def _sync_rows(db: Session, model, key: str, rows: list[dict]) -> tuple[int, int]:
+    """Приводит таблицу к rows по ключу key: upsert изменённых, delete лишних.
+
+    Возвращает (изменено/добавлено, удалено).
+    """
+    table = model.__table__
+    columns = [c.name for c in table.columns]
+    existing = {
+        r[key]: r for r in (dict(row._mapping) for row in db.execute(select(table)))
+    }
+    changed = [
+        r for r in rows
+        if r[key] not in existing or any(existing[r[key]][c] != r[c] for c in columns)
+    ]
+    if changed:
+        stmt = insert(table)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[key],
+                set_={c: stmt.excluded[c] for c in columns if c != key},
+            ),
+            changed,
+        )
+    removed = existing.keys() - {r[key] for r in rows}
+    if removed:
+        db.execute(delete(table).where(table.c[key].in_(removed)))
+    return len(changed), len(removed)
+
+
+def _sync_equipment(db: Session, seed: list[dict]) -> tuple[int, int]:
+    rows = [{"icon": "📦", **item} for item in seed]
+    return _sync_rows(db, Equipment, "key", rows)
+
+
+def _sync_movements(db: Session, seed: list[dict]) -> tuple[int, int]:
+    rows = [
+        {
+            "scaling_beginner": None,
+            "scaling_intermediate": None,
+            "difficulty": "intermediate",
+            **mv,
+            "themes": ",".join(mv.get("themes", [])),
+            "equipment_keys": ",".join(mv.get("equipment_keys", [])),
+        }
+        for mv in seed
+    ]
+    return _sync_rows(db, Movement, "key", rows)
+
+
+def _sync_templates(db: Session, seed: list[dict]) -> tuple[int, int]:
+    """Шаблоны сопоставляются по имени; у изменённых пересоздаются движения."""
+    existing = {
+        t.name: t for t in db.execute(
+            select(WodTemplate.id, *(getattr(WodTemplate, f) for f in _TEMPLATE_FIELDS))
+        )
+    }
+    existing_movements: dict[str, list[tuple]] = {}
+    for tm in db.execute(
+        select(WodTemplateMovement.template_id,
+               *(getattr(WodTemplateMovement, f) for f in _TEMPLATE_MOVEMENT_FIELDS))
+        .order_by(WodTemplateMovement.template_id, WodTemplateMovement.sort_order)
+    ):
+        existing_movements.setdefault(tm.template_id, []).append(tuple(tm)[1:])
+
+    templates, movements, changed_ids = [], [], []
+    for tpl in seed:
+        row = {f: tpl.get(f) for f in _TEMPLATE_FIELDS}
+        mv_rows = [
+            tuple(m.get(f) for f in _TEMPLATE_MOVEMENT_FIELDS)
+            for m in sorted(tpl.get("movements", []), key=lambda m: m["sort_order"])
+        ]
+        current = existing.get(tpl["name"])
+        if current is not None:
+            same = all(getattr(current, f) == row[f] for f in _TEMPLATE_FIELDS)
+            if same and existing_movements.get(current.id, []) == mv_rows:
+                continue
+            template_id = current.id
+            changed_ids.append(template_id)
+        else:
+            template_id = str(uuid.uuid4())
+        templates.append({"id": template_id, **row})
+        movements.extend(
+            {"id": str(uuid.uuid4()), "template_id": template_id,
+             **dict(zip(_TEMPLATE_MOVEMENT_FIELDS, m))}
+            for m in mv_rows
+        )
+
+    removed_ids = [t.id for name, t in existing.items()
+                   if name not in {tpl["name"] for tpl in seed}]
+    stale_ids = changed_ids + removed_ids
+    if stale_ids:
+        db.execute(delete(WodTemplateMovement).where(WodTemplateMovement.template_id.in_(stale_ids)))
+    if removed_ids:
+        db.execute(delete(WodTemplate).where(WodTemplate.id.in_(removed_ids)))
+    if templates:
+        stmt = insert(WodTemplate.__table__)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["id"],
+                set_={f: stmt.excluded[f] for f in _TEMPLATE_FIELDS},
+            ),
+            templates,
+        )
+    if movements:
+        db.execute(insert(WodTemplateMovement.__table__), movements)
+    return len(templates), len(removed_ids)
+
+
+_SYNC = {
+    "equipment": _sync_equipment,
+    "movements": _sync_movements,
+    "wod_templates": _sync_templates,
+}
+
 
 def seed_db():
-    """Заполняет БД сид-данными, если таблицы пустые."""
+    """Применяет изменившиеся сид-каталоги; при совпадении хэшей ничего не делает."""
+    hashes = {catalog: _content_hash(catalog) for catalog in SEED_CATALOGS}
     db = SessionLocal()
     try:
-        # ── Инвентарь ──
-        if db.query(Equipment).count() == 0:
-            for item in EQUIPMENT_SEED:
-                db.add(Equipment(**item))
-            db.commit()
-            _logger.info(f"Seeded {len(EQUIPMENT_SEED)} equipment items")
-
-        # ── Движения ──
-        if db.query(Movement).count() == 0:
-            for mv in MOVEMENTS_SEED:
-                mv_dict = {**mv}
-                mv_dict["themes"] = ",".join(mv_dict.get("themes", []))
-                mv_dict["equipment_keys"] = ",".join(mv_dict.get("equipment_keys", []))
-                db.add(Movement(**mv_dict))
-            db.commit()
-            _logger.info(f"Seeded {len(MOVEMENTS_SEED)} movements")
-
-        # ── Шаблоны тренировок ──
-        if db.query(WodTemplate).count() == 0:
-            for tpl in WOD_TEMPLATES_SEED:
-                movements_data = tpl.pop("movements", [])
-                template = WodTemplate(**tpl)
-                db.add(template)
-                db.flush()
-                for m in movements_data:
-                    db.add(WodTemplateMovement(template_id=template.id, **m))
-            db.commit()
-            _logger.info(f"Seeded {len(WOD_TEMPLATES_SEED)} wod templates")
+        stored = dict(db.execute(select(SeedVersion.catalog, SeedVersion.content_hash)).all())
+        stale = [c for c in SEED_CATALOGS if stored.get(c) != hashes[c]]
+        if not stale:
+            _logger.info("Seed catalogs up to date")
+            return
+
+        now = datetime.now(timezone.utc)
+        for catalog in stale:
+            upserted, removed = _SYNC[catalog](db, _load_seed(catalog))
+            _logger.info(f"Seeded {catalog}: {upserted} upserted, {removed} removed")
+        stmt = insert(SeedVersion.__table__)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["catalog"],
+                set_={"content_hash": stmt.excluded.content_hash,
+                      "applied_at": stmt.excluded.applied_at},
+            ),
+            [{"catalog": c, "content_hash": hashes[c], "applied_at": now} for c in stale],
+        )
+        db.commit()
 
     except Exception as e:
         db.rollback()
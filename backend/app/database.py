@@ -27,6 +27,23 @@ def _column_exists(conn, table: str, column: str) -> bool:
     return any(r[1] == column for r in rows)
 
 
+def _column_not_null(conn, table: str, column: str) -> bool:
+    rows = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
+    return any(r[1] == column and r[3] for r in rows)
+
+
+def _rebuild_table(conn, table: str):
+    """Пересоздаёт таблицу по текущей модели с данными (SQLite не меняет NOT NULL через ALTER)."""
+    model = Base.metadata.tables[table]
+    columns = ", ".join(c.name for c in model.columns)
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_old"))
+    for index in model.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    model.create(conn)
+    conn.execute(text(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_old"))
+    conn.execute(text(f"DROP TABLE {table}_old"))
+
+
 def _run_migrations():
     """Добавляет недостающие колонки в существующие таблицы (SQLite ALTER TABLE)."""
     with engine.connect() as conn:
@@ -35,6 +52,42 @@ def _run_migrations():
                 "ALTER TABLE sensors ADD COLUMN ignored BOOLEAN DEFAULT 0 NOT NULL"
             ))
             conn.commit()
+        for column, ddl in (
+            ("weight_kg", "FLOAT"),
+            ("age", "INTEGER"),
+            ("sex", "VARCHAR(10)"),
+            ("resting_hr", "INTEGER"),
+        ):
+            if not _column_exists(conn, "athletes", column):
+                conn.execute(text(f"ALTER TABLE athletes ADD COLUMN {column} {ddl}"))
+                conn.commit()
+        if not _column_exists(conn, "session_totals", "trimp"):
+            conn.execute(text(
+                "ALTER TABLE session_totals ADD COLUMN trimp FLOAT DEFAULT 0 NOT NULL"
+            ))
+            conn.commit()
+        for column, ddl in (
+            ("ended_at", "DATETIME"),
+            ("template_id", "VARCHAR(36)"),
+        ):
+            if not _column_exists(conn, "wods", column):
+                conn.execute(text(f"ALTER TABLE wods ADD COLUMN {column} {ddl}"))
+                conn.commit()
+        for column, ddl in (
+            ("raw_heart_rate", "INTEGER"),
+            ("rejected", "BOOLEAN DEFAULT 0 NOT NULL"),
+        ):
+            if not _column_exists(conn, "hr_readings", column):
+                conn.execute(text(f"ALTER TABLE hr_readings ADD COLUMN {column} {ddl}"))
+                conn.commit()
+        # Отброшенный фильтром отсчёт без замены хранится с heart_rate и zone = NULL
+        if _column_not_null(conn, "hr_readings", "heart_rate"):
+            _rebuild_table(conn, "hr_readings")
+            conn.commit()
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_wods_created_id ON wods (created_at, id)"
+        ))
+        conn.commit()
 
 
 def init_db():
@@ -1,6 +1,7 @@
 """CF-Monitor Backend — FastAPI приложение.
 
-Запускает ANT+ collector в фоновом потоке, обслуживает REST API
+Запускает ANT+ collector в фоновом потоке (или отдельном процессе —
+CF_ANT_PROCESS), обслуживает REST API
 и WebSocket для real-time трансляции ЧСС на фронтенд.
 """
 
@@ -8,39 +9,73 @@ import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from .database import init_db
 from .data.seed import seed_db
-from .models import Sensor, Athlete
+from .models import Sensor, SensorGap, Athlete, HrReading, Session as TrainingSession, Wod
 from .database import SessionLocal
 from .hr_zones import calc_zone, calc_percent
+from .schemas import SensorChannelsOut, SensorDiagnosticsOut
+from .services.ant_collector import AntCollector
+from .services.catalog import catalog_index
+from .services.collector_process import ProcessCollector
+from .services.effort import AthleteProfile, effort_engine
+from .services.hr_filter import hr_filter
+from .services.hrv import hrv_engine
+from .services.jobs import job_manager
+from .services.leaderboard import leaderboards
+from .services.liveness import liveness
+from .services.recovery import recovery_tracker, save_recovery
+from .services.search import search_service
+from .services.workout_clock import workout_clock
 from .services.ws_manager import manager
+from .services.zone_profiles import zone_profiles
 from .services.mock_collector import MockCollector
+from .services.replay_collector import ReplayCollector
 
 _logger = logging.getLogger(__name__)
 
 DEV_MODE = os.environ.get("CF_DEV_MODE", "0") == "1"
 
-if not DEV_MODE:
-    from .services.ant_collector import AntCollector
+# ANT+: число каналов (датчиков), из них wildcard-каналов для новых датчиков,
+# сколько стиков использовать (0 — все), симуляция N стиков без USB
+ANT_MAX_SENSORS = int(os.environ.get("CF_ANT_MAX_SENSORS", "8"))
+ANT_WILDCARDS = int(os.environ.get("CF_ANT_WILDCARDS", "2"))
+ANT_STICKS = int(os.environ.get("CF_ANT_STICKS", "0"))
+ANT_SIMULATE = int(os.environ.get("CF_ANT_SIMULATE", "0"))
 
-collector: "AntCollector | MockCollector | None" = None
+# ANT+ коллектор в отдельном процессе (отсчёты через shared memory)
+ANT_PROCESS = os.environ.get("CF_ANT_PROCESS", "0") == "1"
+
+# Запись принятых страниц ANT+ в файл и воспроизведение записи вместо стиков
+ANT_RECORD = os.environ.get("CF_ANT_RECORD", "")
+ANT_REPLAY = os.environ.get("CF_ANT_REPLAY", "")
+ANT_REPLAY_SPEED = float(os.environ.get("CF_ANT_REPLAY_SPEED", "1"))
+
+collector: "AntCollector | ProcessCollector | MockCollector | ReplayCollector | None" = None
 _main_loop: asyncio.AbstractEventLoop | None = None
 
 
-def _on_hr_data(device_id: int, hr: int, battery: int):
-    """Callback из ANT+ collector: рассылает HR данные через WebSocket."""
+def _on_hr_data(
+    device_id: int, hr: int, battery: int,
+    beat_ts: float | None = None, rr_ms: int | None = None,
+):
+    """Callback из ANT+ collector: фильтрует артефакты, сохраняет отсчёт, считает
+    калории и баллы, рассылает HR данные через WebSocket. beat_ts — unix-время
+    удара по часам датчика (None — время получения), rr_ms — RR-интервал удара."""
     db = SessionLocal()
     try:
         sensor = db.query(Sensor).filter(Sensor.device_id == device_id).first()
         athlete_id = sensor.athlete_id if sensor else None
         max_hr = 190
         athlete_name = None
+        athlete = None
 
         if athlete_id:
             athlete = db.query(Athlete).filter(Athlete.id == athlete_id).first()
@@ -48,28 +83,148 @@ def _on_hr_data(device_id: int, hr: int, battery: int):
                 max_hr = athlete.max_hr
                 athlete_name = athlete.name
 
+        now = datetime.fromtimestamp(beat_ts, timezone.utc) if beat_ts else datetime.now(timezone.utc)
+        active = None
+        if athlete:
+            active = (
+                db.query(TrainingSession.id, TrainingSession.started_at)
+                .filter(TrainingSession.ended_at.is_(None))
+                .first()
+            )
+        session_id = active.id if active else None
+
+        gap = liveness.seen(device_id, now.timestamp())
+        if gap:
+            if athlete and session_id:
+                db.add(SensorGap(
+                    device_id=device_id, athlete_id=athlete_id, session_id=session_id,
+                    started_at=datetime.fromtimestamp(gap.started_at, timezone.utc),
+                    ended_at=now, seconds=round(gap.seconds, 1),
+                ))
+                db.commit()
+            _broadcast({
+                "type": "sensor_recovered",
+                "device_id": device_id,
+                "athlete_id": athlete_id,
+                "gap_seconds": round(gap.seconds, 1),
+            })
+
+        # Выбросы и невозможные значения — до зон, записи и рассылки
+        filtered = hr_filter.update(device_id, (session_id, athlete_id), now.timestamp(), hr)
+        if filtered.heart_rate is None:
+            # Заменить нечем: сырое значение сохраняется с флагом, без зон и рассылки
+            _logger.debug(f"HR artifact without replacement: device {device_id}, {hr} bpm")
+            if athlete and session_id:
+                db.add(HrReading(
+                    athlete_id=athlete_id, session_id=session_id,
+                    heart_rate=None, raw_heart_rate=filtered.raw, rejected=True,
+                    zone=None, timestamp=now,
+                ))
+                db.commit()
+            return
+        hr = filtered.heart_rate
         zone = calc_zone(hr, max_hr)
         pct = calc_percent(hr, max_hr)
 
+        totals = None
+        hrv = None
+        deltas = []
+        recoveries = []
+        clock_event = None
+        if athlete:
+            if workout_clock.on_sample(athlete_id, hr, pct, now.timestamp()):
+                workout_clock.flush(db)
+                clock_event = {"type": "wod_clock", **workout_clock.snapshot()}
+            if session_id:
+                db.add(HrReading(
+                    athlete_id=athlete_id, session_id=session_id,
+                    heart_rate=hr, raw_heart_rate=filtered.raw, rejected=filtered.rejected,
+                    zone=zone, timestamp=now,
+                ))
+                db.commit()
+            totals = effort_engine.update(
+                session_id, athlete_id, hr, now.timestamp(),
+                AthleteProfile.from_athlete(athlete),
+            )
+            effort_engine.flush_if_due(db)
+            if beat_ts is not None:
+                hrv = hrv_engine.update(session_id, athlete_id, now.timestamp(), rr_ms)
+                hrv_engine.flush_if_due(db)
+            recoveries = recovery_tracker.update(
+                athlete_id, session_id, hr, now.timestamp(), max_hr,
+            )
+            if recoveries:
+                for result in recoveries:
+                    save_recovery(db, result)
+                db.commit()
+            if session_id:
+                deltas = leaderboards.on_points(
+                    session_id, active.started_at, athlete_id, totals.effort_points,
+                )
+                leaderboards.flush_if_due(db)
+
         payload = {
             "type": "hr_update",
             "device_id": device_id,
             "athlete_id": athlete_id,
             "athlete_name": athlete_name,
             "heart_rate": hr,
+            "raw_heart_rate": filtered.raw,
+            "rejected": filtered.rejected,
             "zone": zone,
             "zone_percent": pct,
             "max_hr": max_hr,
+            **(totals.to_payload() if totals else {}),
+            **(hrv.to_payload() if hrv else {}),
         }
 
         if _main_loop and _main_loop.is_running():
             asyncio.run_coroutine_threadsafe(manager.broadcast(payload), _main_loop)
+            for delta in deltas:
+                asyncio.run_coroutine_threadsafe(manager.broadcast(delta), _main_loop)
+            if clock_event:
+                asyncio.run_coroutine_threadsafe(manager.broadcast(clock_event), _main_loop)
+            for result in recoveries:
+                asyncio.run_coroutine_threadsafe(manager.broadcast({
+                    "type": "hr_recovery",
+                    "athlete_id": result["athlete_id"],
+                    "trigger": result["trigger"],
+                    "hr_end": result["hr_end"],
+                    "hr_60": result["hr_60"],
+                    "hrr60": result["hrr60"],
+                }), _main_loop)
     except Exception as e:
         _logger.error(f"HR data callback error: {e}")
     finally:
         db.close()
 
 
+def _on_sensor_lost(device_id: int, last_seen: float):
+    """Callback из трекера живости: от датчика нет данных дольше таймаута."""
+    db = SessionLocal()
+    try:
+        sensor = db.query(Sensor).filter(Sensor.device_id == device_id).first()
+        _broadcast({
+            "type": "sensor_lost",
+            "device_id": device_id,
+            "athlete_id": sensor.athlete_id if sensor else None,
+            "last_seen": datetime.fromtimestamp(last_seen, timezone.utc),
+        })
+    finally:
+        db.close()
+
+
+def _broadcast(data: dict):
+    """Рассылка из фоновых потоков в event loop приложения."""
+    if _main_loop and _main_loop.is_running():
+        asyncio.run_coroutine_threadsafe(manager.broadcast(data), _main_loop)
+
+
+def _on_sensor_quality(sensors: list[dict]):
+    """Callback из collector'а: периодический отчёт о качестве приёма."""
+    _broadcast({"type": "sensor_quality", "sensors": sensors})
+
+
 def _on_new_sensor(device_id: int):
     """Callback: новый датчик обнаружен — уведомляет фронтенд."""
     if _main_loop and _main_loop.is_running():
@@ -88,25 +243,82 @@ async def lifespan(app: FastAPI):
     seed_db()
     _logger.info("Database initialized and seeded")
 
+    db = SessionLocal()
+    try:
+        catalog_index.load(db)
+        search_service.current()
+        effort_engine.load(db)
+        hrv_engine.load(db)
+        leaderboards.load(db)
+        zone_profiles.load(db)
+        active_wod = db.query(Wod).filter(Wod.is_active == True).first()
+        if active_wod:
+            workout_clock.attach(active_wod.id, active_wod.format, active_wod.duration_min)
+    finally:
+        db.close()
+
+    job_manager.start(_main_loop)
+
     if DEV_MODE:
         _logger.info("=== CF DEV MODE — mock collector (8 virtual sensors) ===")
         collector = MockCollector(
             on_hr_data=_on_hr_data,
             on_new_sensor=_on_new_sensor,
         )
+    elif ANT_REPLAY:
+        collector = ReplayCollector(
+            ANT_REPLAY,
+            speed=ANT_REPLAY_SPEED,
+            on_hr_data=_on_hr_data,
+            on_new_sensor=_on_new_sensor,
+            on_sensor_quality=_on_sensor_quality,
+        )
+    elif ANT_PROCESS:
+        collector = ProcessCollector(
+            max_sensors=ANT_MAX_SENSORS,
+            on_hr_data=_on_hr_data,
+            on_new_sensor=_on_new_sensor,
+            sticks=ANT_STICKS or None,
+            wildcards=ANT_WILDCARDS,
+            record_path=ANT_RECORD or None,
+            on_sensor_quality=_on_sensor_quality,
+            simulate=ANT_SIMULATE,
+        )
     else:
+        backend = None
+        if ANT_SIMULATE:
+            from .services.ant_simulated import SimulatedAntBackend
+            backend = SimulatedAntBackend(sticks=ANT_SIMULATE, straps=ANT_MAX_SENSORS)
         collector = AntCollector(
-            max_sensors=8,
+            max_sensors=ANT_MAX_SENSORS,
             on_hr_data=_on_hr_data,
             on_new_sensor=_on_new_sensor,
+            backend=backend,
+            sticks=ANT_STICKS or None,
+            wildcards=ANT_WILDCARDS,
+            record_path=ANT_RECORD or None,
+            on_sensor_quality=_on_sensor_quality,
         )
+    liveness.on_lost = _on_sensor_lost
+    liveness.start()
     collector.start()
-    _logger.info(f"Collector started ({'mock' if DEV_MODE else 'ANT+'})")
+    mode = "mock" if DEV_MODE else "replay" if ANT_REPLAY else "ANT+ simulated" if ANT_SIMULATE else "ANT+"
+    if ANT_PROCESS and not DEV_MODE and not ANT_REPLAY:
+        mode += ", separate process"
+    _logger.info(f"Collector started ({mode})")
 
     yield
 
     if collector:
         collector.stop()
+    liveness.stop()
+    db = SessionLocal()
+    try:
+        workout_clock.flush(db)
+        hrv_engine.flush(db)
+    finally:
+        db.close()
+    job_manager.stop()
     _logger.info("Shutdown complete")
 
 
@@ -125,7 +337,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from .routers import athletes, sensors, sessions, analytics, equipment, wods
+from .routers import athletes, sensors, sessions, analytics, equipment, wods, jobs, search
+from .routers import benchmarks
+from .routers import leaderboards as leaderboards_router
 
 app.include_router(athletes.router)
 app.include_router(sensors.router)
@@ -133,6 +347,10 @@ app.include_router(sessions.router)
 app.include_router(analytics.router)
 app.include_router(equipment.router)
 app.include_router(wods.router)
+app.include_router(leaderboards_router.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
+app.include_router(benchmarks.router)
 
 
 @app.get("/api/health")
@@ -141,6 +359,22 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/api/sensors/channels", response_model=SensorChannelsOut)
+def sensor_channels():
+    """Каналы ANT+ коллектора и время до первого показания по датчикам."""
+    if not isinstance(collector, (AntCollector, ProcessCollector)):
+        raise HTTPException(404, "ANT+ коллектор не запущен")
+    return collector.channel_status()
+
+
+@app.get("/api/sensors/diagnostics", response_model=SensorDiagnosticsOut)
+def sensor_diagnostics():
+    """Качество приёма по датчикам: темп и потери страниц, гистограмма пауз, батарея, канал."""
+    if not isinstance(collector, (AntCollector, ProcessCollector)):
+        raise HTTPException(404, "ANT+ коллектор не запущен")
+    return collector.quality_status()
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     """WebSocket endpoint для real-time ЧСС данных."""
@@ -1,9 +1,11 @@
 """SQLAlchemy ORM-модели приложения."""
 
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
-from sqlalchemy import String, Integer, Boolean, ForeignKey, Text, Index
+from sqlalchemy import (
+    String, Integer, Float, Boolean, ForeignKey, LargeBinary, Text, Index, UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -18,12 +20,16 @@ def _now() -> datetime:
 
 
 class Athlete(Base):
-    """Спортсмен — имя и максимальная ЧСС для расчёта зон."""
+    """Спортсмен — имя, максимальная ЧСС для расчёта зон и данные для калорий."""
     __tablename__ = "athletes"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     max_hr: Mapped[int] = mapped_column(Integer, nullable=False, default=190)
+    weight_kg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    age: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    sex: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    resting_hr: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=_now)
     updated_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
 
@@ -96,16 +102,200 @@ class HrReading(Base):
     session_id: Mapped[str | None] = mapped_column(
         String(36), ForeignKey("sessions.id", ondelete="SET NULL"), nullable=True
     )
-    heart_rate: Mapped[int] = mapped_column(Integer, nullable=False)
-    zone: Mapped[int] = mapped_column(Integer, nullable=False)
+    # После фильтра артефактов; исходное значение датчика — raw_heart_rate.
+    # NULL (и zone NULL) — отсчёт отброшен и заменить его нечем
+    heart_rate: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    raw_heart_rate: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    rejected: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    zone: Mapped[int | None] = mapped_column(Integer, nullable=True)
     timestamp: Mapped[datetime] = mapped_column(default=_now)
 
     athlete: Mapped["Athlete"] = relationship(back_populates="readings")
     session: Mapped["Session | None"] = relationship(back_populates="readings")
 
 
+class SessionTotal(Base):
+    """Итоги спортсмена за сессию: калории, баллы усилий, время в зонах."""
+    __tablename__ = "session_totals"
+    __table_args__ = (
+        UniqueConstraint("session_id", "athlete_id", name="uq_session_totals"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    calories: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    effort_points: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_1_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_2_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_3_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_4_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    active_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    trimp: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
+
+
+class HrRecovery(Base):
+    """Замер восстановления ЧСС после усилия (HRR30/HRR60)."""
+    __tablename__ = "hr_recoveries"
+    __table_args__ = (
+        Index("ix_hrr_athlete_ended", "athlete_id", "ended_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    session_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("sessions.id", ondelete="SET NULL"), nullable=True
+    )
+    wod_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("wods.id", ondelete="SET NULL"), nullable=True
+    )
+    trigger: Mapped[str] = mapped_column(String(20), nullable=False)
+    ended_at: Mapped[datetime] = mapped_column(nullable=False)
+    hr_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    hr_30: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    hr_60: Mapped[int] = mapped_column(Integer, nullable=False)
+    hrr30: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    hrr60: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class RrSeries(Base):
+    """Непрерывный отрезок RR-интервалов спортсмена в сессии.
+
+    rr_ms — массив uint16 (little-endian), интервал в мс; старший бит —
+    признак артефакта. Время удара i: started_at + сумма интервалов 1..i.
+    """
+    __tablename__ = "rr_series"
+    __table_args__ = (
+        Index("ix_rr_series_session", "session_id", "athlete_id", "started_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    # Время удара, которым закончился первый интервал отрезка
+    started_at: Mapped[datetime] = mapped_column(nullable=False)
+    beats: Mapped[int] = mapped_column(Integer, nullable=False)
+    rr_ms: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class HrvSummary(Base):
+    """ВСР спортсмена за сессию: RMSSD/SDNN всей сессии и разминки."""
+    __tablename__ = "hrv_summaries"
+    __table_args__ = (
+        UniqueConstraint("session_id", "athlete_id", name="uq_hrv_summaries"),
+        Index("ix_hrv_summaries_athlete", "athlete_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    beats: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    artifacts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rmssd: Mapped[float | None] = mapped_column(Float, nullable=True)
+    sdnn: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Первые WARMUP_S секунд данных спортсмена в сессии
+    warmup_beats: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    warmup_rmssd: Mapped[float | None] = mapped_column(Float, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
+
+
+class SensorGap(Base):
+    """Разрыв данных датчика: от последнего отсчёта до первого после потери.
+
+    Время разрыва не засчитывается в зоны и нагрузку.
+    """
+    __tablename__ = "sensor_gaps"
+    __table_args__ = (
+        Index("ix_sensor_gaps_session", "session_id", "athlete_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    device_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    athlete_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="SET NULL"), nullable=True
+    )
+    session_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=True
+    )
+    started_at: Mapped[datetime] = mapped_column(nullable=False)
+    ended_at: Mapped[datetime] = mapped_column(nullable=False)
+    seconds: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class TrainingLoad(Base):
+    """Текущая нагрузка спортсмена: EWMA острой (7 дн.) и хронической (28 дн.) TRIMP."""
+    __tablename__ = "training_loads"
+
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), primary_key=True
+    )
+    acute: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    chronic: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    last_day: Mapped[date] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
+
+
+class TrainingLoadDay(Base):
+    """Точка кривой нагрузки: дневной TRIMP и значения EWMA на конец дня."""
+    __tablename__ = "training_load_days"
+    __table_args__ = (
+        UniqueConstraint("athlete_id", "day", name="uq_training_load_days"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    day: Mapped[date] = mapped_column(nullable=False)
+    load: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    acute: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    chronic: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class LeaderboardTotal(Base):
+    """Сумма баллов усилий спортсмена за период (неделя '2026-W42' / месяц '2026-10')."""
+    __tablename__ = "leaderboard_totals"
+    __table_args__ = (
+        UniqueConstraint("period", "period_key", "athlete_id", name="uq_leaderboard_totals"),
+        Index("ix_lb_period_points", "period", "period_key", "effort_points"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    period: Mapped[str] = mapped_column(String(10), nullable=False)
+    period_key: Mapped[str] = mapped_column(String(10), nullable=False)
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    effort_points: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
+
+
 # ── WoD / Тренировки ────────────────────────────────────────
 
+class SeedVersion(Base):
+    """Хэш содержимого применённого сид-каталога (equipment, movements, wod_templates)."""
+    __tablename__ = "seed_versions"
+
+    catalog: Mapped[str] = mapped_column(String(30), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
+
+
 class Equipment(Base):
     """Каталог инвентаря."""
     __tablename__ = "equipment"
@@ -183,6 +373,10 @@ class WodTemplateMovement(Base):
 class Wod(Base):
     """Выбранная тренировка дня."""
     __tablename__ = "wods"
+    __table_args__ = (
+        # Keyset-пагинация истории по (created_at, id)
+        Index("ix_wods_created_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -194,14 +388,18 @@ class Wod(Base):
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     created_at: Mapped[datetime] = mapped_column(default=_now)
+    ended_at: Mapped[datetime | None] = mapped_column(nullable=True)
     session_id: Mapped[str | None] = mapped_column(
         String(36), ForeignKey("sessions.id", ondelete="SET NULL"), nullable=True
     )
+    # Шаблон, из которого создан WoD (None — для WoD, созданных до v0.3.0)
+    template_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
 
     movements: Mapped[list["WodMovement"]] = relationship(
         back_populates="wod", cascade="all, delete-orphan",
         order_by="WodMovement.sort_order",
     )
+    session: Mapped["Session | None"] = relationship()
 
 
 class WodMovement(Base):
@@ -222,3 +420,115 @@ class WodMovement(Base):
     rounds_note: Mapped[str | None] = mapped_column(String(100), nullable=True)
 
     wod: Mapped["Wod"] = relationship(back_populates="movements")
+
+
+class WodIntervalStat(Base):
+    """ЧСС спортсмена в одном интервале WoD (минута EMOM, раунд Tabata...)."""
+    __tablename__ = "wod_interval_stats"
+    __table_args__ = (
+        UniqueConstraint("wod_id", "athlete_id", "interval_index", name="uq_wod_interval_stats"),
+        Index("ix_wod_interval_stats_wod", "wod_id", "interval_index"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    wod_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("wods.id", ondelete="CASCADE"), nullable=False
+    )
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    interval_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Границы интервала от начала тренировки (сек, время часов WoD)
+    start_s: Mapped[float] = mapped_column(Float, nullable=False)
+    end_s: Mapped[float] = mapped_column(Float, nullable=False)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    avg_hr: Mapped[float] = mapped_column(Float, nullable=False)
+    avg_pct: Mapped[float] = mapped_column(Float, nullable=False)
+    peak_hr: Mapped[int] = mapped_column(Integer, nullable=False)
+    end_hr: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Пик рабочей фазы минус ЧСС в конце интервала
+    recovery_bpm: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class TemplateZoneProfile(Base):
+    """Наблюдаемое распределение времени по зонам для шаблона и уровня группы.
+
+    Суммы копятся по всем спортсменам всех проведённых WoD шаблона.
+    """
+    __tablename__ = "template_zone_profiles"
+    __table_args__ = (
+        UniqueConstraint("template_id", "group_level", name="uq_template_zone_profiles"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    template_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    group_level: Mapped[str] = mapped_column(String(20), nullable=False)
+    wods: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    zone_1_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_2_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_3_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    zone_4_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Сумма (% от max_hr × сек) — для средней интенсивности
+    pct_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(default=_now, onupdate=_now)
+
+
+class WodResult(Base):
+    """Результат спортсмена в WoD: время, раунды + повторения или вес — по формату.
+
+    score — единое число для сортировки (больше — лучше), см. services/benchmarks.py.
+    """
+    __tablename__ = "wod_results"
+    __table_args__ = (
+        UniqueConstraint("wod_id", "athlete_id", name="uq_wod_results"),
+        # Пересчёт лучшего результата спортсмена в бенчмарке
+        Index("ix_wod_results_best", "benchmark", "scaling", "athlete_id", "score"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    wod_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("wods.id", ondelete="CASCADE"), nullable=False
+    )
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    # Имя бенчмарка (шаблона) — None для WoD не из бенчмарков
+    benchmark: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    scaling: Mapped[str] = mapped_column(String(20), nullable=False)
+    score_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    time_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    rounds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    reps: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    load_kg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    # Результат был личным рекордом в момент записи
+    is_pr: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    recorded_at: Mapped[datetime] = mapped_column(default=_now)
+
+
+class BenchmarkBest(Base):
+    """Лучший результат спортсмена в бенчмарке на уровне скалирования.
+
+    Сводная строка: лидерборд бенчмарка и список рекордов спортсмена
+    читаются по индексам, без сканирования wod_results.
+    """
+    __tablename__ = "benchmark_bests"
+    __table_args__ = (
+        UniqueConstraint("benchmark", "scaling", "athlete_id", name="uq_benchmark_bests"),
+        Index("ix_benchmark_bests_board", "benchmark", "scaling", "score"),
+        Index("ix_benchmark_bests_athlete", "athlete_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    benchmark: Mapped[str] = mapped_column(String(200), nullable=False)
+    scaling: Mapped[str] = mapped_column(String(20), nullable=False)
+    athlete_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    result_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("wod_results.id", ondelete="CASCADE"), nullable=False
+    )
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    achieved_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    result: Mapped["WodResult"] = relationship()
@@ -5,8 +5,15 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models import Athlete, HrReading, SessionAthlete, Session as TrainingSession
-from ..schemas import AthleteStats, SessionStats, ZoneDistribution
+from ..models import (
+    Athlete, HrReading, HrRecovery, SessionAthlete, SessionTotal, Session as TrainingSession,
+)
+from ..schemas import (
+    AthleteStats, AtRiskAthlete, HrvReadiness, RecoveryTrend, SessionStats, SessionTotalOut,
+    TrainingLoadOut, ZoneDistribution,
+)
+from ..services.hrv import athlete_readiness, session_readiness
+from ..services.training_load import at_risk, load_curve
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
@@ -99,3 +106,113 @@ def athlete_history(athlete_id: str, limit: int = 20, db: Session = Depends(get_
             ),
         ))
     return result
+
+
+@router.get("/sessions/{session_id}/totals", response_model=list[SessionTotalOut])
+def session_totals(session_id: str, db: Session = Depends(get_db)):
+    """Возвращает калории, баллы усилий и время в зонах по спортсменам сессии."""
+    session = db.query(TrainingSession).filter(TrainingSession.id == session_id).first()
+    if not session:
+        raise HTTPException(404, "Сессия не найдена")
+
+    rows = (
+        db.query(SessionTotal, Athlete.name)
+        .join(Athlete, Athlete.id == SessionTotal.athlete_id)
+        .filter(SessionTotal.session_id == session_id)
+        .order_by(SessionTotal.effort_points.desc())
+        .all()
+    )
+    return [
+        SessionTotalOut(
+            session_id=t.session_id,
+            athlete_id=t.athlete_id,
+            athlete_name=name,
+            calories=round(t.calories, 1),
+            effort_points=round(t.effort_points, 1),
+            zones=ZoneDistribution(
+                zone_1_seconds=int(t.zone_1_seconds),
+                zone_2_seconds=int(t.zone_2_seconds),
+                zone_3_seconds=int(t.zone_3_seconds),
+                zone_4_seconds=int(t.zone_4_seconds),
+            ),
+            active_seconds=int(t.active_seconds),
+            trimp=round(t.trimp, 1),
+        )
+        for t, name in rows
+    ]
+
+
+@router.get("/athletes/{athlete_id}/load", response_model=TrainingLoadOut)
+def athlete_load(athlete_id: str, days: int = 56, db: Session = Depends(get_db)):
+    """Кривая тренировочной нагрузки (TRIMP, острая/хроническая EWMA, ACWR)."""
+    athlete = db.query(Athlete).filter(Athlete.id == athlete_id).first()
+    if not athlete:
+        raise HTTPException(404, "Спортсмен не найден")
+
+    points = load_curve(db, athlete_id, max(1, min(days, 365)))
+    last = points[-1]
+    return TrainingLoadOut(
+        athlete_id=athlete_id,
+        acute=last["acute"],
+        chronic=last["chronic"],
+        acwr=last["acwr"],
+        points=points,
+    )
+
+
+@router.get("/load/at-risk", response_model=list[AtRiskAthlete])
+def load_at_risk(threshold: float = 1.5, db: Session = Depends(get_db)):
+    """Спортсмены с резким ростом нагрузки (ACWR выше порога)."""
+    return at_risk(db, threshold)
+
+
+@router.get("/athletes/{athlete_id}/recovery", response_model=RecoveryTrend)
+def athlete_recovery(athlete_id: str, limit: int = 20, db: Session = Depends(get_db)):
+    """Тренд восстановления ЧСС (HRR60) спортсмена — из сохранённых замеров."""
+    athlete = db.query(Athlete).filter(Athlete.id == athlete_id).first()
+    if not athlete:
+        raise HTTPException(404, "Спортсмен не найден")
+
+    items = (
+        db.query(HrRecovery)
+        .filter(HrRecovery.athlete_id == athlete_id)
+        .order_by(HrRecovery.ended_at.desc())
+        .limit(max(limit, 10))
+        .all()
+    )
+
+    def _avg(rows):
+        return round(sum(r.hrr60 for r in rows) / len(rows), 1) if rows else None
+
+    return RecoveryTrend(
+        athlete_id=athlete_id,
+        recent_avg_hrr60=_avg(items[:5]),
+        previous_avg_hrr60=_avg(items[5:10]),
+        items=items[:limit],
+    )
+
+
+@router.get("/athletes/{athlete_id}/readiness", response_model=list[HrvReadiness])
+def athlete_hrv_readiness(athlete_id: str, limit: int = 20, db: Session = Depends(get_db)):
+    """Готовность спортсмена по ВСР разминки в последних сессиях (новые первыми)."""
+    athlete = db.query(Athlete).filter(Athlete.id == athlete_id).first()
+    if not athlete:
+        raise HTTPException(404, "Спортсмен не найден")
+    return [
+        HrvReadiness(athlete_name=athlete.name, **item)
+        for item in athlete_readiness(db, athlete_id, limit)
+    ]
+
+
+@router.get("/sessions/{session_id}/readiness", response_model=list[HrvReadiness])
+def session_hrv_readiness(session_id: str, db: Session = Depends(get_db)):
+    """Готовность участников сессии по ВСР разминки (сначала самые низкие оценки)."""
+    session = db.query(TrainingSession).filter(TrainingSession.id == session_id).first()
+    if not session:
+        raise HTTPException(404, "Сессия не найдена")
+    items = session_readiness(db, session_id)
+    names = dict(
+        db.query(Athlete.id, Athlete.name).filter(Athlete.id.in_([i["athlete_id"] for i in items]))
+    )
+    items.sort(key=lambda i: (i["score"] is None, i["score"] or 0))
+    return [HrvReadiness(athlete_name=names.get(i["athlete_id"]), **i) for i in items]
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Athlete
 from ..schemas import AthleteCreate, AthleteUpdate, AthleteOut
+from ..services.jobs import job_manager
 
 router = APIRouter(prefix="/api/athletes", tags=["athletes"])
 
@@ -19,7 +20,11 @@ def list_athletes(db: Session = Depends(get_db)):
 @router.post("", response_model=AthleteOut, status_code=201)
 def create_athlete(data: AthleteCreate, db: Session = Depends(get_db)):
     """Создаёт нового спортсмена."""
-    athlete = Athlete(name=data.name, max_hr=data.max_hr)
+    athlete = Athlete(
+        name=data.name, max_hr=data.max_hr,
+        weight_kg=data.weight_kg, age=data.age, sex=data.sex,
+        resting_hr=data.resting_hr,
+    )
     db.add(athlete)
     db.commit()
     db.refresh(athlete)
@@ -28,15 +33,28 @@ def create_athlete(data: AthleteCreate, db: Session = Depends(get_db)):
 
 @router.put("/{athlete_id}", response_model=AthleteOut)
 def update_athlete(athlete_id: str, data: AthleteUpdate, db: Session = Depends(get_db)):
-    """Обновляет данные спортсмена (имя, max_hr)."""
+    """Обновляет данные спортсмена (имя, max_hr, вес, возраст, пол, ЧСС покоя).
+
+    Изменение параметров, влияющих на зоны, калории и TRIMP, ставит в очередь
+    фоновый пересчёт итогов всех прошлых сессий и кривой нагрузки спортсмена.
+    """
     athlete = db.query(Athlete).filter(Athlete.id == athlete_id).first()
     if not athlete:
         raise HTTPException(404, "Спортсмен не найден")
     if data.name is not None:
         athlete.name = data.name
-    if data.max_hr is not None:
-        athlete.max_hr = data.max_hr
+
+    profile_changed = False
+    for field in ("max_hr", "weight_kg", "age", "sex", "resting_hr"):
+        value = getattr(data, field)
+        if value is not None and value != getattr(athlete, field):
+            setattr(athlete, field, value)
+            profile_changed = True
     db.commit()
+
+    if profile_changed:
+        job_manager.submit("recompute_athlete", {"athlete_id": athlete_id})
+
     db.refresh(athlete)
     return athlete
 
@@ -0,0 +1,54 @@
+"""API бенчмарков: лидерборды по уровню скалирования и личные рекорды."""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas import BenchmarkLeaderboardOut, BenchmarkOut, WodResultOut
+from ..services.benchmarks import athlete_records, leaderboard, score_type
+from ..services.catalog import catalog_index
+
+router = APIRouter(prefix="/api/benchmarks", tags=["benchmarks"])
+
+
+@router.get("", response_model=list[BenchmarkOut])
+def list_benchmarks():
+    """Бенчмарк-шаблоны каталога."""
+    return [
+        BenchmarkOut(
+            name=t.name, template_id=t.id, format=t.format,
+            score_type=score_type(t.format), description=t.description,
+        )
+        for t in sorted(catalog_index.current.templates.values(), key=lambda t: t.name)
+        if t.is_benchmark
+    ]
+
+
+@router.get("/athletes/{athlete_id}/records", response_model=list[WodResultOut])
+def get_athlete_records(athlete_id: str, db: Session = Depends(get_db)):
+    """Личные рекорды спортсмена во всех бенчмарках."""
+    return athlete_records(db, athlete_id)
+
+
+@router.get("/{name}/leaderboard", response_model=BenchmarkLeaderboardOut)
+def get_benchmark_leaderboard(
+    name: str,
+    scaling: str = Query("intermediate", pattern="^(beginner|intermediate|advanced|elite)$"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Лучшие результаты бенчмарка на уровне скалирования."""
+    template = next(
+        (t for t in catalog_index.current.templates.values() if t.is_benchmark and t.name == name),
+        None,
+    )
+    if template is None:
+        raise HTTPException(404, "Бенчмарк не найден")
+    entries, total = leaderboard(db, name, scaling, limit)
+    return BenchmarkLeaderboardOut(
+        benchmark=name,
+        scaling=scaling,
+        score_type=score_type(template.format),
+        total=total,
+        entries=entries,
+    )
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Equipment, GymInventory
 from ..schemas import EquipmentOut, GymInventoryOut, GymInventoryUpdate
+from ..services.catalog import catalog_index
 
 router = APIRouter(prefix="/api/equipment", tags=["equipment"])
 
@@ -24,7 +25,7 @@ def list_inventory(db: Session = Depends(get_db)):
 
 @router.put("/inventory", response_model=list[GymInventoryOut])
 def update_inventory(data: GymInventoryUpdate, db: Session = Depends(get_db)):
-    """Полностью перезаписывает инвентарь зала."""
+    """Полностью перезаписывает инвентарь зала и обновляет маску доступных шаблонов."""
     db.query(GymInventory).delete()
     for item in data.items:
         db.add(GymInventory(
@@ -32,4 +33,6 @@ def update_inventory(data: GymInventoryUpdate, db: Session = Depends(get_db)):
             quantity=item.get("quantity", 1),
         ))
     db.commit()
-    return db.query(GymInventory).all()
+    inventory = db.query(GymInventory).all()
+    catalog_index.set_inventory(item.equipment_key for item in inventory)
+    return inventory
@@ -0,0 +1,53 @@
+"""API фоновых задач: отчёты, экспорт и пересчёты в пуле процессов."""
+
+import os
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from ..schemas import JobOut, JobSubmit
+from ..services.jobs import job_manager
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.post("", response_model=JobOut, status_code=202)
+def submit_job(data: JobSubmit):
+    """Ставит задачу в очередь (или сразу возвращает результат из кэша)."""
+    try:
+        return job_manager.submit(data.kind, data.params, force=data.force)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except RuntimeError as e:
+        raise HTTPException(503, str(e))
+
+
+@router.get("", response_model=list[JobOut])
+def list_jobs():
+    """Возвращает недавние задачи."""
+    return job_manager.list()
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: str):
+    """Статус задачи (для опроса)."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(404, "Задача не найдена")
+    return job
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    """Файл результата задачи (JSON или CSV)."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(404, "Задача не найдена")
+    if job.status != "done":
+        raise HTTPException(409, "Задача ещё не завершена")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(404, "Результат недоступен")
+    if job.result_path.endswith(".csv"):
+        return FileResponse(job.result_path, media_type="text/csv",
+                            filename=f"{job.kind}-{job.id[:8]}.csv")
+    return FileResponse(job.result_path, media_type="application/json")
@@ -0,0 +1,84 @@
+"""API лидербордов по баллам усилий: сессия, неделя, месяц."""
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models import Athlete
+from ..schemas import LeaderboardEntry, LeaderboardOut, LeaderboardRank
+from ..services.leaderboard import (
+    PERIODS, leaderboards, period_key, archived_count, archived_top, archived_rank,
+)
+
+router = APIRouter(prefix="/api/leaderboards", tags=["leaderboards"])
+
+
+def _resolve_key(period: str, key: str | None) -> str | None:
+    """Проверяет период и подставляет текущий ключ недели/месяца."""
+    if period not in PERIODS:
+        raise HTTPException(404, "Неизвестный период")
+    if period == "session":
+        return leaderboards.board("session").key
+    return key or period_key(period, datetime.now(timezone.utc))
+
+
+@router.get("/{period}", response_model=LeaderboardOut)
+def get_leaderboard(
+    period: str, key: str | None = None, limit: int = 10, db: Session = Depends(get_db),
+):
+    """Top-N рейтинга. Текущие периоды — из памяти, архивные — по индексу сводной таблицы."""
+    key = _resolve_key(period, key)
+    board = leaderboards.board(period)
+    if board.key == key:
+        top, total = board.top(limit), len(board)
+    elif period == "session":
+        top, total = [], 0
+    else:
+        top = archived_top(db, period, key, limit)
+        total = archived_count(db, period, key)
+
+    names = dict(
+        db.query(Athlete.id, Athlete.name)
+        .filter(Athlete.id.in_([aid for aid, _ in top]))
+        .all()
+    )
+    return LeaderboardOut(
+        period=period,
+        period_key=key,
+        total=total,
+        entries=[
+            LeaderboardEntry(
+                rank=i + 1,
+                athlete_id=aid,
+                athlete_name=names.get(aid),
+                effort_points=round(points, 1),
+            )
+            for i, (aid, points) in enumerate(top)
+        ],
+    )
+
+
+@router.get("/{period}/athletes/{athlete_id}", response_model=LeaderboardRank)
+def get_athlete_rank(
+    period: str, athlete_id: str, key: str | None = None, db: Session = Depends(get_db),
+):
+    """Место спортсмена в рейтинге периода."""
+    key = _resolve_key(period, key)
+    board = leaderboards.board(period)
+    if board.key == key:
+        rank, points, total = board.rank(athlete_id), board.score(athlete_id), len(board)
+    elif period == "session":
+        rank, points, total = None, None, 0
+    else:
+        rank, points, total = archived_rank(db, period, key, athlete_id)
+
+    return LeaderboardRank(
+        period=period,
+        period_key=key,
+        athlete_id=athlete_id,
+        rank=rank,
+        effort_points=round(points, 1) if points is not None else None,
+        total=total,
+    )
@@ -0,0 +1,37 @@
+"""API поиска по каталогу движений и шаблонов."""
+
+from fastapi import APIRouter, Query
+
+from ..schemas import SearchResult
+from ..services.search import search_service
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResult)
+def search_catalog(
+    q: str = "",
+    type: list[str] = Query(default=[]),
+    theme: list[str] = Query(default=[]),
+    format: list[str] = Query(default=[]),
+    intensity: list[str] = Query(default=[]),
+    equipment: list[str] = Query(default=[]),
+    difficulty: list[str] = Query(default=[]),
+    modality: list[str] = Query(default=[]),
+    muscle_group: list[str] = Query(default=[]),
+    available: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Поиск по названиям (по мере набора) с фильтрами и фасетными счётчиками.
+
+    Несколько значений одного фильтра объединяются через ИЛИ, разные
+    фильтры — через И. available=true оставляет только шаблоны,
+    выполнимые с инвентарём зала.
+    """
+    filters = {
+        "type": type, "theme": theme, "format": format, "intensity": intensity,
+        "equipment": equipment, "difficulty": difficulty, "modality": modality,
+        "muscle_group": muscle_group,
+    }
+    return search_service.search(q, filters, feasible_only=available, limit=limit, offset=offset)
@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import Sensor
-from ..schemas import SensorAssign, SensorOut
+from ..schemas import SensorAssign, SensorLiveness, SensorOut
+from ..services.liveness import liveness
 
 router = APIRouter(prefix="/api/sensors", tags=["sensors"])
 
@@ -30,6 +31,12 @@ def list_sensors(db: Session = Depends(get_db)):
     return [_sensor_to_out(s) for s in rows]
 
 
+@router.get("/liveness", response_model=list[SensorLiveness])
+def sensor_liveness():
+    """Живость датчиков: последний отсчёт, потерян ли, разрывы с момента запуска."""
+    return liveness.status()
+
+
 @router.post("/{device_id}/assign", response_model=SensorOut)
 def assign_sensor(device_id: int, data: SensorAssign, db: Session = Depends(get_db)):
     """Привязывает датчик к спортсмену."""
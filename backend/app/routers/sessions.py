@@ -8,7 +8,15 @@ from sqlalchemy import func
 
 from ..database import get_db
 from ..models import Session as TrainingSession, SessionAthlete, HrReading, Athlete
-from ..schemas import SessionCreate, SessionOut, SessionAthleteAdd
+from ..schemas import RefilterOut, SessionCreate, SessionOut, SessionAthleteAdd
+from ..services.effort import effort_engine
+from ..services.hr_filter import refilter_session
+from ..services.hrv import hrv_engine
+from ..services.jobs import job_manager
+from ..services.leaderboard import leaderboards
+from ..services.recovery import recovery_tracker
+from ..services.training_load import record_session
+from ..services.zone_profiles import zone_profiles
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
@@ -74,16 +82,46 @@ def end_session(session_id: str, db: Session = Depends(get_db)):
     if session.ended_at:
         raise HTTPException(400, "Сессия уже завершена")
     session.ended_at = datetime.now(timezone.utc)
+    recovery_tracker.trigger("session_end", session.ended_at.timestamp(), session_id=session_id)
 
     for link in session.athletes:
         if not link.left_at:
             link.left_at = session.ended_at
 
     db.commit()
+    effort_engine.end_session(db, session_id)
+    hrv_engine.end_session(db, session_id)
+    leaderboards.end_session(db, session_id)
+    record_session(db, session_id)
+    zone_profiles.record_session(db, session_id)
     db.refresh(session)
     return _session_to_out(session)
 
 
+@router.post("/{session_id}/refilter", response_model=RefilterOut)
+def refilter(session_id: str, db: Session = Depends(get_db)):
+    """Пересчитывает фильтр артефактов по сырым ЧСС завершённой сессии.
+
+    Итоги спортсменов, у которых изменились значения, пересчитываются
+    фоновой задачей; если пул задач не запущен — спортсмены возвращаются
+    в recompute_pending (пересчёт можно запустить через /api/jobs).
+    """
+    session = db.query(TrainingSession).filter(TrainingSession.id == session_id).first()
+    if not session:
+        raise HTTPException(404, "Сессия не найдена")
+    if not session.ended_at:
+        raise HTTPException(400, "Сессия ещё не завершена")
+    result = refilter_session(db, session_id)
+    db.commit()
+    pending = []
+    for athlete_id in result["athletes"]:
+        try:
+            job_manager.submit("recompute_athlete", {"athlete_id": athlete_id})
+        except RuntimeError:
+            pending.append(athlete_id)
+    return RefilterOut(**result, recompute_pending=pending)
+
+
 @router.post("/{session_id}/athletes", status_code=201)
 def add_athlete_to_session(session_id: str, data: SessionAthleteAdd, db: Session = Depends(get_db)):
     """Добавляет спортсмена в активную сессию."""
@@ -1,11 +1,26 @@
 """API для генерации и управления WoD (тренировками дня)."""
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+import time
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, joinedload
 
 from ..database import get_db
-from ..models import Wod, WodMovement
-from ..schemas import WodGenerateRequest, WodSelectRequest, WodOut
+from ..models import (
+    Athlete, Session as TrainingSession, SessionTotal, Wod, WodIntervalStat, WodMovement, WodResult,
+)
+from ..schemas import (
+    BenchmarkPrEvent, WodClockOut, WodGenerateRequest, WodHistoryPage, WodIntervalsOut, WodOut,
+    WodPlanRequest, WodResultIn, WodResultOut, WodSelectRequest,
+)
+from ..services.benchmarks import delete_result, record_result, result_payload
+from ..services.planner import plan_program
+from ..services.recovery import recovery_tracker
+from ..services.workout_clock import workout_clock
+from ..services.ws_manager import manager
 from ..services.wod_generator import generate_wods, create_wod_from_template
 
 router = APIRouter(prefix="/api/wods", tags=["wods"])
@@ -40,25 +55,60 @@ def _wod_to_out(wod: Wod, movements: list[WodMovement]) -> dict:
 
 
 @router.post("/generate")
-def generate(req: WodGenerateRequest, db: Session = Depends(get_db)):
+def generate(req: WodGenerateRequest):
     """Генерирует 3 варианта WoD по теме и уровню группы."""
-    variants = generate_wods(db, req.theme, req.group_level)
+    variants = generate_wods(req.theme, req.group_level, req.intensity)
     if not variants:
         raise HTTPException(404, "Нет подходящих шаблонов для данной темы и инвентаря")
     return variants
 
 
+@router.post("/plan")
+def plan(req: WodPlanRequest, db: Session = Depends(get_db)):
+    """Строит программу тренировок на неделю/месяц (воспроизводимо по seed)."""
+    start = req.start_date or datetime.now(timezone.utc).date()
+    result = plan_program(
+        db, start, req.days, req.group_level, req.seed, req.themes,
+        req.template_gap_days, req.muscle_gap_days,
+    )
+    if not result["days"]:
+        raise HTTPException(404, "Нет подходящих шаблонов для данных тем и инвентаря")
+    return result
+
+
+def _wod_active_event(wod: dict | None) -> dict:
+    """WebSocket-событие смены активного WoD (wod=None — WoD завершён)."""
+    return {
+        "type": "wod_active",
+        "wod": WodOut.model_validate(wod).model_dump(mode="json") if wod else None,
+    }
+
+
+def _wod_clock_event() -> dict:
+    """WebSocket-событие состояния часов активного WoD."""
+    return {"type": "wod_clock", **workout_clock.snapshot()}
+
+
 @router.post("/select", response_model=WodOut)
-def select_wod(req: WodSelectRequest, db: Session = Depends(get_db)):
-    """Создаёт активный WoD из выбранного шаблона."""
+def select_wod(
+    req: WodSelectRequest, background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Создаёт активный WoD из выбранного шаблона (в рамках активной сессии, если есть)
+    и рассылает его дисплеям по WebSocket."""
+    active = db.query(TrainingSession.id).filter(TrainingSession.ended_at.is_(None)).first()
     try:
-        wod = create_wod_from_template(db, req.template_id, req.group_level)
+        wod = create_wod_from_template(
+            db, req.template_id, req.group_level, session_id=active.id if active else None,
+        )
     except ValueError as e:
         raise HTTPException(404, str(e))
-    movements = db.query(WodMovement).filter(
-        WodMovement.wod_id == wod.id
-    ).order_by(WodMovement.sort_order).all()
-    return _wod_to_out(wod, movements)
+    # Интервалы предыдущего WoD сохраняются, часы переходят к новому
+    workout_clock.stop(db)
+    workout_clock.attach(wod["id"], wod["format"], wod["duration_min"])
+    background_tasks.add_task(manager.broadcast, _wod_active_event(wod))
+    background_tasks.add_task(manager.broadcast, _wod_clock_event())
+    return wod
 
 
 @router.get("/active")
@@ -74,20 +124,246 @@ def get_active_wod(db: Session = Depends(get_db)):
 
 
 @router.post("/active/end", status_code=204)
-def end_active_wod(db: Session = Depends(get_db)):
-    """Деактивирует текущий активный WoD."""
-    db.query(Wod).filter(Wod.is_active == True).update({"is_active": False})
+def end_active_wod(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Деактивирует текущий активный WoD и запускает замер восстановления ЧСС."""
+    wod = db.query(Wod).filter(Wod.is_active == True).first()
+    db.query(Wod).filter(Wod.is_active == True).update(
+        {"is_active": False, "ended_at": datetime.now(timezone.utc)}
+    )
     db.commit()
+    workout_clock.stop(db)
+    workout_clock.detach()
+    if wod:
+        recovery_tracker.trigger("wod_end", time.time(), wod_id=wod.id)
+        background_tasks.add_task(manager.broadcast, _wod_active_event(None))
+        background_tasks.add_task(manager.broadcast, _wod_clock_event())
 
 
-@router.get("/history")
-def list_history(limit: int = 20, db: Session = Depends(get_db)):
-    """Возвращает историю тренировок."""
-    wods = db.query(Wod).order_by(Wod.created_at.desc()).limit(limit).all()
-    result = []
-    for wod in wods:
-        movements = db.query(WodMovement).filter(
-            WodMovement.wod_id == wod.id
-        ).order_by(WodMovement.sort_order).all()
-        result.append(_wod_to_out(wod, movements))
-    return result
+@router.get("/active/clock", response_model=WodClockOut)
+def get_clock():
+    """Состояние часов активного WoD."""
+    return workout_clock.snapshot()
+
+
+@router.post("/active/clock/start", response_model=WodClockOut)
+def start_clock(background_tasks: BackgroundTasks):
+    """Запускает часы (или продолжает после паузы; после финиша — заново)."""
+    try:
+        snapshot = workout_clock.start()
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    background_tasks.add_task(manager.broadcast, {"type": "wod_clock", **snapshot})
+    return snapshot
+
+
+@router.post("/active/clock/pause", response_model=WodClockOut)
+def pause_clock(background_tasks: BackgroundTasks):
+    """Ставит часы на паузу — время паузы в интервалы не входит."""
+    snapshot = workout_clock.pause()
+    background_tasks.add_task(manager.broadcast, {"type": "wod_clock", **snapshot})
+    return snapshot
+
+
+@router.post("/active/clock/stop", response_model=WodClockOut)
+def stop_clock(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Останавливает часы и сохраняет статистику интервалов."""
+    snapshot = workout_clock.stop(db)
+    background_tasks.add_task(manager.broadcast, {"type": "wod_clock", **snapshot})
+    return snapshot
+
+
+def _encode_cursor(created_at: datetime, wod_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{wod_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, wod_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), wod_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(400, "Некорректный курсор")
+
+
+def _session_total(expr):
+    """Агрегат session_totals по сессии WoD — коррелированный подзапрос."""
+    return (
+        select(expr).where(SessionTotal.session_id == Wod.session_id)
+        .correlate(Wod).scalar_subquery()
+    )
+
+
+@router.get("/history", response_model=WodHistoryPage)
+def list_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    slim: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Возвращает историю тренировок страницами (keyset по created_at, id).
+
+    Всё читается одним запросом: WoD, сводка связанной сессии и — если не
+    запрошена краткая проекция (slim) — движения через joined eager loading.
+    """
+    q = (
+        db.query(
+            Wod,
+            TrainingSession.name, TrainingSession.started_at, TrainingSession.ended_at,
+            _session_total(func.count(SessionTotal.id)).label("athlete_count"),
+            _session_total(func.coalesce(func.sum(SessionTotal.calories), 0.0)).label("calories"),
+            _session_total(func.coalesce(func.sum(SessionTotal.effort_points), 0.0)).label("points"),
+        )
+        .outerjoin(TrainingSession, TrainingSession.id == Wod.session_id)
+    )
+    if cursor:
+        created_at, wod_id = _decode_cursor(cursor)
+        q = q.filter(or_(
+            Wod.created_at < created_at,
+            and_(Wod.created_at == created_at, Wod.id < wod_id),
+        ))
+    if not slim:
+        q = q.options(joinedload(Wod.movements))
+    rows = q.order_by(Wod.created_at.desc(), Wod.id.desc()).limit(limit + 1).all()
+
+    items = []
+    for wod, s_name, s_started, s_ended, athletes, calories, points in rows[:limit]:
+        items.append({
+            "id": wod.id,
+            "name": wod.name,
+            "format": wod.format,
+            "duration_min": wod.duration_min,
+            "intensity": wod.intensity,
+            "theme": wod.theme,
+            "group_level": wod.group_level,
+            "description": wod.description,
+            "is_active": wod.is_active,
+            "created_at": wod.created_at,
+            "ended_at": wod.ended_at,
+            "template_id": wod.template_id,
+            "movements": None if slim else wod.movements,
+            "session": {
+                "id": wod.session_id,
+                "name": s_name,
+                "started_at": s_started,
+                "ended_at": s_ended,
+                "athlete_count": athletes,
+                "total_calories": round(calories, 1),
+                "total_effort_points": round(points, 1),
+            } if s_started else None,
+        })
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{wod_id}/results", response_model=list[WodResultOut])
+def list_results(wod_id: str, db: Session = Depends(get_db)):
+    """Результаты спортсменов в WoD, от лучшего к худшему."""
+    rows = (
+        db.query(WodResult, Athlete.name)
+        .outerjoin(Athlete, Athlete.id == WodResult.athlete_id)
+        .filter(WodResult.wod_id == wod_id)
+        .order_by(WodResult.score.desc(), WodResult.recorded_at)
+        .all()
+    )
+    return [result_payload(result, name) for result, name in rows]
+
+
+@router.post("/{wod_id}/results", response_model=WodResultOut)
+def save_result(
+    wod_id: str, data: WodResultIn, background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Записывает результат спортсмена (повторная запись заменяет прежний).
+
+    Новый личный рекорд в бенчмарке рассылается по WebSocket.
+    """
+    wod = db.query(Wod).filter(Wod.id == wod_id).first()
+    if not wod:
+        raise HTTPException(404, "WoD не найден")
+    athlete = db.query(Athlete).filter(Athlete.id == data.athlete_id).first()
+    if not athlete:
+        raise HTTPException(404, "Спортсмен не найден")
+    try:
+        result, previous = record_result(
+            db, wod, athlete.id, scaling=data.scaling, time_seconds=data.time_seconds,
+            rounds=data.rounds, reps=data.reps, load_kg=data.load_kg,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    payload = result_payload(result, athlete.name)
+    if result.is_pr:
+        background_tasks.add_task(manager.broadcast, BenchmarkPrEvent(
+            benchmark=result.benchmark,
+            scaling=result.scaling,
+            athlete_id=athlete.id,
+            athlete_name=athlete.name,
+            display=payload["display"],
+            previous=previous,
+        ).model_dump())
+    return payload
+
+
+@router.delete("/{wod_id}/results/{athlete_id}", status_code=204)
+def remove_result(wod_id: str, athlete_id: str, db: Session = Depends(get_db)):
+    """Удаляет результат спортсмена; рекорды пересчитываются."""
+    result = db.query(WodResult).filter(
+        WodResult.wod_id == wod_id, WodResult.athlete_id == athlete_id,
+    ).first()
+    if not result:
+        raise HTTPException(404, "Результат не найден")
+    delete_result(db, result)
+
+
+@router.get("/{wod_id}/intervals", response_model=WodIntervalsOut)
+def get_intervals(wod_id: str, db: Session = Depends(get_db)):
+    """ЧСС по интервалам WoD: сводка по группе и по каждому спортсмену.
+
+    Для WoD, часы которого ещё идут, — текущие накопленные значения.
+    """
+    wod = db.query(Wod).filter(Wod.id == wod_id).first()
+    if not wod:
+        raise HTTPException(404, "WoD не найден")
+    rows = workout_clock.live_rows(wod_id)
+    live = rows is not None
+    if rows is None:
+        rows = [
+            {c.name: getattr(r, c.name) for c in WodIntervalStat.__table__.columns}
+            for r in db.query(WodIntervalStat)
+            .filter(WodIntervalStat.wod_id == wod_id)
+            .order_by(WodIntervalStat.interval_index, WodIntervalStat.athlete_id)
+        ]
+    names = dict(
+        db.query(Athlete.id, Athlete.name)
+        .filter(Athlete.id.in_({r["athlete_id"] for r in rows}))
+        .all()
+    )
+
+    intervals: dict[int, dict] = {}
+    for r in rows:
+        interval = intervals.setdefault(r["interval_index"], {
+            "index": r["interval_index"],
+            "start_s": r["start_s"],
+            "end_s": r["end_s"],
+            "athletes": [],
+        })
+        interval["athletes"].append({
+            "athlete_id": r["athlete_id"],
+            "athlete_name": names.get(r["athlete_id"]),
+            **{k: r[k] for k in ("samples", "avg_hr", "avg_pct", "peak_hr", "end_hr", "recovery_bpm")},
+        })
+    for interval in intervals.values():
+        athletes = interval["athletes"]
+        interval["avg_hr"] = round(sum(a["avg_hr"] for a in athletes) / len(athletes), 1)
+        interval["avg_pct"] = round(sum(a["avg_pct"] for a in athletes) / len(athletes), 1)
+        interval["peak_hr"] = max(a["peak_hr"] for a in athletes)
+        interval["avg_recovery_bpm"] = round(sum(a["recovery_bpm"] for a in athletes) / len(athletes), 1)
+
+    return WodIntervalsOut(
+        wod_id=wod.id,
+        format=wod.format,
+        live=live,
+        intervals=[intervals[i] for i in sorted(intervals)],
+    )
@@ -1,6 +1,6 @@
 """Pydantic-схемы для валидации запросов и ответов API."""
 
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -9,17 +9,29 @@ from pydantic import BaseModel, Field, field_validator
 class AthleteCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     max_hr: int = Field(default=190, ge=60, le=250)
+    weight_kg: float | None = Field(None, ge=20, le=250)
+    age: int | None = Field(None, ge=10, le=100)
+    sex: str | None = Field(None, pattern="^(male|female)$")
+    resting_hr: int | None = Field(None, ge=30, le=120)
 
 
 class AthleteUpdate(BaseModel):
     name: str | None = Field(None, min_length=1, max_length=100)
     max_hr: int | None = Field(None, ge=60, le=250)
+    weight_kg: float | None = Field(None, ge=20, le=250)
+    age: int | None = Field(None, ge=10, le=100)
+    sex: str | None = Field(None, pattern="^(male|female)$")
+    resting_hr: int | None = Field(None, ge=30, le=120)
 
 
 class AthleteOut(BaseModel):
     id: str
     name: str
     max_hr: int
+    weight_kg: float | None = None
+    age: int | None = None
+    sex: str | None = None
+    resting_hr: int | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -42,6 +54,88 @@ class SensorOut(BaseModel):
     ignored: bool = False
 
 
+class SensorChannel(BaseModel):
+    channel: int
+    stick: int
+    # Выделенный канал: датчик, который он ищет; None — wildcard
+    target_device_id: int | None = None
+    device_id: int | None = None
+    state: str  # receiving | searching | wildcard
+
+
+class SensorFirstReading(BaseModel):
+    device_id: int
+    # Секунды от запуска коллектора до первого показания ЧСС
+    seconds: float
+    dedicated: bool
+
+
+class SensorStickHealth(BaseModel):
+    """Перезапуски стика и время восстановления приёма."""
+    stick: int
+    state: str  # starting | running | restarting
+    restarts: int
+    last_error: str | None = None
+    # Текущий простой, с (от потери данных); None — стик принимает
+    down_s: float | None = None
+    # Время восстановления (от потери данных до первой страницы после перезапуска)
+    last_recover_s: float | None = None
+    max_recover_s: float | None = None
+
+
+class SensorCollectorProcess(BaseModel):
+    """Процесс ANT+ коллектора (CF_ANT_PROCESS) и кольцевой буфер отсчётов."""
+    pid: int | None = None
+    alive: bool
+    restarts: int
+    last_exit: str | None = None
+    # Отсчётов прочитано из буфера и потеряно (читатель отстал)
+    samples: int
+    lost: int
+
+
+class SensorChannelsOut(BaseModel):
+    sticks: int
+    wildcards: int
+    channels: list[SensorChannel]
+    stick_health: list[SensorStickHealth]
+    # Только для коллектора в отдельном процессе
+    process: SensorCollectorProcess | None = None
+    first_readings: list[SensorFirstReading]
+
+
+class SensorQuality(BaseModel):
+    """Качество приёма датчика (с запуска коллектора и за последний период)."""
+    device_id: int
+    stick: int
+    channel: int
+    battery: int | None
+    pages: int
+    missed: int
+    loss_pct: float | None
+    page_rate_hz: float | None
+    expected_rate_hz: float
+    recent_loss_pct: float | None
+    dropouts: int
+    # Паузы между страницами по корзинам gap_buckets_ms (+ последняя — дольше)
+    gap_histogram: list[int]
+    last_page_s: float
+
+
+class SensorDiagnosticsOut(BaseModel):
+    gap_buckets_ms: list[int]
+    sensors: list[SensorQuality]
+
+
+class SensorLiveness(BaseModel):
+    """Живость датчика: последний отсчёт и разрывы с момента запуска."""
+    device_id: int
+    last_seen: datetime
+    lost: bool
+    gaps: int
+    gap_seconds: float
+
+
 # ── Sessions ──────────────────────────────────────────────
 
 class SessionCreate(BaseModel):
@@ -62,11 +156,23 @@ class SessionAthleteAdd(BaseModel):
     athlete_id: str
 
 
+class RefilterOut(BaseModel):
+    """Итог пересчёта фильтра артефактов по сохранённой сессии."""
+    readings: int
+    rejected: int
+    changed: int
+    # Спортсмены, чьи итоги не удалось поставить на пересчёт (пул задач не запущен)
+    recompute_pending: list[str] = []
+
+
 # ── HR data ───────────────────────────────────────────────
 
 class HrReadingOut(BaseModel):
-    heart_rate: int
-    zone: int
+    # None — отсчёт отброшен фильтром и заменить его нечем
+    heart_rate: int | None = None
+    raw_heart_rate: int | None = None
+    rejected: bool = False
+    zone: int | None = None
     timestamp: datetime
 
 
@@ -76,10 +182,51 @@ class HrUpdate(BaseModel):
     device_id: int
     athlete_id: str | None
     athlete_name: str | None
+    # heart_rate — после фильтра артефактов; rejected — значение датчика заменено
     heart_rate: int
+    raw_heart_rate: int | None = None
+    rejected: bool = False
     zone: int
     zone_percent: float
     max_hr: int | None
+    calories: float | None = None
+    effort_points: float | None = None
+    zone_seconds: list[int] | None = None
+    # ВСР за последнюю минуту (мс), None — мало интервалов
+    rmssd: float | None = None
+    sdnn: float | None = None
+
+
+class HrRecoveryEvent(BaseModel):
+    """WebSocket-событие: замер восстановления ЧСС завершён."""
+    type: str = "hr_recovery"
+    athlete_id: str
+    trigger: str
+    hr_end: int
+    hr_60: int
+    hrr60: int
+
+
+class SensorLostEvent(BaseModel):
+    """WebSocket-событие: от датчика нет данных дольше таймаута — карточка устарела."""
+    type: str = "sensor_lost"
+    device_id: int
+    athlete_id: str | None
+    last_seen: datetime
+
+
+class SensorRecoveredEvent(BaseModel):
+    """WebSocket-событие: данные от потерянного датчика снова поступают."""
+    type: str = "sensor_recovered"
+    device_id: int
+    athlete_id: str | None
+    gap_seconds: float
+
+
+class SensorQualityEvent(BaseModel):
+    """WebSocket-событие: периодический отчёт о качестве приёма датчиков."""
+    type: str = "sensor_quality"
+    sensors: list[SensorQuality]
 
 
 class NewSensorEvent(BaseModel):
@@ -114,6 +261,197 @@ class AthleteStats(BaseModel):
     max_hr_ever: int
 
 
+class SessionTotalOut(BaseModel):
+    """Итоги спортсмена за сессию (калории, баллы усилий, время в зонах)."""
+    session_id: str
+    athlete_id: str
+    athlete_name: str | None = None
+    calories: float
+    effort_points: float
+    zones: ZoneDistribution
+    active_seconds: int
+    trimp: float = 0
+
+
+class TrainingLoadPoint(BaseModel):
+    day: date
+    load: float
+    acute: float
+    chronic: float
+    acwr: float | None = None
+
+
+class TrainingLoadOut(BaseModel):
+    """Кривая нагрузки спортсмена: TRIMP по дням и EWMA 7/28 дней."""
+    athlete_id: str
+    acute: float
+    chronic: float
+    acwr: float | None = None
+    points: list[TrainingLoadPoint]
+
+
+class HrRecoveryOut(BaseModel):
+    session_id: str | None
+    wod_id: str | None
+    trigger: str
+    ended_at: datetime
+    hr_end: int
+    hr_30: int | None
+    hr_60: int
+    hrr30: int | None
+    hrr60: int
+
+    model_config = {"from_attributes": True}
+
+
+class RecoveryTrend(BaseModel):
+    """История HRR60 спортсмена: замеры и средние (последние 5 / предыдущие 5)."""
+    athlete_id: str
+    recent_avg_hrr60: float | None
+    previous_avg_hrr60: float | None
+    items: list[HrRecoveryOut]
+
+
+class HrvReadiness(BaseModel):
+    """Готовность по ВСР разминки: ln(RMSSD) относительно предыдущих сессий."""
+    athlete_id: str
+    athlete_name: str | None = None
+    session_id: str
+    started_at: datetime
+    warmup_rmssd: float
+    baseline_ln_rmssd: float | None
+    z: float | None
+    # 0..100, 50 — на уровне базы; None — база ещё набирается
+    score: int | None
+    status: str  # ready | caution | low | baseline
+
+
+class AtRiskAthlete(BaseModel):
+    athlete_id: str
+    athlete_name: str
+    acute: float
+    chronic: float
+    acwr: float
+
+
+# ── Leaderboards ────────────────────────────────────────────
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    athlete_id: str
+    athlete_name: str | None = None
+    effort_points: float
+
+
+class LeaderboardOut(BaseModel):
+    period: str
+    period_key: str | None
+    total: int
+    entries: list[LeaderboardEntry]
+
+
+class LeaderboardRank(BaseModel):
+    period: str
+    period_key: str | None
+    athlete_id: str
+    rank: int | None
+    effort_points: float | None
+    total: int
+
+
+class LeaderboardDelta(BaseModel):
+    """WebSocket-событие: изменились баллы или место спортсмена в рейтинге."""
+    type: str = "leaderboard_delta"
+    period: str
+    period_key: str | None
+    athlete_id: str
+    effort_points: float
+    rank: int
+    prev_rank: int | None
+
+
+# ── Benchmarks / Результаты ─────────────────────────────────
+
+class WodResultIn(BaseModel):
+    athlete_id: str
+    # Уровень скалирования; по умолчанию — уровень группы WoD
+    scaling: str | None = Field(None, pattern="^(beginner|intermediate|advanced|elite)$")
+    time_seconds: float | None = Field(None, gt=0)
+    rounds: int | None = Field(None, ge=0)
+    reps: int | None = Field(None, ge=0)
+    load_kg: float | None = Field(None, gt=0)
+
+
+class WodResultOut(BaseModel):
+    id: int
+    wod_id: str
+    athlete_id: str
+    athlete_name: str | None = None
+    benchmark: str | None
+    scaling: str
+    score_type: str
+    time_seconds: float | None
+    rounds: int | None
+    reps: int | None
+    load_kg: float | None
+    score: float
+    display: str
+    is_pr: bool
+    recorded_at: datetime
+
+
+class BenchmarkEntry(WodResultOut):
+    rank: int
+
+
+class BenchmarkOut(BaseModel):
+    name: str
+    template_id: str
+    format: str
+    score_type: str
+    description: str | None = None
+
+
+class BenchmarkLeaderboardOut(BaseModel):
+    benchmark: str
+    scaling: str
+    score_type: str
+    total: int
+    entries: list[BenchmarkEntry]
+
+
+class BenchmarkPrEvent(BaseModel):
+    """WebSocket-событие: спортсмен установил личный рекорд в бенчмарке."""
+    type: str = "benchmark_pr"
+    benchmark: str
+    scaling: str
+    athlete_id: str
+    athlete_name: str | None
+    display: str
+    previous: str | None
+
+
+# ── Jobs ────────────────────────────────────────────────────
+
+class JobSubmit(BaseModel):
+    kind: str
+    params: dict = {}
+    force: bool = False
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    params: dict
+    status: str
+    cached: bool = False
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    model_config = {"from_attributes": True}
+
+
 # ── Equipment / Инвентарь ───────────────────────────────────
 
 class EquipmentOut(BaseModel):
@@ -218,11 +556,113 @@ class WodOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class WodSessionSummary(BaseModel):
+    id: str
+    name: str | None
+    started_at: datetime
+    ended_at: datetime | None
+    # Спортсмены с данными ЧСС в сессии и их суммарные итоги
+    athlete_count: int = 0
+    total_calories: float = 0.0
+    total_effort_points: float = 0.0
+
+
+class WodHistoryItem(BaseModel):
+    id: str
+    name: str
+    format: str
+    duration_min: int
+    intensity: str
+    theme: str
+    group_level: str
+    description: str | None = None
+    is_active: bool
+    created_at: datetime
+    ended_at: datetime | None = None
+    template_id: str | None = None
+    # None в краткой проекции (slim=true)
+    movements: list[WodMovementOut] | None = None
+    session: WodSessionSummary | None = None
+
+
+class WodHistoryPage(BaseModel):
+    items: list[WodHistoryItem]
+    # Курсор следующей страницы (None — страниц больше нет)
+    next_cursor: str | None = None
+
+
+class WodClockOut(BaseModel):
+    wod_id: str | None
+    format: str | None
+    # idle | running | paused | finished
+    status: str
+    elapsed_s: float
+    duration_s: float
+    interval_index: int | None
+    interval_count: int
+    interval_s: float
+    # work | rest для Tabata, иначе None
+    phase: str | None
+    # Время сервера (epoch) в момент снимка — для локального досчёта секунд
+    server_time: float
+
+
+class WodIntervalAthlete(BaseModel):
+    athlete_id: str
+    athlete_name: str | None = None
+    samples: int
+    avg_hr: float
+    avg_pct: float
+    peak_hr: int
+    end_hr: int
+    recovery_bpm: int
+
+
+class WodInterval(BaseModel):
+    index: int
+    start_s: float
+    end_s: float
+    avg_hr: float
+    avg_pct: float
+    peak_hr: int
+    avg_recovery_bpm: float
+    athletes: list[WodIntervalAthlete]
+
+
+class WodIntervalsOut(BaseModel):
+    wod_id: str
+    format: str
+    # True — часы WoD ещё идут, значения текущие
+    live: bool
+    intervals: list[WodInterval]
+
+
+class SearchResult(BaseModel):
+    total: int
+    # Движения ({type: "movement", id: key, ...}) и шаблоны ({type: "template", ...})
+    items: list[dict]
+    # Фасет → значение → число найденных документов
+    facets: dict[str, dict[str, int]]
+
+
 class WodGenerateRequest(BaseModel):
     theme: str
     group_level: str = "intermediate"
+    # Желаемая нагрузка: варианты ранжируются по наблюдаемому профилю ЧСС
+    intensity: str | None = Field(None, pattern="^(low|medium|high)$")
 
 
 class WodSelectRequest(BaseModel):
     template_id: str
     group_level: str = "intermediate"
+
+
+class WodPlanRequest(BaseModel):
+    start_date: date | None = None
+    days: int = Field(default=7, ge=1, le=31)
+    group_level: str = "intermediate"
+    seed: int | None = None
+    themes: list[str] | None = None
+    # Не повторять шаблон / преобладающую группу мышц чаще, чем раз в N дней
+    template_gap_days: int = Field(default=14, ge=0, le=60)
+    muscle_gap_days: int = Field(default=1, ge=0, le=7)
@@ -2,35 +2,126 @@
 
 Переиспользует подход из ant_hr_monitor.py, но вместо print()
 отправляет данные через callback для интеграции с FastAPI.
+
+Коллектор работает с несколькими стиками сразу (services/ant_hardware.py):
+у каждого стика свой поток приёма, каналы распределяются по стикам по
+кругу. Колбэки каналов только кладут события в общую очередь, а один
+поток-диспетчер сливает их в единый поток данных: он же следит, чтобы
+датчик, найденный на одном канале, не принимался вторым каналом того
+же или другого стика — дубль отправляется на повторный поиск.
+
+Каналы назначает планировщик (в потоке диспетчера). Привязанные к
+спортсменам датчики из таблицы sensors получают выделенные каналы
+(поиск конкретного device_id) — они находятся быстрее wildcard-поиска и
+не зависят от порядка обнаружения. Несколько wildcard-каналов остаются
+для новых датчиков. Канал, поймавший игнорируемый датчик, замолчавший
+датчик или не нашедший свой датчик за SEARCH_TIMEOUT_S, перенастраивается
+на следующий ожидающий датчик. Для каждого датчика фиксируется время от
+запуска коллектора до первого показания ЧСС.
+
+С record_path каждая принятая страница ЧСС (с monotonic-временем приёма
+и device_id) дописывается в бинарный лог (services/ant_recording.py);
+лог воспроизводит ReplayCollector.
+
+Дальше передаётся ровно один отсчёт на каждый новый удар (смена
+beat_count, services/beats.py) с временем удара по часам датчика —
+повторы той же страницы отбрасываются независимо от значения ЧСС.
+Вместе с отсчётом передаётся RR-интервал удара (мс) по часам датчика.
+
+По каждой принятой странице копятся счётчики качества приёма
+(services/rf_quality.py); раз в REPORT_INTERVAL_S они передаются в
+on_sensor_quality.
+
+Потоки стиков работают под надзором: после ошибки USB (или зависания —
+стик принимал страницы и замолчал на всех каналах сразу) стик и его
+каналы закрываются, а переоткрываются с экспоненциальной паузой и
+случайным разбросом (NODE_RESTART_MIN_S..NODE_RESTART_MAX_S). Состояние
+датчиков (удары, качество приёма, привязки) переживает перезапуск,
+а каналы сразу ищут датчики, которые принимали до сбоя. Для каждого
+стика считается время восстановления — от потери данных до первой
+страницы после перезапуска.
 """
 
-import asyncio
 import logging
+import queue
+import random
 import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Callable, Optional
 
-from openant.devices import ANTPLUS_NETWORK_KEY
-from openant.devices.heart_rate import HeartRate, HeartRateData
-from openant.easy.node import Node
-
 from ..database import SessionLocal
-from ..hr_zones import calc_zone, calc_percent
 from ..models import Sensor
+from .ant_hardware import AntBackend, AntNode, HrChannel, HrPage
+from .ant_recording import PageRecorder
+from .beats import BeatTracker
+from .rf_quality import GAP_BUCKETS_MS, REPORT_INTERVAL_S, RfQuality
 
 _logger = logging.getLogger(__name__)
 
+# Пауза перед переоткрытием стика после ошибки: удваивается с каждой
+# ошибкой подряд (со случайным разбросом в пределах половины)
+NODE_RESTART_MIN_S = 0.5
+NODE_RESTART_MAX_S = 30.0
+
+# Стик, проработавший столько без ошибок, снова перезапускается с минимальной паузы
+NODE_STABLE_S = 60.0
+
+# Стик, принимавший страницы и замолчавший на всех каналах дольше, считается зависшим
+NODE_STALL_S = 20.0
+
+# Через сколько канал, поймавший уже занятый или игнорируемый датчик, ищет заново
+DUPLICATE_RETRY_S = 5.0
+
+# Сколько каналов по умолчанию оставлять на поиск новых датчиков
+WILDCARD_CHANNELS = 2
+
+# Период планировщика и перечитывания таблицы sensors
+SCHEDULE_INTERVAL_S = 1.0
+SENSORS_REFRESH_S = 5.0
+
+# Датчик без страниц дольше SILENT_S считается ушедшим
+SILENT_S = 30.0
 
-def _get_device_id(device: HeartRate) -> str:
-    """Извлекает реальный ANT+ Device ID из строкового представления."""
-    return str(device).rsplit("_", 1)[-1]
+# Выделенный канал, не нашедший датчик за SEARCH_TIMEOUT_S, освобождается;
+# датчик снова получит канал не раньше чем через ABSENT_RETRY_S
+SEARCH_TIMEOUT_S = 30.0
+ABSENT_RETRY_S = 120.0
+
+# Строка датчика в БД обновляется при смене ЧСС или не чаще раза в SENSOR_UPDATE_S
+SENSOR_UPDATE_S = 2.0
+
+
+@dataclass
+class _StickHealth:
+    """Перезапуски стика и время восстановления приёма."""
+    state: str = "starting"  # starting | running | restarting
+    restarts: int = 0
+    # Ошибок подряд — от них зависит пауза перед перезапуском
+    failures: int = 0
+    last_error: str | None = None
+    opened_at: float = 0.0
+    last_page: float = 0.0
+    # Начало текущего простоя (monotonic); ждать ли первой страницы —
+    # до сбоя стик принимал датчики
+    down_since: float | None = None
+    await_page: bool = False
+    last_recover_s: float | None = None
+    max_recover_s: float | None = None
+
+
+def _restart_delay(failures: int) -> float:
+    """Пауза перед перезапуском после failures ошибок подряд."""
+    delay = min(NODE_RESTART_MAX_S, NODE_RESTART_MIN_S * 2 ** max(failures - 1, 0))
+    return random.uniform(delay / 2, delay)
 
 
 class AntCollector:
-    """Фоновый ANT+ коллектор, работающий в отдельном потоке.
+    """Фоновый ANT+ коллектор: потоки стиков и поток-диспетчер.
 
     Обнаруживает датчики ЧСС и вызывает callback при получении данных.
-    Управляет жизненным циклом Node и каналов.
+    Управляет жизненным циклом стиков и каналов.
     """
 
     def __init__(
@@ -38,116 +129,548 @@ class AntCollector:
         max_sensors: int = 8,
         on_hr_data: Optional[Callable] = None,
         on_new_sensor: Optional[Callable] = None,
+        backend: Optional[AntBackend] = None,
+        sticks: Optional[int] = None,
+        wildcards: int = WILDCARD_CHANNELS,
+        record_path: Optional[str] = None,
+        on_sensor_quality: Optional[Callable] = None,
     ):
         self._max_sensors = max_sensors
         self._on_hr_data = on_hr_data
         self._on_new_sensor = on_new_sensor
-        self._node: Optional[Node] = None
-        self._devices: list[HeartRate] = []
+        self._on_sensor_quality = on_sensor_quality
+        self._backend = backend
+        # Сколько стиков использовать (None — все найденные)
+        self._sticks = sticks
+        self._wildcards = wildcards
+        self._record_path = record_path
+        self._recorder: Optional[PageRecorder] = None
+        self._nodes: dict[int, AntNode] = {}
+        # Номер слота (сквозной номер канала) → открытый канал
+        self._channels: dict[int, HrChannel] = {}
+        # Слоты каждого стика и стик каждого слота
+        self._node_slots: dict[int, list[int]] = {}
+        self._slot_stick: dict[int, int] = {}
+        self._events: queue.Queue = queue.Queue()
+        # Состояние диспетчера (меняется только в его потоке)
+        self._owners: dict[int, int] = {}
+        self._slot_device: dict[int, int] = {}
+        self._retry_at: dict[int, float] = {}
+        # Планировщик: цель канала (device_id, 0 — wildcard) и начало поиска
+        self._slot_target: dict[int, int] = {}
+        self._slot_since: dict[int, float] = {}
+        self._assigned: list[int] = []
+        self._ignored: set[int] = set()
+        self._absent_until: dict[int, float] = {}
+        self._last_page: dict[int, float] = {}
+        # Каналы, открытые после перезапуска на поиск непривязанного датчика
+        self._resumed: set[int] = set()
+        self._next_schedule = 0.0
+        self._next_refresh = 0.0
+        # Время до первого показания: device_id → (секунды, выделенный канал)
+        self._started = 0.0
+        self._first_reading: dict[int, tuple[float, bool]] = {}
+        self._beats: dict[int, BeatTracker] = {}
+        # Последняя записанная в БД ЧСС датчика и время записи
+        self._sensor_written: dict[int, tuple[int, float]] = {}
+        # Сдвиг monotonic-времени приёма к unix-времени (время ударов в колбэке)
+        self._wall_offset = time.time() - time.monotonic()
+        self._quality = RfQuality()
+        self._next_quality = 0.0
         self._known_ids: set[int] = set()
-        self._thread: Optional[threading.Thread] = None
+        self._health: dict[int, _StickHealth] = {}
+        self._threads: list[threading.Thread] = []
         self._running = False
+        self._stop_event = threading.Event()
         self._lock = threading.Lock()
 
     def start(self):
-        """Запускает ANT+ collector в фоновом потоке."""
+        """Запускает потоки стиков и диспетчер."""
         if self._running:
             return
+        if self._backend is None:
+            from .ant_hardware import OpenAntBackend
+            self._backend = OpenAntBackend()
+
+        count = self._backend.stick_count()
+        if self._sticks:
+            count = min(count, self._sticks)
+        if count == 0:
+            _logger.error("ANT+ collector: no ANT USB sticks found")
+            return
+
+        if self._record_path:
+            self._recorder = PageRecorder(self._record_path)
+
+        # Каналы по стикам по кругу: слот i → стик i % count
+        self._node_slots = {i: list(range(i, self._max_sensors, count)) for i in range(count)}
+        self._slot_stick = {slot: i for i, slots in self._node_slots.items() for slot in slots}
+        self._health = {i: _StickHealth() for i in range(count)}
+
+        # Сначала выделенные каналы привязанным датчикам, остальные — wildcard
+        self._refresh_sensors()
+        dedicated = self._assigned[:max(0, self._max_sensors - self._wildcards)]
+        self._slot_target = {
+            slot: dedicated[slot] if slot < len(dedicated) else 0
+            for slot in range(self._max_sensors)
+        }
+        self._started = time.monotonic()
+        self._wall_offset = time.time() - self._started
+
         self._running = True
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-        _logger.info("ANT+ collector started")
+        self._stop_event.clear()
+        self._threads = [threading.Thread(target=self._dispatch, daemon=True, name="ant-dispatch")]
+        self._threads += [
+            threading.Thread(target=self._node_loop, args=(i,), daemon=True, name=f"ant-stick-{i}")
+            for i in range(count)
+        ]
+        for t in self._threads:
+            t.start()
+        _logger.info(
+            f"ANT+ collector started ({count} stick(s), {self._max_sensors} channels, "
+            f"{len(dedicated)} dedicated)"
+        )
 
     def stop(self):
         """Останавливает collector и закрывает все каналы."""
         self._running = False
-        for d in self._devices:
-            try:
-                d.close_channel()
-            except Exception:
-                pass
-        if self._node:
+        self._stop_event.set()
+        with self._lock:
+            nodes = list(self._nodes.values())
+        for node in nodes:
             try:
-                self._node.stop()
-            except Exception:
-                pass
+                node.stop()
+            except Exception as e:
+                _logger.debug(f"Stick {node.index} stop error: {e}")
+        self._events.put(None)
+        if self._recorder:
+            self._recorder.close()
         _logger.info("ANT+ collector stopped")
 
-    def _run(self):
-        """Основной цикл collector'а (работает в отдельном потоке)."""
-        try:
-            self._node = Node()
-            self._node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+    # ── Потоки стиков ─────────────────────────────────────────
 
-            for i in range(self._max_sensors):
-                hr = HeartRate(self._node, device_id=0)
-                hr.on_found = self._make_on_found(i, hr)
-                hr.on_device_data = self._make_on_data(i, hr)
-                self._devices.append(hr)
+    def _node_loop(self, index: int):
+        """Цикл стика под надзором: открыть, принимать, при сбое — закрыть и переоткрыть с паузой."""
+        health = self._health[index]
+        # Датчики, которые принимали каналы до сбоя: слот → device_id
+        resume: dict[int, int] = {}
+        while self._running:
+            node = None
+            try:
+                node = self._backend.open_node(index)
+                slots = self._node_slots[index]
+                if len(slots) > node.max_channels:
+                    _logger.warning(
+                        f"Stick {index}: {len(slots)} channels requested, "
+                        f"only {node.max_channels} available"
+                    )
+                    slots = slots[:node.max_channels]
+                with self._lock:
+                    self._nodes[index] = node
+                for slot in slots:
+                    target = resume.pop(slot, 0) or self._slot_target.get(slot, 0)
+                    channel = node.open_channel(target)
+                    channel.on_found = self._make_on_found(slot)
+                    channel.on_page = self._make_on_page(slot)
+                    with self._lock:
+                        self._channels[slot] = channel
+                    self._events.put(("open", slot, target))
+                resume.clear()
+                with self._lock:
+                    health.state = "running"
+                    health.opened_at = time.monotonic()
+                if not self._running:
+                    return
+                node.run()
+                if not self._running:
+                    return
+                raise RuntimeError("receive loop exited")
+            except Exception as e:
+                with self._lock:
+                    health.last_error = str(e) or type(e).__name__
+                _logger.error(f"ANT+ stick {index} error: {health.last_error}")
+            finally:
+                resume = self._teardown(index, node)
+            if not self._running:
+                return
 
-            self._node.start()
-        except Exception as e:
-            _logger.error(f"ANT+ collector error: {e}")
-            if self._running:
-                _logger.info("Restarting ANT+ collector in 5s...")
-                import time
-                time.sleep(5)
-                if self._running:
-                    self._run()
-
-    def _make_on_found(self, index: int, device: HeartRate):
-        """Создаёт callback обнаружения датчика."""
-        def on_found():
-            dev_id = _get_device_id(device)
-            numeric_id = int(dev_id)
             with self._lock:
-                is_new = numeric_id not in self._known_ids
-                self._known_ids.add(numeric_id)
-
-            _logger.info(f"Sensor #{index + 1} found (ID: {dev_id})")
-
-            self._upsert_sensor(numeric_id)
+                ran = time.monotonic() - health.opened_at if health.opened_at else 0.0
+                health.failures = 1 if ran >= NODE_STABLE_S else health.failures + 1
+                health.restarts += 1
+                health.opened_at = 0.0
+                health.state = "restarting"
+                delay = _restart_delay(health.failures)
+            _logger.info(
+                f"Restarting ANT+ stick {index} in {delay:.1f}s "
+                f"(failure {health.failures} in a row)..."
+            )
+            self._stop_event.wait(delay)
+
+    def _teardown(self, index: int, node: Optional[AntNode]) -> dict[int, int]:
+        """Закрывает стик и его каналы; возвращает датчики, которые принимали каналы."""
+        with self._lock:
+            self._nodes.pop(index, None)
+            channels = {
+                slot: self._channels.pop(slot)
+                for slot in self._node_slots[index] if slot in self._channels
+            }
+        resume = {}
+        for slot, channel in channels.items():
+            try:
+                if channel.device_id:
+                    resume[slot] = channel.device_id
+            except Exception:
+                pass
+        if node is not None:
+            try:
+                node.stop()
+            except Exception as e:
+                _logger.debug(f"Stick {index} stop error: {e}")
+        self._events.put(("reset", index, time.monotonic()))
+        return resume
+
+    def _make_on_found(self, slot: int):
+        """Колбэк обнаружения датчика: только передаёт событие диспетчеру."""
+        def on_found(device_id: int):
+            self._events.put(("found", slot, device_id))
+        return on_found
 
-            if is_new and self._on_new_sensor and not self._is_sensor_assigned(numeric_id) and not self._is_sensor_ignored(numeric_id):
-                try:
-                    self._on_new_sensor(numeric_id)
-                except Exception as e:
-                    _logger.error(f"on_new_sensor callback error: {e}")
+    def _make_on_page(self, slot: int):
+        """Колбэк страницы ЧСС: снимок страницы со временем приёма — диспетчеру.
 
-        return on_found
+        Снимок делается здесь, в потоке стика: к моменту обработки в
+        диспетчере openant уже перезапишет объект страницы следующей.
+        """
+        def on_page(data):
+            self._events.put(("page", slot, (time.monotonic(), HrPage.snapshot(data))))
+        return on_page
 
-    def _make_on_data(self, index: int, device: HeartRate):
-        """Создаёт callback обработки ЧСС данных."""
-        last_hr = [None]
-        last_time = [0.0]
+    # ── Диспетчер ─────────────────────────────────────────────
 
-        def on_data(page, page_name, data):
-            if not isinstance(data, HeartRateData):
-                return
+    def _dispatch(self):
+        """Сливает события всех стиков в один поток данных."""
+        while self._running:
+            try:
+                event = self._events.get(timeout=0.5)
+            except queue.Empty:
+                event = ()
+            if event is None:
+                break
+            try:
+                if event:
+                    kind, slot, payload = event
+                    if kind == "found":
+                        self._handle_found(slot, payload)
+                    elif kind == "page":
+                        self._handle_page(slot, *payload)
+                    elif kind == "open":
+                        self._handle_open(slot, payload)
+                    elif kind == "reset":
+                        self._handle_reset(slot, payload)
+                self._schedule()
+                self._report_quality(time.monotonic())
+            except Exception as e:
+                _logger.error(f"ANT+ dispatch error: {e}")
+
+    def _handle_open(self, slot: int, target: int):
+        """Канал (пере)открыт на поиск target."""
+        now = time.monotonic()
+        self._slot_target[slot] = target
+        self._slot_since[slot] = now
+        if target and target not in self._assigned:
+            self._resumed.add(slot)
+        index = self._slot_stick.get(slot, 0)
+        health = self._health.get(index)
+        if health is not None and health.down_since is not None and not health.await_page:
+            # До сбоя стик никого не принимал — восстановлен, как только открыт
+            self._recovered(index, health, now)
+
+    def _release(self, slot: int):
+        device_id = self._slot_device.pop(slot, None)
+        if device_id is not None and self._owners.get(device_id) == slot:
+            del self._owners[device_id]
+
+    def _handle_reset(self, index: int, ts: float):
+        """Стик переоткрывается: его каналы больше не владеют датчиками."""
+        slots = self._node_slots.get(index, [])
+        health = self._health.get(index)
+        if health is not None and health.down_since is None:
+            health.down_since = ts
+            health.await_page = any(slot in self._slot_device for slot in slots)
+        for slot in slots:
+            self._release(slot)
+            self._retry_at.pop(slot, None)
+            self._resumed.discard(slot)
+
+    def _recovered(self, index: int, health: _StickHealth, now: float):
+        seconds = now - health.down_since
+        health.down_since = None
+        health.last_recover_s = seconds
+        health.max_recover_s = max(health.max_recover_s or 0.0, seconds)
+        _logger.info(f"ANT+ stick {index} recovered in {seconds:.1f}s")
+
+    def _supervise(self, now: float):
+        """Стик, принимавший страницы и замолчавший на всех каналах, перезапускается."""
+        for index, health in self._health.items():
+            if health.state != "running" or health.down_since is not None:
+                continue
+            if health.last_page <= health.opened_at or now - health.last_page <= NODE_STALL_S:
+                continue
+            with self._lock:
+                node = self._nodes.get(index)
+            if node is None:
+                continue
+            _logger.warning(
+                f"ANT+ stick {index}: no pages on any channel for "
+                f"{now - health.last_page:.0f}s, restarting"
+            )
+            health.down_since = health.last_page
+            health.await_page = True
+            # stop() зависшего стика может блокировать — не в потоке диспетчера
+            threading.Thread(target=node.stop, daemon=True, name=f"ant-stop-{index}").start()
+
+    def _handle_found(self, slot: int, device_id: int):
+        self._release(slot)
+        if device_id in self._ignored:
+            _logger.info(f"Ignored sensor {device_id} on channel #{slot + 1}, will search again")
+            self._retry_at[slot] = time.monotonic() + DUPLICATE_RETRY_S
+            return
+        owner = self._owners.get(device_id)
+        if owner is not None and owner != slot:
+            # Датчик уже принимается другим каналом — этот канал ищет дальше
+            _logger.info(
+                f"Sensor {device_id} already on channel #{owner + 1}, "
+                f"channel #{slot + 1} will search again"
+            )
+            self._retry_at[slot] = time.monotonic() + DUPLICATE_RETRY_S
+            return
+        self._owners[device_id] = slot
+        self._slot_device[slot] = device_id
+        self._retry_at.pop(slot, None)
+        self._absent_until.pop(device_id, None)
+        self._last_page[device_id] = time.monotonic()
 
-            hr = data.heart_rate
-            if hr == 0:
-                return
+        is_new = device_id not in self._known_ids
+        self._known_ids.add(device_id)
+        _logger.info(f"Sensor #{slot + 1} found (ID: {device_id})")
 
-            import time
-            now = time.time()
-            if hr == last_hr[0] and (now - last_time[0]) < 2.0:
-                return
-            last_hr[0] = hr
-            last_time[0] = now
+        self._upsert_sensor(device_id)
 
-            dev_id = _get_device_id(device)
-            numeric_id = int(dev_id)
+        if is_new and self._on_new_sensor and not self._is_sensor_assigned(device_id) and not self._is_sensor_ignored(device_id):
+            try:
+                self._on_new_sensor(device_id)
+            except Exception as e:
+                _logger.error(f"on_new_sensor callback error: {e}")
 
-            self._update_sensor_hr(numeric_id, hr, data.battery_percentage)
+    # ── Планировщик каналов ───────────────────────────────────
 
-            if self._on_hr_data:
-                try:
-                    self._on_hr_data(numeric_id, hr, data.battery_percentage)
-                except Exception as e:
-                    _logger.error(f"on_hr_data callback error: {e}")
+    def _refresh_sensors(self):
+        """Перечитывает привязанные (по свежести) и игнорируемые датчики."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Sensor.device_id, Sensor.athlete_id, Sensor.ignored).order_by(
+                Sensor.last_seen_at.desc().nulls_last(),
+            ).all()
+        except Exception as e:
+            _logger.error(f"DB load sensors error: {e}")
+            return
+        finally:
+            db.close()
+        self._assigned = [d for d, athlete_id, ignored in rows if athlete_id and not ignored]
+        self._ignored = {d for d, _, ignored in rows if ignored}
+
+    def _pending(self, now: float) -> list[int]:
+        """Привязанные датчики без канала (по приоритету)."""
+        busy = set(self._owners)
+        busy.update(t for s, t in self._slot_target.items() if t and s not in self._slot_device)
+        return [
+            d for d in self._assigned
+            if d not in busy and self._absent_until.get(d, 0.0) <= now
+        ]
+
+    def _next_target(self, slot: int, channels: dict[int, HrChannel], now: float) -> int:
+        """Цель для освободившегося канала: ожидающий датчик, если wildcard-каналов хватает."""
+        searching = sum(
+            1 for s in channels
+            if s != slot and self._slot_target.get(s, 0) == 0
+            and s not in self._slot_device and s not in self._retry_at
+        )
+        if searching >= self._wildcards:
+            pending = self._pending(now)
+            if pending:
+                return pending[0]
+        return 0
+
+    def _schedule(self):
+        """Перенастраивает каналы: дубли, игнорируемые, молчащие и ненайденные датчики."""
+        now = time.monotonic()
+        if now < self._next_schedule:
+            return
+        self._next_schedule = now + SCHEDULE_INTERVAL_S
+        self._supervise(now)
+        if now >= self._next_refresh:
+            self._next_refresh = now + SENSORS_REFRESH_S
+            self._refresh_sensors()
+
+        with self._lock:
+            channels = dict(self._channels)
+        for slot, channel in sorted(channels.items()):
+            device_id = self._slot_device.get(slot)
+            target = self._slot_target.get(slot, 0)
+            reason = None
+            if slot in self._retry_at:
+                if self._retry_at[slot] <= now:
+                    del self._retry_at[slot]
+                    reason = "duplicate"
+            elif device_id is not None:
+                if device_id in self._ignored:
+                    reason = f"sensor {device_id} ignored"
+                elif now - self._last_page.get(device_id, now) > SILENT_S:
+                    self._absent_until[device_id] = now + ABSENT_RETRY_S
+                    reason = f"sensor {device_id} silent"
+            elif target:
+                if target not in self._assigned and slot not in self._resumed:
+                    reason = f"sensor {target} unassigned"
+                elif now - self._slot_since.get(slot, now) > SEARCH_TIMEOUT_S:
+                    self._absent_until[target] = now + ABSENT_RETRY_S
+                    reason = f"sensor {target} not found"
+            elif self._next_target(slot, channels, now):
+                reason = "assigned sensor waiting"
+            if reason:
+                self._reassign(slot, channel, channels, now, reason)
+
+    def _reassign(self, slot: int, channel: HrChannel, channels: dict[int, HrChannel], now: float, reason: str):
+        self._release(slot)
+        self._resumed.discard(slot)
+        target = self._next_target(slot, channels, now)
+        try:
+            channel.search(target)
+        except Exception as e:
+            _logger.error(f"Channel #{slot + 1} search error: {e}")
+            return
+        self._slot_target[slot] = target
+        self._slot_since[slot] = now
+        _logger.info(
+            f"Channel #{slot + 1} ({reason}) -> "
+            f"{f'sensor {target}' if target else 'wildcard search'}"
+        )
+
+    def channel_status(self) -> dict:
+        """Состояние каналов и стиков, время до первого показания по датчикам."""
+        with self._lock:
+            slots = sorted(self._channels)
+        channels = []
+        for slot in slots:
+            device_id = self._slot_device.get(slot)
+            target = self._slot_target.get(slot, 0)
+            channels.append({
+                "channel": slot + 1,
+                "stick": self._slot_stick.get(slot, 0),
+                "target_device_id": target or None,
+                "device_id": device_id,
+                "state": "receiving" if device_id is not None else "searching" if target else "wildcard",
+            })
+        now = time.monotonic()
+        with self._lock:
+            sticks = [
+                {
+                    "stick": index,
+                    "state": h.state,
+                    "restarts": h.restarts,
+                    "last_error": h.last_error,
+                    "down_s": round(now - h.down_since, 1) if h.down_since is not None else None,
+                    "last_recover_s": round(h.last_recover_s, 2) if h.last_recover_s is not None else None,
+                    "max_recover_s": round(h.max_recover_s, 2) if h.max_recover_s is not None else None,
+                }
+                for index, h in sorted(self._health.items())
+            ]
+        return {
+            "sticks": len(self._node_slots),
+            "wildcards": self._wildcards,
+            "channels": channels,
+            "stick_health": sticks,
+            "first_readings": [
+                {"device_id": d, "seconds": round(sec, 2), "dedicated": dedicated}
+                for d, (sec, dedicated) in sorted(dict(self._first_reading).items(), key=lambda x: x[1][0])
+            ],
+        }
+
+    def _handle_page(self, slot: int, ts: float, data):
+        """Страница канала; ts — monotonic-время приёма."""
+        device_id = self._slot_device.get(slot)
+        if device_id is None or self._owners.get(device_id) != slot:
+            return
+        index = self._slot_stick.get(slot, 0)
+        health = self._health.get(index)
+        if health is not None:
+            health.last_page = ts
+            if health.down_since is not None:
+                self._recovered(index, health, ts)
+
+        if self._recorder:
+            self._recorder.write(ts, device_id, data)
+        self._last_page[device_id] = ts
+        self._quality.on_page(
+            device_id, self._slot_stick.get(slot, 0), slot + 1, ts, data.battery_percentage,
+        )
+        tracker = self._beats.get(device_id)
+        if tracker is None:
+            tracker = self._beats[device_id] = BeatTracker()
+        beat_ts = tracker.update(ts, data.beat_count, data.beat_time)
+        hr = data.heart_rate
+        if beat_ts is None or hr == 0:
+            return
 
-        return on_data
+        if device_id not in self._first_reading:
+            seconds = ts - self._started
+            dedicated = self._slot_target.get(slot, 0) == device_id
+            self._first_reading[device_id] = (seconds, dedicated)
+            _logger.info(
+                f"Sensor {device_id} first reading after {seconds:.1f}s "
+                f"({'dedicated' if dedicated else 'wildcard'} channel #{slot + 1})"
+            )
+
+        written = self._sensor_written.get(device_id)
+        if written is None or hr != written[0] or ts - written[1] >= SENSOR_UPDATE_S:
+            self._sensor_written[device_id] = (hr, ts)
+            self._update_sensor_hr(device_id, hr, data.battery_percentage)
+
+        if self._on_hr_data:
+            try:
+                self._on_hr_data(
+                    device_id, hr, data.battery_percentage,
+                    beat_ts + self._wall_offset, tracker.rr_ms,
+                )
+            except Exception as e:
+                _logger.error(f"on_hr_data callback error: {e}")
+
+    # ── Качество приёма ───────────────────────────────────────
+
+    def _clock(self) -> float:
+        """Текущее время на шкале времени приёма страниц."""
+        return time.monotonic()
+
+    def _report_quality(self, now: float):
+        """Раз в REPORT_INTERVAL_S закрывает период счётчиков и отдаёт их в on_sensor_quality."""
+        if now < self._next_quality:
+            return
+        self._next_quality = now + REPORT_INTERVAL_S
+        self._quality.roll(now)
+        if self._on_sensor_quality:
+            try:
+                self._on_sensor_quality(self._quality.snapshot(now))
+            except Exception as e:
+                _logger.error(f"on_sensor_quality callback error: {e}")
+
+    def quality_status(self) -> dict:
+        """Качество приёма по датчикам: темп страниц, потери, паузы, батарея, стик и канал."""
+        return {
+            "gap_buckets_ms": list(GAP_BUCKETS_MS),
+            "sensors": self._quality.snapshot(self._clock()),
+        }
+
+    # ── БД ────────────────────────────────────────────────────
 
     def _is_sensor_ignored(self, device_id: int) -> bool:
         """Проверяет, помечен ли датчик как проигнорированный."""
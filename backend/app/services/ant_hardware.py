@@ -0,0 +1,226 @@
+"""Доступ к ANT+ стикам за интерфейсом: стик (AntNode) и канал ЧСС (HrChannel).
+
+AntCollector работает только через эти интерфейсы, поэтому реальные
+стики (OpenAntBackend, библиотека openant) и симулятор
+(services/ant_simulated.py) взаимозаменяемы.
+
+Колбэки каналов вызываются из потока своего стика:
+  on_found(device_id) — канал привязался к датчику;
+  on_page(data)       — страница ЧСС (атрибуты как у openant HeartRateData:
+                        heart_rate, beat_count, beat_time, battery_percentage).
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable
+
+_logger = logging.getLogger(__name__)
+
+# VID/PID поддерживаемых стиков: ANTUSB2 и ANTUSB-m
+ANT_USB_IDS = ((0x0FCF, 0x1008), (0x0FCF, 0x1009))
+
+# Период страниц ANT+ HRM: 8070/32768 с (~4 страницы в секунду)
+HRM_PAGE_PERIOD_S = 8070 / 32768
+
+
+@dataclass
+class HrPage:
+    """Страница ЧСС с полями openant HeartRateData (для симулятора и записей)."""
+    heart_rate: int
+    # Счётчик ударов (8 бит) и время последнего удара, с (период 64 с)
+    beat_count: int
+    beat_time: float
+    previous_heart_beat_time: float
+    battery_percentage: int
+
+    @classmethod
+    def snapshot(cls, data) -> "HrPage":
+        """Копия полей страницы: openant меняет один HeartRateData на месте с каждой страницей."""
+        return cls(
+            data.heart_rate, data.beat_count, data.beat_time,
+            data.previous_heart_beat_time, data.battery_percentage,
+        )
+
+
+class HrChannel(ABC):
+    """Канал приёма ЧСС на стике. device_id=0 — поиск любого датчика (wildcard)."""
+
+    node_index: int
+    number: int
+    on_found: Callable[[int], None] = staticmethod(lambda device_id: None)
+    on_page: Callable[[object], None] = staticmethod(lambda data: None)
+
+    @property
+    @abstractmethod
+    def device_id(self) -> int:
+        """ID привязанного датчика (0 — пока не найден)."""
+
+    @abstractmethod
+    def search(self, device_id: int = 0):
+        """Отвязывает канал и заново открывает его на поиск device_id (0 — любой)."""
+
+    @abstractmethod
+    def close(self):
+        """Закрывает канал."""
+
+
+class AntNode(ABC):
+    """Один USB-стик: до max_channels каналов и цикл приёма."""
+
+    index: int
+    max_channels: int
+
+    @abstractmethod
+    def open_channel(self, device_id: int = 0) -> HrChannel:
+        """Открывает канал ЧСС на поиск device_id (0 — любой датчик)."""
+
+    @abstractmethod
+    def run(self):
+        """Цикл приёма; блокирует поток стика до stop() или ошибки USB."""
+
+    @abstractmethod
+    def stop(self):
+        """Останавливает цикл и освобождает стик."""
+
+
+class AntBackend(ABC):
+    """Источник стиков."""
+
+    @abstractmethod
+    def stick_count(self) -> int:
+        """Сколько стиков подключено."""
+
+    @abstractmethod
+    def open_node(self, index: int) -> AntNode:
+        """Открывает стик с номером index (0..stick_count-1)."""
+
+
+# ── openant ─────────────────────────────────────────────────
+
+# openant создаёт драйвер внутри Node() через find_driver() — первый
+# найденный стик. Для выбора конкретного стика find_driver подменяется
+# на время создания Node; блокировка исключает гонку между потоками стиков.
+_node_create_lock = threading.Lock()
+
+
+def _find_sticks() -> list:
+    import usb.core
+
+    devices = []
+    for vendor, product in ANT_USB_IDS:
+        devices.extend(usb.core.find(find_all=True, idVendor=vendor, idProduct=product))
+    return sorted(devices, key=lambda d: (d.bus, d.address))
+
+
+class _OpenAntChannel(HrChannel):
+    def __init__(self, node: "OpenAntNode", number: int, device_id: int):
+        from openant.devices.heart_rate import HeartRate, HeartRateData
+
+        self._page_type = HeartRateData
+        self.node_index = node.index
+        self.number = number
+        self._device = HeartRate(node._node, device_id=device_id)
+        self._device.on_found = lambda: self.on_found(self._device.device_id)
+        self._device.on_device_data = self._on_device_data
+
+    def _on_device_data(self, page, page_name, data):
+        if isinstance(data, self._page_type):
+            self.on_page(data)
+
+    @property
+    def device_id(self) -> int:
+        return self._device.device_id
+
+    def search(self, device_id: int = 0):
+        # Канал переиспользуется: openant адресует каналы по позиции в
+        # Node.channels, поэтому удалять их из середины списка нельзя
+        device = self._device
+        device.channel.close()
+        device.device_id = device_id
+        device.trans_type = 0
+        device._found = False
+        device._attached = False
+        device.channel.set_id(device_id, device.device_type, 0)
+        device.channel.open()
+
+    def close(self):
+        try:
+            self._device.channel.close()
+        except Exception as e:
+            _logger.debug(f"Channel close error (stick {self.node_index} ch {self.number}): {e}")
+
+
+class OpenAntNode(AntNode):
+    def __init__(self, index: int, usb_device):
+        import openant.base.ant as ant_module
+        from openant.base.driver import USBDriver
+        from openant.devices import ANTPLUS_NETWORK_KEY
+        from openant.easy.node import Node
+
+        class _StickDriver(USBDriver):
+            """USB-драйвер openant, привязанный к конкретному стику."""
+
+            def open(self):
+                import usb.util
+
+                self.dev = usb_device
+                try:
+                    if self.dev.is_kernel_driver_active(0):
+                        self.dev.detach_kernel_driver(0)
+                except NotImplementedError:
+                    pass
+                self.dev.set_configuration()
+                try:
+                    self.dev.reset()
+                except NotImplementedError:
+                    pass
+                intf = self.dev.get_active_configuration()[(0, 0)]
+                self._out = usb.util.find_descriptor(intf, custom_match=lambda e: (
+                    usb.util.endpoint_direction(e.bEndpointAddress) == usb.util.ENDPOINT_OUT
+                ))
+                self._in = usb.util.find_descriptor(intf, custom_match=lambda e: (
+                    usb.util.endpoint_direction(e.bEndpointAddress) == usb.util.ENDPOINT_IN
+                ))
+
+        self.index = index
+        with _node_create_lock:
+            original = ant_module.find_driver
+            ant_module.find_driver = _StickDriver
+            try:
+                self._node = Node()
+            finally:
+                ant_module.find_driver = original
+        self._node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+        self.max_channels = self._node.max_channels
+        self._channels: list[_OpenAntChannel] = []
+
+    def open_channel(self, device_id: int = 0) -> HrChannel:
+        channel = _OpenAntChannel(self, len(self._channels), device_id)
+        self._channels.append(channel)
+        return channel
+
+    def run(self):
+        self._node.start()
+
+    def stop(self):
+        for channel in self._channels:
+            channel.close()
+        try:
+            self._node.stop()
+        except Exception as e:
+            _logger.debug(f"Node stop error (stick {self.index}): {e}")
+
+
+class OpenAntBackend(AntBackend):
+    """Реальные ANTUSB2/ANTUSB-m стики через openant."""
+
+    def __init__(self):
+        self._sticks = _find_sticks()
+
+    def stick_count(self) -> int:
+        return len(self._sticks)
+
+    def open_node(self, index: int) -> AntNode:
+        return OpenAntNode(index, self._sticks[index])
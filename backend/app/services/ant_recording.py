@@ -0,0 +1,120 @@
+"""Запись сырых страниц ANT+ HRM в компактный бинарный лог и чтение лога.
+
+Формат файла:
+  заголовок  MAGIC (6 байт), версия (uint8), время начала записи
+             (unix time, float64);
+  записи     фиксированной длины RECORD.size = 19 байт, little-endian:
+             monotonic-время приёма (float64, с), device_id (uint32),
+             heart_rate (uint8), beat_count (uint8), beat_time и
+             previous_heart_beat_time (uint16, 1/1024 с — как в эфире ANT+),
+             battery_percentage (uint8).
+
+Повторная запись в тот же файл дописывает страницы в конец; между
+сеансами время monotonic может скакнуть — при воспроизведении паузы
+ограничиваются (services/replay_collector.py). Модуль не зависит от
+openant и БД и используется также из ant_hr_monitor.py.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator
+
+from .ant_hardware import HrPage
+
+_logger = logging.getLogger(__name__)
+
+MAGIC = b"CFANT\x00"
+VERSION = 1
+HEADER = struct.Struct("<6sBd")
+RECORD = struct.Struct("<dIBBHHB")
+
+# Нет значения времени удара (openant отдаёт -1.0 до первой страницы)
+NO_BEAT_TIME = 0xFFFF
+
+# Как часто сбрасывать буфер на диск
+FLUSH_INTERVAL_S = 1.0
+
+
+def _beat_ticks(seconds: float) -> int:
+    if seconds is None or seconds < 0:
+        return NO_BEAT_TIME
+    # Настоящее значение 0xFFFF совпало бы с «нет времени» — сдвиг на 1/1024 с
+    return min(round(seconds * 1024) % 0x10000, NO_BEAT_TIME - 1)
+
+
+def _beat_seconds(ticks: int) -> float:
+    return -1.0 if ticks == NO_BEAT_TIME else ticks / 1024
+
+
+class PageRecorder:
+    """Дописывает страницы ЧСС в лог; потокобезопасен."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pages = 0
+        self._lock = threading.Lock()
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, "rb") as f:
+                _read_header(f)
+        self._file: BinaryIO | None = open(path, "ab")
+        if not exists:
+            self._file.write(HEADER.pack(MAGIC, VERSION, time.time()))
+        self._last_flush = time.monotonic()
+        _logger.info(f"Recording ANT+ pages to {path}")
+
+    def write(self, ts: float, device_id: int, data) -> None:
+        """Записывает страницу (атрибуты как у HeartRateData), ts — time.monotonic()."""
+        record = RECORD.pack(
+            ts, device_id, data.heart_rate & 0xFF, data.beat_count & 0xFF,
+            _beat_ticks(data.beat_time), _beat_ticks(data.previous_heart_beat_time),
+            data.battery_percentage & 0xFF,
+        )
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(record)
+            self.pages += 1
+            if ts - self._last_flush >= FLUSH_INTERVAL_S:
+                self._file.flush()
+                self._last_flush = ts
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        _logger.info(f"ANT+ recording closed: {self.pages} pages -> {self.path}")
+
+
+def _read_header(f: BinaryIO) -> float:
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("Файл записи ANT+ пуст или обрезан")
+    magic, version, started = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError("Не файл записи ANT+")
+    if version != VERSION:
+        raise ValueError(f"Неподдерживаемая версия записи ANT+: {version}")
+    return started
+
+
+def read_pages(path: str) -> Iterator[tuple[float, int, HrPage]]:
+    """Читает лог: (monotonic-время приёма, device_id, страница). Обрезанный хвост пропускается."""
+    with open(path, "rb") as f:
+        _read_header(f)
+        while True:
+            raw = f.read(RECORD.size)
+            if len(raw) < RECORD.size:
+                break
+            ts, device_id, hr, beat_count, beat_time, prev_time, battery = RECORD.unpack(raw)
+            yield ts, device_id, HrPage(
+                heart_rate=hr,
+                beat_count=beat_count,
+                beat_time=_beat_seconds(beat_time),
+                previous_heart_beat_time=_beat_seconds(prev_time),
+                battery_percentage=battery,
+            )
@@ -0,0 +1,214 @@
+"""Симулятор ANT+ стиков и нагрудных датчиков ЧСС (без USB).
+
+Реализует интерфейсы services/ant_hardware.py: несколько стиков делят
+общий «эфир» виртуальных датчиков. Как и реальный стик, wildcard-канал
+привязывается к любому слышимому датчику — в том числе к тому, что уже
+принимает другой канал или другой стик, — поэтому симулятор проверяет
+слияние потоков и устранение дублей в AntCollector. unplug() и hang()
+имитируют выдернутый и зависший стик — для проверки перезапусков.
+
+Страницы — HrPage с полями openant HeartRateData.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from .ant_hardware import HRM_PAGE_PERIOD_S, AntBackend, AntNode, HrChannel, HrPage
+
+_logger = logging.getLogger(__name__)
+
+# Сколько в среднем длится поиск wildcard-канала
+SEARCH_DELAY_S = 0.5
+
+
+class SimulatedStrap:
+    """Виртуальный датчик: ЧСС — случайное блуждание, удары — по текущей ЧСС."""
+
+    def __init__(self, device_id: int, base_hr: int, rng: random.Random, battery: int = 90):
+        self.device_id = device_id
+        self.hr = float(base_hr)
+        self.battery = battery
+        self._rng = rng
+        self._beats = 0
+        self._beat_time = 0.0
+        self._prev_beat_time = 0.0
+        self._last = None
+        self._phase = 0.0
+
+    def page(self, now: float) -> HrPage:
+        if self._last is not None:
+            dt = now - self._last
+            self.hr = min(200.0, max(50.0, self.hr + self._rng.gauss(0, 1.5)))
+            # Удары, пришедшиеся на интервал dt
+            self._phase += dt * self.hr / 60.0
+            while self._phase >= 1.0:
+                self._phase -= 1.0
+                self._beats += 1
+                self._prev_beat_time = self._beat_time
+                self._beat_time = now - self._phase * 60.0 / self.hr
+        self._last = now
+        return HrPage(
+            heart_rate=round(self.hr),
+            beat_count=self._beats % 256,
+            beat_time=self._beat_time % 64.0,
+            previous_heart_beat_time=self._prev_beat_time % 64.0,
+            battery_percentage=self.battery,
+        )
+
+
+class _SimChannel(HrChannel):
+    def __init__(self, node: "_SimNode", number: int, device_id: int):
+        self.node_index = node.index
+        self.number = number
+        self._node = node
+        self._device_id = 0
+        self._target = device_id
+        self._open = True
+        self._search_until = 0.0
+        self.search(device_id)
+
+    @property
+    def device_id(self) -> int:
+        return self._device_id
+
+    def search(self, device_id: int = 0):
+        with self._node.lock:
+            self._device_id = 0
+            self._target = device_id
+            self._open = True
+            self._search_until = self._node.now() + self._node.rng.uniform(0, 2 * SEARCH_DELAY_S)
+
+    def close(self):
+        with self._node.lock:
+            self._open = False
+            self._device_id = 0
+
+    def tick(self, now: float):
+        if not self._open:
+            return
+        if self._device_id == 0:
+            if now < self._search_until:
+                return
+            audible = self._node.audible()
+            if self._target:
+                strap = audible.get(self._target)
+            else:
+                strap = self._node.rng.choice(list(audible.values())) if audible else None
+            if strap is None:
+                return
+            self._device_id = strap.device_id
+            self.on_found(strap.device_id)
+        strap = self._node.audible().get(self._device_id)
+        if strap is not None:
+            page = strap.page(now)
+            if self._node.rng.random() >= self._node.loss:
+                self.on_page(page)
+
+
+class _SimNode(AntNode):
+    def __init__(self, backend: "SimulatedAntBackend", index: int, max_channels: int):
+        self.index = index
+        self.max_channels = max_channels
+        self.rng = random.Random(backend.seed * 1000 + index if backend.seed is not None else None)
+        self._backend = backend
+        self.loss = backend.loss.get(index, 0.0)
+        self.lock = backend.lock
+        self._channels: list[_SimChannel] = []
+        self._stop = threading.Event()
+        # Зависший стик: цикл приёма идёт, но страниц нет
+        self.hung = False
+
+    def now(self) -> float:
+        return self._backend.now()
+
+    def audible(self) -> dict[int, SimulatedStrap]:
+        return self._backend.audible(self.index)
+
+    def open_channel(self, device_id: int = 0) -> HrChannel:
+        if len(self._channels) >= self.max_channels:
+            raise RuntimeError(f"Stick {self.index}: no free channels")
+        channel = _SimChannel(self, len(self._channels), device_id)
+        self._channels.append(channel)
+        return channel
+
+    def run(self):
+        while not self._stop.wait(HRM_PAGE_PERIOD_S / self._backend.speed):
+            if self._backend.unplugged(self.index):
+                raise RuntimeError(f"Stick {self.index}: USB device disconnected")
+            if self.hung:
+                continue
+            now = self.now()
+            with self._backend.lock:
+                for channel in self._channels:
+                    channel.tick(now)
+
+    def stop(self):
+        self._stop.set()
+        for channel in self._channels:
+            channel.close()
+
+
+class SimulatedAntBackend(AntBackend):
+    """Несколько виртуальных стиков над общим набором датчиков.
+
+    straps — число датчиков (ID 1001, 1002, ...) или список ID;
+    coverage — какие датчики слышит каждый стик (по умолчанию все);
+    loss — доля теряемых страниц по стикам (плохой приём);
+    speed — ускорение времени симуляции.
+    """
+
+    def __init__(
+        self, sticks: int = 2, straps: int | list[int] = 16, channels_per_stick: int = 8,
+        coverage: dict[int, set[int]] | None = None, speed: float = 1.0, seed: int | None = None,
+        loss: dict[int, float] | None = None,
+    ):
+        self.sticks = sticks
+        self.channels_per_stick = channels_per_stick
+        self.speed = speed
+        self.seed = seed
+        self.lock = threading.RLock()
+        rng = random.Random(seed)
+        ids = list(range(1001, 1001 + straps)) if isinstance(straps, int) else list(straps)
+        self.straps = {
+            device_id: SimulatedStrap(device_id, rng.randint(70, 170), random.Random(rng.random()))
+            for device_id in ids
+        }
+        self.coverage = coverage
+        self.loss = loss or {}
+        self._t0 = time.monotonic()
+        self._nodes: dict[int, _SimNode] = {}
+        # Стик → monotonic-время, до которого он выдернут
+        self._unplugged: dict[int, float] = {}
+
+    def now(self) -> float:
+        """Время симуляции (с), с учётом ускорения."""
+        return (time.monotonic() - self._t0) * self.speed
+
+    def audible(self, stick: int) -> dict[int, SimulatedStrap]:
+        if self.coverage is None or stick not in self.coverage:
+            return self.straps
+        return {k: v for k, v in self.straps.items() if k in self.coverage[stick]}
+
+    def unplug(self, stick: int, seconds: float):
+        """Выдёргивает стик на seconds (реального времени): приём падает, открыть нельзя."""
+        self._unplugged[stick] = time.monotonic() + seconds
+
+    def unplugged(self, stick: int) -> bool:
+        return time.monotonic() < self._unplugged.get(stick, 0.0)
+
+    def hang(self, stick: int):
+        """Подвешивает открытый стик: цикл приёма не завершается, но страниц больше нет."""
+        node = self._nodes.get(stick)
+        if node is not None:
+            node.hung = True
+
+    def stick_count(self) -> int:
+        return self.sticks
+
+    def open_node(self, index: int) -> AntNode:
+        if self.unplugged(index):
+            raise RuntimeError(f"Stick {index}: USB device not found")
+        node = self._nodes[index] = _SimNode(self, index, self.channels_per_stick)
+        return node
@@ -0,0 +1,76 @@
+"""Выделение ударов сердца из страниц ANT+ HRM.
+
+Датчик повторяет одну и ту же страницу ~4 раза в секунду, а новый удар
+отмечает увеличением beat_count (8 бит) и временем удара beat_time
+(1/1024 с, период 64 с). BeatTracker по смене beat_count находит новые
+удары и переводит beat_time на шкалу времени приёма: часы датчика
+«разворачиваются» через переполнение и привязываются к monotonic-времени
+приёма первой страницы. Привязка обновляется после разрыва дольше
+периода beat_time и при расхождении часов датчика и приёмника.
+
+RR-интервал (мс) считается по часам датчика между соседними ударами —
+только если beat_count вырос ровно на 1 (пропущенные страницы с ударами
+дают неизвестный интервал).
+"""
+
+from dataclasses import dataclass
+
+# Период счётчика beat_time, с
+BEAT_TIME_WRAP_S = 64.0
+
+# Удар не может быть старше приёма больше чем на столько — иначе часы
+# датчика ушли и привязка обновляется
+MAX_BEAT_LAG_S = 2.0
+
+# Минимальный шаг между соседними ударами после перепривязки часов
+MIN_BEAT_STEP_S = 0.001
+
+
+@dataclass
+class BeatTracker:
+    """Состояние ударов одного датчика."""
+    beat_count: int | None = None
+    # Последнее время удара по часам датчика (-1 — неизвестно)
+    beat_time: float = -1.0
+    # Развёрнутое время часов датчика и его сдвиг относительно времени приёма
+    sensor_time: float = 0.0
+    offset: float = 0.0
+    received: float = 0.0
+    last_beat: float | None = None
+    # RR-интервал последнего удара, мс (None — неизвестен)
+    rr_ms: int | None = None
+
+    def update(self, ts: float, beat_count: int, beat_time: float) -> float | None:
+        """Страница, принятая в ts (monotonic). Время нового удара или None, если удара не было."""
+        gap = ts - self.received
+        self.received = ts
+        if beat_count == self.beat_count and gap < BEAT_TIME_WRAP_S:
+            return None
+        first = self.beat_count is None
+        consecutive = not first and (beat_count - self.beat_count) % 256 == 1
+        self.beat_count = beat_count
+        self.rr_ms = None
+
+        if beat_time < 0:
+            # Датчик не передаёт время удара — время приёма
+            self.beat_time = -1.0
+            beat_ts = ts
+        else:
+            if first or gap >= BEAT_TIME_WRAP_S or self.beat_time < 0:
+                self.sensor_time = beat_time
+                self.offset = ts - beat_time
+            else:
+                step = (beat_time - self.beat_time) % BEAT_TIME_WRAP_S
+                self.sensor_time += step
+                if consecutive:
+                    self.rr_ms = round(step * 1000)
+            self.beat_time = beat_time
+            beat_ts = self.sensor_time + self.offset
+            if beat_ts > ts or ts - beat_ts > MAX_BEAT_LAG_S:
+                self.offset = ts - self.sensor_time
+                beat_ts = ts
+
+        if self.last_beat is not None and beat_ts <= self.last_beat:
+            beat_ts = self.last_beat + MIN_BEAT_STEP_S
+        self.last_beat = beat_ts
+        return beat_ts
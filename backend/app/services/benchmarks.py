@@ -0,0 +1,284 @@
+"""Результаты WoD и рекорды в бенчмарках (Fran, Helen, Cindy...).
+
+Тип результата определяется форматом WoD: на время — время (или
+повторения, если не уложился в лимит), AMRAP/EMOM/Tabata/Death By —
+раунды + повторения, лесенки и силовые — вес. Каждый результат
+сводится к одному числу score (больше — лучше), по нему сортируются
+лидерборды.
+
+Для WoD из бенчмарк-шаблонов лучший результат спортсмена по ключу
+(имя бенчмарка, уровень скалирования) хранится в benchmark_bests и
+обновляется при записи результата — тогда же определяется личный
+рекорд. Лидерборд и список рекордов читаются по индексам сводной
+таблицы.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, aliased
+
+from ..models import Athlete, BenchmarkBest, Wod, WodResult
+from .catalog import catalog_index
+
+_logger = logging.getLogger(__name__)
+
+SCORE_TYPES = {
+    "for_time": "time",
+    "chipper": "time",
+    "amrap": "rounds_reps",
+    "emom": "rounds_reps",
+    "tabata": "rounds_reps",
+    "death_by": "rounds_reps",
+    "ladder": "load",
+    "strength": "load",
+}
+
+# Законченный «на время» результат всегда выше результата в лимите (повторения)
+TIME_SCORE_BASE = 10_000_000.0
+MAX_TIME_SECONDS = 86_400.0
+
+# Повторения в неполном раунде: score = раунды × REPS_PER_ROUND + повторения
+REPS_PER_ROUND = 1000
+
+
+def score_type(wod_format: str) -> str:
+    return SCORE_TYPES.get(wod_format, "rounds_reps")
+
+
+def compute_score(
+    kind: str, time_seconds: float | None, rounds: int | None,
+    reps: int | None, load_kg: float | None,
+) -> float:
+    """Число для сортировки результата (больше — лучше). ValueError при неполных данных."""
+    if kind == "time":
+        if time_seconds is not None:
+            if not 0 < time_seconds <= MAX_TIME_SECONDS:
+                raise ValueError("Некорректное время")
+            return TIME_SCORE_BASE - time_seconds
+        if reps is None:
+            raise ValueError("Укажите время или число повторений (если не уложились в лимит)")
+        return float(reps)
+    if kind == "rounds_reps":
+        if rounds is None and reps is None:
+            raise ValueError("Укажите раунды и/или повторения")
+        if reps is not None and rounds is not None and reps >= REPS_PER_ROUND:
+            raise ValueError("Слишком много повторений в неполном раунде")
+        return float((rounds or 0) * REPS_PER_ROUND + (reps or 0))
+    if kind == "load":
+        if load_kg is None or load_kg <= 0:
+            raise ValueError("Укажите вес")
+        return float(load_kg)
+    raise ValueError(f"Неизвестный тип результата: {kind}")
+
+
+def display_score(result: WodResult) -> str:
+    """Результат в привычной записи: 4:32, 12 + 5, 100 кг."""
+    if result.score_type == "time":
+        if result.time_seconds is None:
+            return f"CAP + {result.reps}"
+        minutes, seconds = divmod(round(result.time_seconds), 60)
+        return f"{minutes}:{seconds:02d}"
+    if result.score_type == "rounds_reps":
+        if result.rounds is None:
+            return f"{result.reps} повт."
+        return f"{result.rounds} + {result.reps or 0}"
+    return f"{result.load_kg:g} кг"
+
+
+def result_payload(result: WodResult, athlete_name: str | None = None) -> dict:
+    return {
+        "id": result.id,
+        "wod_id": result.wod_id,
+        "athlete_id": result.athlete_id,
+        "athlete_name": athlete_name,
+        "benchmark": result.benchmark,
+        "scaling": result.scaling,
+        "score_type": result.score_type,
+        "time_seconds": result.time_seconds,
+        "rounds": result.rounds,
+        "reps": result.reps,
+        "load_kg": result.load_kg,
+        "score": result.score,
+        "display": display_score(result),
+        "is_pr": result.is_pr,
+        "recorded_at": result.recorded_at,
+    }
+
+
+def benchmark_name(wod: Wod) -> str | None:
+    """Имя бенчмарка, если WoD создан из бенчмарк-шаблона."""
+    template = catalog_index.current.template(wod.template_id) if wod.template_id else None
+    return template.name if template and template.is_benchmark else None
+
+
+def _upsert_best(db: Session, result: WodResult):
+    stmt = insert(BenchmarkBest.__table__).values(
+        benchmark=result.benchmark, scaling=result.scaling, athlete_id=result.athlete_id,
+        result_id=result.id, score=result.score, achieved_at=result.recorded_at,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["benchmark", "scaling", "athlete_id"],
+        set_={
+            "result_id": stmt.excluded.result_id,
+            "score": stmt.excluded.score,
+            "achieved_at": stmt.excluded.achieved_at,
+        },
+    ))
+
+
+def _refresh_best(db: Session, benchmark: str, scaling: str, athlete_id: str):
+    """Пересчитывает сводную строку по индексу результатов спортсмена."""
+    top = db.execute(
+        select(WodResult)
+        .where(
+            WodResult.benchmark == benchmark,
+            WodResult.scaling == scaling,
+            WodResult.athlete_id == athlete_id,
+        )
+        .order_by(WodResult.score.desc(), WodResult.recorded_at)
+        .limit(1)
+    ).scalar_one_or_none()
+    if top is None:
+        db.query(BenchmarkBest).filter(
+            BenchmarkBest.benchmark == benchmark,
+            BenchmarkBest.scaling == scaling,
+            BenchmarkBest.athlete_id == athlete_id,
+        ).delete()
+    else:
+        _upsert_best(db, top)
+
+
+def record_result(
+    db: Session, wod: Wod, athlete_id: str, scaling: str | None = None,
+    time_seconds: float | None = None, rounds: int | None = None,
+    reps: int | None = None, load_kg: float | None = None,
+) -> tuple[WodResult, str | None]:
+    """Записывает (или заменяет) результат спортсмена в WoD и обновляет рекорды.
+
+    Личный рекорд — результат выше прежнего лучшего по (бенчмарк, скалирование);
+    первый результат тоже считается рекордом. Возвращает результат и запись
+    побитого рекорда (None, если рекорда не было или он не побит).
+    """
+    kind = score_type(wod.format)
+    score = compute_score(kind, time_seconds, rounds, reps, load_kg)
+    scaling = scaling or wod.group_level
+    benchmark = benchmark_name(wod)
+
+    result = db.query(WodResult).filter(
+        WodResult.wod_id == wod.id, WodResult.athlete_id == athlete_id,
+    ).first()
+    stale_key = None
+    if result is None:
+        result = WodResult(wod_id=wod.id, athlete_id=athlete_id)
+        db.add(result)
+    elif result.benchmark is not None:
+        stale_key = (result.benchmark, result.scaling)
+
+    best = None
+    if benchmark is not None:
+        best = db.query(BenchmarkBest).filter(
+            BenchmarkBest.benchmark == benchmark,
+            BenchmarkBest.scaling == scaling,
+            BenchmarkBest.athlete_id == athlete_id,
+        ).first()
+
+    result.benchmark = benchmark
+    result.scaling = scaling
+    result.score_type = kind
+    # Сохраняются только поля, относящиеся к типу результата
+    result.time_seconds = time_seconds if kind == "time" else None
+    result.rounds = rounds if kind == "rounds_reps" else None
+    result.reps = reps if kind == "rounds_reps" or (kind == "time" and time_seconds is None) else None
+    result.load_kg = load_kg if kind == "load" else None
+    result.score = score
+    result.recorded_at = datetime.now(timezone.utc)
+    result.is_pr = benchmark is not None and (
+        best is None or best.result_id == result.id or score > best.score
+    )
+    # Прежний рекорд (для события о новом PR)
+    previous = display_score(best.result) if result.is_pr and best and best.result_id != result.id else None
+    db.flush()
+
+    if benchmark is not None:
+        if best is not None and best.result_id == result.id:
+            # Исправление текущего рекорда: он мог стать хуже другого результата
+            _refresh_best(db, benchmark, scaling, athlete_id)
+            result.is_pr = db.query(BenchmarkBest.result_id).filter(
+                BenchmarkBest.benchmark == benchmark,
+                BenchmarkBest.scaling == scaling,
+                BenchmarkBest.athlete_id == athlete_id,
+            ).scalar() == result.id
+        elif result.is_pr:
+            _upsert_best(db, result)
+    if stale_key is not None and stale_key != (benchmark, scaling):
+        _refresh_best(db, *stale_key, athlete_id)
+
+    db.commit()
+    db.refresh(result)
+    if result.is_pr:
+        _logger.info(f"PR: athlete {athlete_id} {benchmark} ({scaling}) {display_score(result)}")
+    return result, previous
+
+
+def delete_result(db: Session, result: WodResult):
+    """Удаляет результат; если он был лучшим — пересчитывает сводную строку."""
+    key = (result.benchmark, result.scaling, result.athlete_id)
+    db.query(BenchmarkBest).filter(BenchmarkBest.result_id == result.id).delete()
+    db.delete(result)
+    db.flush()
+    if key[0] is not None:
+        _refresh_best(db, *key)
+    db.commit()
+
+
+def leaderboard(db: Session, benchmark: str, scaling: str, limit: int) -> tuple[list[dict], int]:
+    """Top-N бенчмарка по индексу (benchmark, scaling, score) и общее число участников."""
+    rows = (
+        db.query(BenchmarkBest, WodResult, Athlete.name)
+        .join(WodResult, WodResult.id == BenchmarkBest.result_id)
+        .join(Athlete, Athlete.id == BenchmarkBest.athlete_id)
+        .filter(BenchmarkBest.benchmark == benchmark, BenchmarkBest.scaling == scaling)
+        .order_by(BenchmarkBest.score.desc(), BenchmarkBest.achieved_at)
+        .limit(limit)
+        .all()
+    )
+    total = db.query(func.count(BenchmarkBest.id)).filter(
+        BenchmarkBest.benchmark == benchmark, BenchmarkBest.scaling == scaling,
+    ).scalar()
+    return [
+        {"rank": i + 1, **result_payload(result, name)}
+        for i, (_, result, name) in enumerate(rows)
+    ], total
+
+
+def athlete_records(db: Session, athlete_id: str) -> list[dict]:
+    """Личные рекорды спортсмена во всех бенчмарках с местом в лидерборде.
+
+    Место считается одним запросом: к каждому рекорду присоединяются
+    лучшие результаты того же бенчмарка выше него (при равном score —
+    показанные раньше) и подсчитываются группировкой.
+    """
+    other = aliased(BenchmarkBest)
+    rows = (
+        db.query(BenchmarkBest, WodResult, func.count(other.id))
+        .join(WodResult, WodResult.id == BenchmarkBest.result_id)
+        .outerjoin(other, and_(
+            other.benchmark == BenchmarkBest.benchmark,
+            other.scaling == BenchmarkBest.scaling,
+            or_(
+                other.score > BenchmarkBest.score,
+                and_(other.score == BenchmarkBest.score, other.achieved_at < BenchmarkBest.achieved_at),
+            ),
+        ))
+        .filter(BenchmarkBest.athlete_id == athlete_id)
+        .group_by(BenchmarkBest.id, WodResult.id)
+        .order_by(BenchmarkBest.benchmark, BenchmarkBest.scaling)
+        .all()
+    )
+    return [
+        {"rank": better + 1, **result_payload(result)}
+        for _, result, better in rows
+    ]
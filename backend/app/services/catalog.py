@@ -0,0 +1,277 @@
+"""Неизменяемый индекс каталога тренировок в памяти.
+
+Каталог (движения, шаблоны и их движения) меняется только при сидировании,
+а генератор WoD читает его на каждый запрос. Поэтому при старте каталог
+целиком загружается в память: шаблоны по темам, движения по ключу,
+списки движений шаблона и разобранные множества инвентаря. При изменении
+каталога индекс пересобирается и подменяется одной операцией присваивания —
+читатели всегда видят целостный снимок без блокировок.
+
+Инвентарь кодируется битовыми масками: каждому Equipment.key назначен бит,
+у шаблона — маска требуемого инвентаря, у зала — маска имеющегося.
+Шаблон выполним, если (required & ~inventory) == 0. Доступные шаблоны
+по темам для текущей маски зала хранятся готовыми и пересчитываются
+только при изменении инвентаря.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy.orm import Session
+
+from ..models import Equipment, GymInventory, Movement, WodTemplate, WodTemplateMovement
+
+_logger = logging.getLogger(__name__)
+
+# Сколько масок инвентаря держать в кэше доступных шаблонов
+FEASIBLE_CACHE_SIZE = 16
+
+
+def split_keys(raw: str | None) -> frozenset[str]:
+    """Разбирает CSV-строку ключей ('barbell,plate') в множество."""
+    if not raw:
+        return frozenset()
+    return frozenset(k.strip() for k in raw.split(",") if k.strip())
+
+
+@dataclass(frozen=True)
+class CatalogMovement:
+    key: str
+    name: str
+    modality: str
+    muscle_group: str
+    themes: frozenset[str]
+    equipment: frozenset[str]
+    difficulty: str
+    scaling_beginner: str | None
+    scaling_intermediate: str | None
+
+    def scaling_note(self, level: str) -> str | None:
+        """Текстовое описание скалирования движения для уровня группы."""
+        if level == "beginner" and self.scaling_beginner:
+            return self.scaling_beginner
+        if level == "intermediate" and self.scaling_intermediate:
+            return self.scaling_intermediate
+        return None
+
+
+@dataclass(frozen=True)
+class CatalogTemplateMovement:
+    movement_key: str
+    movement_name: str
+    reps: int | None
+    weight_male: int | None
+    weight_female: int | None
+    sort_order: int
+    rounds_note: str | None
+
+
+@dataclass(frozen=True)
+class CatalogTemplate:
+    id: str
+    name: str
+    format: str
+    duration_min: int
+    intensity: str
+    theme: str
+    is_benchmark: bool
+    description: str | None
+    # Движения в порядке sort_order
+    movements: tuple[CatalogTemplateMovement, ...]
+    # Объединение инвентаря всех движений шаблона
+    equipment: frozenset[str]
+    # То же множество в виде битовой маски (Catalog.equipment_bits)
+    equipment_mask: int
+    # Группы мышц движений шаблона и преобладающая из них
+    # (full_body — только если других групп нет)
+    muscle_groups: frozenset[str]
+    primary_muscle: str | None
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Снимок каталога. Не изменяется после построения."""
+    movements: Mapping[str, CatalogMovement]
+    templates: Mapping[str, CatalogTemplate]
+    by_theme: Mapping[str, tuple[CatalogTemplate, ...]]
+    # Бит каждого ключа инвентаря
+    equipment_bits: Mapping[str, int]
+
+    def equipment_mask(self, keys) -> int:
+        """Битовая маска набора ключей инвентаря (неизвестные ключи игнорируются)."""
+        mask = 0
+        for key in keys:
+            mask |= self.equipment_bits.get(key, 0)
+        return mask
+
+    def template(self, template_id: str) -> CatalogTemplate | None:
+        return self.templates.get(template_id)
+
+    def themed(self, theme: str) -> tuple[CatalogTemplate, ...]:
+        return self.by_theme.get(theme, ())
+
+    def movement(self, key: str) -> CatalogMovement | None:
+        return self.movements.get(key)
+
+
+EMPTY_CATALOG = Catalog(
+    MappingProxyType({}), MappingProxyType({}), MappingProxyType({}), MappingProxyType({}),
+)
+
+
+def build_catalog(db: Session) -> Catalog:
+    """Строит снимок каталога четырьмя запросами к БД."""
+    movements = {
+        mv.key: CatalogMovement(
+            key=mv.key,
+            name=mv.name,
+            modality=mv.modality,
+            muscle_group=mv.muscle_group,
+            themes=split_keys(mv.themes),
+            equipment=split_keys(mv.equipment_keys),
+            difficulty=mv.difficulty,
+            scaling_beginner=mv.scaling_beginner,
+            scaling_intermediate=mv.scaling_intermediate,
+        )
+        for mv in db.query(Movement).all()
+    }
+
+    template_movements: dict[str, list[CatalogTemplateMovement]] = {}
+    rows = db.query(WodTemplateMovement).order_by(
+        WodTemplateMovement.template_id, WodTemplateMovement.sort_order
+    ).all()
+    for tm in rows:
+        template_movements.setdefault(tm.template_id, []).append(CatalogTemplateMovement(
+            movement_key=tm.movement_key,
+            movement_name=tm.movement_name,
+            reps=tm.reps,
+            weight_male=tm.weight_male,
+            weight_female=tm.weight_female,
+            sort_order=tm.sort_order,
+            rounds_note=tm.rounds_note,
+        ))
+
+    # Биты назначаются и ключам, которых нет в таблице equipment: такой
+    # инвентарь не может оказаться в зале, и шаблон с ним недоступен
+    keys = {key for (key,) in db.query(Equipment.key).all()}
+    for mv in movements.values():
+        keys |= mv.equipment
+    equipment_bits = {key: 1 << i for i, key in enumerate(sorted(keys))}
+
+    templates: dict[str, CatalogTemplate] = {}
+    by_theme: dict[str, list[CatalogTemplate]] = {}
+    for t in db.query(WodTemplate).order_by(WodTemplate.name).all():
+        tms = tuple(template_movements.get(t.id, ()))
+        known = [movements[tm.movement_key] for tm in tms if tm.movement_key in movements]
+        equipment = frozenset().union(*(mv.equipment for mv in known))
+        groups = [mv.muscle_group for mv in known]
+        local = [g for g in groups if g != "full_body"] or groups
+        template = CatalogTemplate(
+            id=t.id,
+            name=t.name,
+            format=t.format,
+            duration_min=t.duration_min,
+            intensity=t.intensity,
+            theme=t.theme,
+            is_benchmark=t.is_benchmark,
+            description=t.description,
+            movements=tms,
+            equipment=equipment,
+            equipment_mask=sum(equipment_bits[key] for key in equipment),
+            muscle_groups=frozenset(groups),
+            primary_muscle=max(local, key=local.count) if local else None,
+        )
+        templates[t.id] = template
+        by_theme.setdefault(t.theme, []).append(template)
+
+    return Catalog(
+        movements=MappingProxyType(movements),
+        templates=MappingProxyType(templates),
+        by_theme=MappingProxyType({k: tuple(v) for k, v in by_theme.items()}),
+        equipment_bits=MappingProxyType(equipment_bits),
+    )
+
+
+def feasible_by_theme(
+    catalog: Catalog, inventory_mask: int, configured: bool = True,
+) -> Mapping[str, tuple[CatalogTemplate, ...]]:
+    """Шаблоны по темам, выполнимые с инвентарём inventory_mask.
+
+    Если инвентарь не настроен (configured=False) — доступны все шаблоны.
+    """
+    if not configured:
+        return catalog.by_theme
+    missing = ~inventory_mask
+    return MappingProxyType({
+        theme: tuple(t for t in templates if not t.equipment_mask & missing)
+        for theme, templates in catalog.by_theme.items()
+    })
+
+
+class CatalogIndex:
+    """Держатель текущего снимка каталога и маски инвентаря зала."""
+
+    def __init__(self):
+        self._catalog: Catalog = EMPTY_CATALOG
+        self._inventory: frozenset[str] = frozenset()
+        self._inventory_mask = 0
+        self._feasible: Mapping[str, tuple[CatalogTemplate, ...]] = MappingProxyType({})
+        # Маска инвентаря → доступные шаблоны по темам; сбрасывается при смене каталога
+        self._feasible_cache: dict[tuple[int, bool], Mapping[str, tuple[CatalogTemplate, ...]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Catalog:
+        return self._catalog
+
+    @property
+    def inventory_mask(self) -> int:
+        return self._inventory_mask
+
+    def load(self, db: Session):
+        """Пересобирает индекс и маску инвентаря из БД и атомарно подменяет снимок."""
+        catalog = build_catalog(db)
+        inventory = frozenset(key for (key,) in db.query(GymInventory.equipment_key).all())
+        with self._lock:
+            self._catalog = catalog
+            self._feasible_cache.clear()
+            self._apply_inventory(inventory)
+        _logger.info(
+            f"Catalog loaded: {len(catalog.templates)} templates, "
+            f"{len(catalog.movements)} movements, {len(catalog.equipment_bits)} equipment bits"
+        )
+
+    def set_inventory(self, keys):
+        """Обновляет маску инвентаря зала (после PUT /api/equipment/inventory)."""
+        with self._lock:
+            self._apply_inventory(frozenset(keys))
+
+    def _apply_inventory(self, inventory: frozenset[str]):
+        catalog = self._catalog
+        mask = catalog.equipment_mask(inventory)
+        cache_key = (mask, bool(inventory))
+        feasible = self._feasible_cache.get(cache_key)
+        if feasible is None:
+            feasible = feasible_by_theme(catalog, mask, configured=bool(inventory))
+            if len(self._feasible_cache) >= FEASIBLE_CACHE_SIZE:
+                self._feasible_cache.pop(next(iter(self._feasible_cache)))
+            self._feasible_cache[cache_key] = feasible
+        self._inventory = inventory
+        self._inventory_mask = mask
+        self._feasible = feasible
+
+    def feasible(self, theme: str) -> tuple[CatalogTemplate, ...]:
+        """Шаблоны темы, выполнимые с текущим инвентарём зала."""
+        return self._feasible.get(theme, ())
+
+    def is_feasible(self, template: CatalogTemplate) -> bool:
+        """Хватает ли инвентаря зала для шаблона — одно сравнение масок."""
+        if not self._inventory:
+            return True
+        return not template.equipment_mask & ~self._inventory_mask
+
+
+catalog_index = CatalogIndex()
@@ -0,0 +1,372 @@
+"""ANT+ коллектор в отдельном процессе и кольцевой буфер отсчётов в shared memory.
+
+В одном процессе поток стика openant, работа с БД в колбэках и event
+loop uvicorn делят один GIL: всплеск CPU от аналитики или сериализации
+JSON задерживает чтение USB. С CF_ANT_PROCESS=1 AntCollector работает
+в своём процессе (spawn) и пишет отсчёты в SampleRing — блок
+multiprocessing.shared_memory фиксированной раскладки:
+
+  заголовок (32 байта): magic "CFHR", версия, размер записи, ёмкость,
+      seq последней записи, heartbeat процесса-коллектора (monotonic);
+  записи по 32 байта: seq, время удара (unix), device_id, RR (мс, -1 —
+      неизвестен), ЧСС, батарея.
+
+Писатель один: запись получает seq = 0, заполняется, затем получает свой
+seq, и только после этого растёт seq в заголовке. Читатель (поток
+ProcessCollector в процессе FastAPI) читает без блокировок и без
+сериализации: берёт записи до seq заголовка и проверяет seq записи до и
+после копирования — перезаписанная или недописанная запись считается
+потерянной. Отстающий больше чем на ёмкость буфера читатель пропускает
+старые записи (тоже потерянные).
+
+Редкие события (новый датчик, качество приёма, состояние каналов)
+идут через multiprocessing.Queue. Сторож перезапускает процесс, если он
+завершился или перестал обновлять heartbeat, с той же экспоненциальной
+паузой, что и стики (services/ant_collector.py); буфер переживает
+перезапуск — новый процесс продолжает seq.
+"""
+
+import logging
+import multiprocessing
+import queue
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+from .ant_collector import NODE_STABLE_S, AntCollector, _restart_delay
+from .rf_quality import GAP_BUCKETS_MS
+
+_logger = logging.getLogger(__name__)
+
+MAGIC = b"CFHR"
+RING_VERSION = 1
+
+# Ёмкость буфера (записей): десятки секунд для 32 датчиков
+RING_CAPACITY = 4096
+
+# Как часто читатель забирает новые записи и процесс обновляет heartbeat (сек)
+POLL_S = 0.02
+HEARTBEAT_S = 0.5
+
+# Процесс без heartbeat дольше — завис и перезапускается
+WATCHDOG_S = 10.0
+
+# Период отправки состояния каналов из процесса-коллектора
+STATUS_INTERVAL_S = 2.0
+
+# magic, версия, размер записи, ёмкость, (резерв), seq, heartbeat
+_HEADER = struct.Struct("<4sHHI4xQd")
+_SEQ_OFFSET = 16
+_HEARTBEAT_OFFSET = 24
+# seq, время удара, device_id, RR, ЧСС, батарея
+_RECORD = struct.Struct("<QdIiHB5x")
+_U64 = struct.Struct("<Q")
+_F64 = struct.Struct("<d")
+
+
+class SampleRing:
+    """Кольцевой буфер отсчётов ЧСС в shared memory: один писатель, один читатель."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        magic, version, record_size, capacity, seq, _ = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != RING_VERSION or record_size != _RECORD.size:
+            raise ValueError(f"Shared memory {shm.name}: not a sample ring")
+        self.capacity = capacity
+        self._seq = seq
+
+    @classmethod
+    def create(cls, capacity: int = RING_CAPACITY) -> "SampleRing":
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + capacity * _RECORD.size)
+        shm.buf[:shm.size] = bytes(shm.size)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, RING_VERSION, _RECORD.size, capacity, 0, 0.0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SampleRing":
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, device_id: int, hr: int, battery: int, beat_ts: float, rr_ms: int | None = None):
+        """Дописывает отсчёт (сигнатура колбэка on_hr_data коллектора)."""
+        seq = self._seq + 1
+        offset = _HEADER.size + (seq % self.capacity) * _RECORD.size
+        _RECORD.pack_into(
+            self._buf, offset, 0, beat_ts, device_id,
+            rr_ms if rr_ms is not None else -1, hr, battery & 0xFF,
+        )
+        _U64.pack_into(self._buf, offset, seq)
+        _U64.pack_into(self._buf, _SEQ_OFFSET, seq)
+        self._seq = seq
+
+    def read(self, after: int) -> tuple[list[tuple], int, int]:
+        """Записи с seq > after: (записи, seq последней, сколько потеряно).
+
+        Запись — (seq, beat_ts, device_id, rr_ms, hr, battery).
+        """
+        head = _U64.unpack_from(self._buf, _SEQ_OFFSET)[0]
+        if head <= after:
+            return [], head, 0
+        start = max(after + 1, head - self.capacity + 1)
+        lost = start - after - 1
+        records = []
+        for seq in range(start, head + 1):
+            offset = _HEADER.size + (seq % self.capacity) * _RECORD.size
+            record = _RECORD.unpack_from(self._buf, offset)
+            # Писатель успел перезаписать слот, пока его читали
+            if record[0] != seq or _U64.unpack_from(self._buf, offset)[0] != seq:
+                lost += 1
+                continue
+            records.append(record)
+        return records, head, lost
+
+    def beat(self):
+        """Heartbeat процесса-писателя."""
+        _F64.pack_into(self._buf, _HEARTBEAT_OFFSET, time.monotonic())
+
+    def heartbeat(self) -> float:
+        return _F64.unpack_from(self._buf, _HEARTBEAT_OFFSET)[0]
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# ── Процесс-коллектор ────────────────────────────────────────
+
+def _collector_main(ring_name: str, events, stop, config: dict):
+    """Точка входа процесса: AntCollector пишет отсчёты в буфер, события — в очередь."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s [ant-process] %(name)s: %(message)s",
+    )
+    ring = SampleRing.attach(ring_name)
+    backend = None
+    if config["simulate"]:
+        from .ant_simulated import SimulatedAntBackend
+        backend = SimulatedAntBackend(sticks=config["simulate"], straps=config["max_sensors"])
+    collector = AntCollector(
+        max_sensors=config["max_sensors"],
+        on_hr_data=ring.write,
+        on_new_sensor=lambda device_id: events.put(("new_sensor", device_id)),
+        backend=backend,
+        sticks=config["sticks"],
+        wildcards=config["wildcards"],
+        record_path=config["record_path"],
+        on_sensor_quality=lambda sensors: events.put(("sensor_quality", sensors)),
+    )
+    collector.start()
+    next_status = 0.0
+    try:
+        while not stop.is_set():
+            ring.beat()
+            now = time.monotonic()
+            if now >= next_status:
+                next_status = now + STATUS_INTERVAL_S
+                events.put(("status", collector.channel_status(), collector.quality_status()))
+            stop.wait(HEARTBEAT_S)
+    finally:
+        collector.stop()
+        ring.close()
+
+
+class ProcessCollector:
+    """AntCollector в отдельном процессе под сторожем; отсчёты — через SampleRing.
+
+    Интерфейс как у AntCollector: start/stop, колбэки on_hr_data,
+    on_new_sensor, on_sensor_quality (вызываются из потока-читателя),
+    channel_status и quality_status (последнее состояние от процесса).
+    """
+
+    def __init__(
+        self,
+        max_sensors: int = 8,
+        on_hr_data: Optional[Callable] = None,
+        on_new_sensor: Optional[Callable] = None,
+        sticks: Optional[int] = None,
+        wildcards: int = 2,
+        record_path: Optional[str] = None,
+        on_sensor_quality: Optional[Callable] = None,
+        simulate: int = 0,
+    ):
+        self._on_hr_data = on_hr_data
+        self._on_new_sensor = on_new_sensor
+        self._on_sensor_quality = on_sensor_quality
+        self._config = {
+            "max_sensors": max_sensors,
+            "sticks": sticks,
+            "wildcards": wildcards,
+            "record_path": record_path,
+            "simulate": simulate,
+        }
+        self._ctx = multiprocessing.get_context("spawn")
+        self._ring: Optional[SampleRing] = None
+        self._process = None
+        self._events = None
+        self._stop = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._running = False
+        # Прочитано из буфера: seq последней записи, записей, потеряно
+        self._read_seq = 0
+        self._samples = 0
+        self._lost = 0
+        # Сторож: перезапуски, ошибок подряд, когда запущен и когда перезапускать
+        self._restarts = 0
+        self._failures = 0
+        self._last_exit: str | None = None
+        self._spawned_at = 0.0
+        self._restart_at = 0.0
+        # Последнее состояние каналов и качества приёма от процесса
+        self._channels: dict | None = None
+        self._quality: dict | None = None
+
+    def start(self):
+        if self._running:
+            return
+        self._ring = SampleRing.create()
+        self._read_seq = 0
+        self._running = True
+        self._stop_event.clear()
+        self._spawn()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ant-process-reader")
+        self._thread.start()
+        _logger.info(f"ANT+ collector process started (ring {self._ring.name}, {self._ring.capacity} records)")
+
+    def stop(self):
+        self._running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._terminate(timeout=5)
+        if self._ring:
+            self._ring.close()
+            self._ring = None
+        _logger.info("ANT+ collector process stopped")
+
+    def _spawn(self):
+        # Очередь и флаг остановки — свои у каждого процесса: убитый процесс
+        # мог оставить очередь в неопределённом состоянии
+        self._events = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._process = self._ctx.Process(
+            target=_collector_main,
+            args=(self._ring.name, self._events, self._stop, self._config),
+            daemon=True,
+            name="ant-collector",
+        )
+        self._process.start()
+        self._spawned_at = time.monotonic()
+        _logger.info(f"ANT+ collector process pid {self._process.pid}")
+
+    def _terminate(self, timeout: float):
+        process = self._process
+        if process is None:
+            return
+        if self._stop is not None:
+            self._stop.set()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join(1)
+        self._process = None
+
+    # ── Поток-читатель ───────────────────────────────────────
+
+    def _run(self):
+        """Забирает отсчёты из буфера и события из очереди, сторожит процесс."""
+        while not self._stop_event.wait(POLL_S):
+            try:
+                self._read_samples()
+                self._read_events()
+                self._watchdog(time.monotonic())
+            except Exception as e:
+                _logger.error(f"ANT+ process reader error: {e}")
+
+    def _read_samples(self):
+        records, self._read_seq, lost = self._ring.read(self._read_seq)
+        if lost:
+            self._lost += lost
+            _logger.warning(f"ANT+ sample ring overrun: {lost} samples lost")
+        self._samples += len(records)
+        if not self._on_hr_data:
+            return
+        for _, beat_ts, device_id, rr_ms, hr, battery in records:
+            try:
+                self._on_hr_data(device_id, hr, battery, beat_ts, rr_ms if rr_ms >= 0 else None)
+            except Exception as e:
+                _logger.error(f"on_hr_data callback error: {e}")
+
+    def _read_events(self):
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                return
+            try:
+                kind = event[0]
+                if kind == "status":
+                    _, self._channels, self._quality = event
+                elif kind == "new_sensor" and self._on_new_sensor:
+                    self._on_new_sensor(event[1])
+                elif kind == "sensor_quality" and self._on_sensor_quality:
+                    self._on_sensor_quality(event[1])
+            except Exception as e:
+                _logger.error(f"ANT+ process event error ({event[0]}): {e}")
+
+    def _watchdog(self, now: float):
+        """Перезапускает завершившийся или зависший процесс с нарастающей паузой."""
+        if self._process is None:
+            if now >= self._restart_at:
+                self._spawn()
+            return
+        if self._process.is_alive():
+            if now - max(self._ring.heartbeat(), self._spawned_at) <= WATCHDOG_S:
+                return
+            reason = f"no heartbeat for {WATCHDOG_S:.0f}s"
+            self._terminate(timeout=1)
+        else:
+            reason = f"exit code {self._process.exitcode}"
+            self._process = None
+        ran = now - self._spawned_at
+        self._failures = 1 if ran >= NODE_STABLE_S else self._failures + 1
+        self._restarts += 1
+        self._last_exit = reason
+        delay = _restart_delay(self._failures)
+        self._restart_at = now + delay
+        _logger.error(f"ANT+ collector process died ({reason}), restarting in {delay:.1f}s")
+
+    # ── Состояние ────────────────────────────────────────────
+
+    def channel_status(self) -> dict:
+        """Последнее состояние каналов от процесса и состояние самого процесса."""
+        status = dict(self._channels) if self._channels else {
+            "sticks": 0,
+            "wildcards": self._config["wildcards"],
+            "channels": [],
+            "stick_health": [],
+            "first_readings": [],
+        }
+        process = self._process
+        status["process"] = {
+            "pid": process.pid if process else None,
+            "alive": bool(process and process.is_alive()),
+            "restarts": self._restarts,
+            "last_exit": self._last_exit,
+            "samples": self._samples,
+            "lost": self._lost,
+        }
+        return status
+
+    def quality_status(self) -> dict:
+        return self._quality or {"gap_buckets_ms": list(GAP_BUCKETS_MS), "sensors": []}
@@ -0,0 +1,343 @@
+"""Калории, баллы усилий (Effort Points) и TRIMP — потоковый и пакетный расчёт.
+
+Живой поток: EffortEngine накапливает итоги каждого спортсмена по мере
+поступления ЧСС (O(1) на отсчёт). Пакетный путь: compute_totals()
+векторно (NumPy) пересчитывает всю сессию по сохранённым hr_readings —
+используется, когда у спортсмена меняются вес, возраст или max_hr.
+
+Интегрирование одинаковое в обоих путях: значение ЧСС удерживается до
+следующего отсчёта; интервал длиннее MAX_SAMPLE_GAP_S (таймаут живости
+датчика, services/liveness.py) — мёртвое время и не засчитывается, чтобы
+пропадание датчика не превращалось в минуты нагрузки.
+
+Итоги хранятся в session_totals по (session_id, athlete_id), поэтому
+лидерборды и аналитика никогда не читают сырые отсчёты.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..hr_zones import calc_zone
+from ..models import Athlete, HrReading, SessionTotal, Session as TrainingSession
+from .liveness import SENSOR_TIMEOUT_S
+
+_logger = logging.getLogger(__name__)
+
+# Баллы усилий за минуту в зоне (Myzone MEPs): Z1=1 … Z4=4
+EFFORT_POINTS_PER_MIN = {1: 1, 2: 2, 3: 3, 4: 4}
+
+# Максимальный интервал между отсчётами, который засчитывается (сек);
+# дольше — датчик считался потерянным
+MAX_SAMPLE_GAP_S = SENSOR_TIMEOUT_S
+
+# Как часто живые итоги сбрасываются в session_totals (сек)
+FLUSH_INTERVAL_S = 15.0
+
+# Упрощённая формула, если вес/возраст не заданы: ккал/мин = HR x 0.014
+_SIMPLE_KCAL_PER_BEAT = 0.014
+
+# ЧСС покоя, если у спортсмена она не задана
+DEFAULT_RESTING_HR = 60
+
+# Коэффициенты Banister TRIMP: k·e^(b·HRr)
+_TRIMP_COEFFS = {"male": (0.64, 1.92), "female": (0.86, 1.67)}
+
+
+@dataclass(frozen=True)
+class AthleteProfile:
+    """Параметры спортсмена, от которых зависят калории и зоны."""
+    max_hr: int = 190
+    weight_kg: float | None = None
+    age: int | None = None
+    sex: str | None = None
+    resting_hr: int | None = None
+
+    @classmethod
+    def from_athlete(cls, athlete: Athlete | None) -> "AthleteProfile":
+        if athlete is None:
+            return cls()
+        return cls(
+            max_hr=athlete.max_hr,
+            weight_kg=athlete.weight_kg,
+            age=athlete.age,
+            sex=athlete.sex,
+            resting_hr=athlete.resting_hr,
+        )
+
+
+@dataclass
+class EffortTotals:
+    """Накопленные итоги спортсмена за сессию."""
+    calories: float = 0.0
+    effort_points: float = 0.0
+    zone_seconds: list[float] = field(default_factory=lambda: [0.0, 0.0, 0.0, 0.0])
+    active_seconds: float = 0.0
+    trimp: float = 0.0
+
+    def to_payload(self) -> dict:
+        """Округлённый вид для WebSocket и API."""
+        return {
+            "calories": round(self.calories, 1),
+            "effort_points": round(self.effort_points, 1),
+            "zone_seconds": [int(s) for s in self.zone_seconds],
+        }
+
+
+def kcal_per_min(hr, profile: AthleteProfile):
+    """Расход энергии по формуле Keytel (ккал/мин).
+
+    Работает и со скаляром, и с np.ndarray. Без веса/возраста — HR x 0.014.
+    """
+    if profile.weight_kg is None or profile.age is None:
+        kcal = hr * _SIMPLE_KCAL_PER_BEAT
+    elif profile.sex == "female":
+        kcal = (-20.4022 + 0.4472 * hr - 0.1263 * profile.weight_kg
+                + 0.074 * profile.age) / 4.184
+    else:
+        kcal = (-55.0969 + 0.6309 * hr + 0.1988 * profile.weight_kg
+                + 0.2017 * profile.age) / 4.184
+    return np.maximum(kcal, 0.0) if isinstance(kcal, np.ndarray) else max(kcal, 0.0)
+
+
+def trimp_per_min(hr, profile: AthleteProfile):
+    """Banister TRIMP за минуту при данной ЧСС (скаляр или np.ndarray)."""
+    rest = profile.resting_hr or DEFAULT_RESTING_HR
+    k, b = _TRIMP_COEFFS.get(profile.sex, _TRIMP_COEFFS["male"])
+    hrr = np.clip((hr - rest) / max(profile.max_hr - rest, 1), 0.0, 1.0)
+    value = hrr * k * np.exp(b * hrr)
+    return value if isinstance(value, np.ndarray) else float(value)
+
+
+def _zones_array(hr: np.ndarray, max_hr: int) -> np.ndarray:
+    """Векторный аналог calc_zone (те же границы 60/80/100%)."""
+    pct = hr / max_hr * 100
+    return 1 + (pct > 60).astype(np.int64) + (pct > 80) + (pct > 100)
+
+
+def sample_intervals(ts: np.ndarray, max_gap_s: float = MAX_SAMPLE_GAP_S) -> np.ndarray:
+    """Засчитываемые интервалы между отсчётами: разрывы дольше max_gap_s — 0."""
+    dt = np.diff(ts)
+    return np.where((dt > 0) & (dt <= max_gap_s), dt, 0.0)
+
+
+def compute_totals(
+    timestamps, heart_rates, profile: AthleteProfile,
+    max_gap_s: float = MAX_SAMPLE_GAP_S,
+) -> EffortTotals:
+    """Векторно считает итоги по отсортированному ряду (ts в секундах, ЧСС)."""
+    ts = np.asarray(timestamps, dtype=np.float64)
+    hr = np.asarray(heart_rates, dtype=np.float64)
+    totals = EffortTotals()
+    if ts.size < 2:
+        return totals
+
+    dt = sample_intervals(ts, max_gap_s)
+    held = hr[:-1]
+    zones = _zones_array(held, profile.max_hr)
+
+    totals.calories = float(np.sum(kcal_per_min(held, profile) * dt) / 60)
+    points = np.array([0.0] + [EFFORT_POINTS_PER_MIN[z] for z in (1, 2, 3, 4)])
+    totals.effort_points = float(np.sum(points[zones] * dt) / 60)
+    totals.zone_seconds = [
+        float(s) for s in np.bincount(zones, weights=dt, minlength=5)[1:5]
+    ]
+    totals.active_seconds = float(np.sum(dt))
+    totals.trimp = float(np.sum(trimp_per_min(held, profile) * dt) / 60)
+    return totals
+
+
+@dataclass
+class _AthleteState:
+    session_id: str | None
+    last_ts: float | None = None
+    last_hr: int | None = None
+    totals: EffortTotals = field(default_factory=EffortTotals)
+
+
+class EffortEngine:
+    """Потоковый расчёт калорий и баллов усилий для всех спортсменов.
+
+    Вызывается из потока collector'а, поэтому состояние защищено Lock.
+    """
+
+    def __init__(self, max_gap_s: float = MAX_SAMPLE_GAP_S,
+                 flush_interval_s: float = FLUSH_INTERVAL_S):
+        self._max_gap_s = max_gap_s
+        self._flush_interval_s = flush_interval_s
+        self._states: dict[str, _AthleteState] = {}
+        self._dirty: set[str] = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        """Восстанавливает итоги активной сессии после перезапуска сервиса."""
+        active = db.query(TrainingSession.id).filter(TrainingSession.ended_at.is_(None)).first()
+        if not active:
+            return
+        rows = db.query(SessionTotal).filter(SessionTotal.session_id == active.id).all()
+        with self._lock:
+            for row in rows:
+                self._states[row.athlete_id] = _AthleteState(
+                    session_id=active.id,
+                    totals=EffortTotals(
+                        row.calories, row.effort_points,
+                        [row.zone_1_seconds, row.zone_2_seconds,
+                         row.zone_3_seconds, row.zone_4_seconds],
+                        row.active_seconds, row.trimp,
+                    ),
+                )
+
+    def update(
+        self, session_id: str | None, athlete_id: str,
+        hr: int, ts: float, profile: AthleteProfile,
+    ) -> EffortTotals:
+        """Учитывает новый отсчёт ЧСС и возвращает текущие итоги спортсмена."""
+        with self._lock:
+            state = self._states.get(athlete_id)
+            if state is None or state.session_id != session_id:
+                state = _AthleteState(session_id=session_id)
+                self._states[athlete_id] = state
+
+            if state.last_ts is not None and state.last_hr is not None:
+                dt = ts - state.last_ts
+                if 0 < dt <= self._max_gap_s:
+                    zone = calc_zone(state.last_hr, profile.max_hr)
+                    t = state.totals
+                    t.calories += kcal_per_min(state.last_hr, profile) * dt / 60
+                    t.effort_points += EFFORT_POINTS_PER_MIN[zone] * dt / 60
+                    t.zone_seconds[zone - 1] += dt
+                    t.active_seconds += dt
+                    t.trimp += trimp_per_min(state.last_hr, profile) * dt / 60
+
+            state.last_ts = ts
+            state.last_hr = hr
+            if session_id is not None:
+                self._dirty.add(athlete_id)
+            return state.totals
+
+    def get(self, athlete_id: str) -> EffortTotals | None:
+        """Текущие итоги спортсмена (или None, если данных нет)."""
+        with self._lock:
+            state = self._states.get(athlete_id)
+            return state.totals if state else None
+
+    def replace(self, session_id: str, athlete_id: str, totals: EffortTotals):
+        """Подменяет итоги после пакетного пересчёта, сохраняя позицию в потоке."""
+        with self._lock:
+            state = self._states.get(athlete_id)
+            if state is None or state.session_id != session_id:
+                return
+            state.totals = totals
+
+    def flush_if_due(self, db: Session):
+        """Сбрасывает изменённые итоги в БД не чаще FLUSH_INTERVAL_S."""
+        if time.monotonic() - self._last_flush < self._flush_interval_s:
+            return
+        self.flush(db)
+
+    def flush(self, db: Session):
+        """Сохраняет все изменённые итоги в session_totals."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            pending = [
+                (s.session_id, athlete_id, EffortTotals(
+                    s.totals.calories, s.totals.effort_points,
+                    list(s.totals.zone_seconds), s.totals.active_seconds,
+                    s.totals.trimp,
+                ))
+                for athlete_id, s in self._states.items()
+                if athlete_id in self._dirty and s.session_id is not None
+            ]
+            self._dirty.clear()
+
+        try:
+            for session_id, athlete_id, totals in pending:
+                save_totals(db, session_id, athlete_id, totals)
+            db.commit()
+        except Exception as e:
+            _logger.error(f"Effort flush error: {e}")
+            db.rollback()
+
+    def end_session(self, db: Session, session_id: str):
+        """Финальный сброс итогов сессии и очистка живого состояния."""
+        self.flush(db)
+        with self._lock:
+            for athlete_id in [a for a, s in self._states.items() if s.session_id == session_id]:
+                del self._states[athlete_id]
+
+
+def save_totals(db: Session, session_id: str, athlete_id: str, totals: EffortTotals) -> SessionTotal:
+    """Создаёт или обновляет строку session_totals (без commit)."""
+    row = db.query(SessionTotal).filter(
+        SessionTotal.session_id == session_id,
+        SessionTotal.athlete_id == athlete_id,
+    ).first()
+    if not row:
+        row = SessionTotal(session_id=session_id, athlete_id=athlete_id)
+        db.add(row)
+    row.calories = totals.calories
+    row.effort_points = totals.effort_points
+    row.zone_1_seconds, row.zone_2_seconds, row.zone_3_seconds, row.zone_4_seconds = (
+        totals.zone_seconds
+    )
+    row.active_seconds = totals.active_seconds
+    row.trimp = totals.trimp
+    row.updated_at = datetime.now(timezone.utc)
+    return row
+
+
+def _epoch(ts: datetime) -> float:
+    """SQLite возвращает naive datetime — считаем его UTC."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def compute_athlete_sessions(db: Session, athlete_id: str) -> dict[str, EffortTotals]:
+    """Считает итоги всех сессий спортсмена по сохранённым отсчётам (только чтение)."""
+    athlete = db.query(Athlete).filter(Athlete.id == athlete_id).first()
+    if not athlete:
+        return {}
+    profile = AthleteProfile.from_athlete(athlete)
+
+    rows = (
+        db.query(HrReading.session_id, HrReading.timestamp, HrReading.heart_rate)
+        .filter(
+            HrReading.athlete_id == athlete_id, HrReading.session_id.isnot(None),
+            HrReading.heart_rate.isnot(None),
+        )
+        .order_by(HrReading.session_id, HrReading.timestamp)
+        .all()
+    )
+
+    by_session: dict[str, tuple[list[float], list[int]]] = {}
+    for session_id, ts, hr in rows:
+        series = by_session.setdefault(session_id, ([], []))
+        series[0].append(_epoch(ts))
+        series[1].append(hr)
+
+    return {
+        session_id: compute_totals(ts, hr, profile)
+        for session_id, (ts, hr) in by_session.items()
+    }
+
+
+def recompute_athlete(db: Session, athlete_id: str) -> dict[str, EffortTotals]:
+    """Пересчитывает и сохраняет итоги всех сессий спортсмена.
+
+    Возвращает {session_id: EffortTotals}; commit выполняет вызывающий код.
+    """
+    result = compute_athlete_sessions(db, athlete_id)
+    for session_id, totals in result.items():
+        save_totals(db, session_id, athlete_id, totals)
+    _logger.info(f"Recomputed effort totals for athlete {athlete_id}: {len(result)} sessions")
+    return result
+
+
+effort_engine = EffortEngine()
@@ -0,0 +1,206 @@
+"""Фильтр артефактов ЧСС — потоковый (на датчик) и пакетный (NumPy).
+
+Съехавший нагрудный датчик даёт одиночные выбросы (60→220→62) и провалы
+в заведомо невозможные значения. Фильтр стоит перед зонами, рассылкой
+и записью в hr_readings:
+  - значение вне HR_MIN..HR_MAX отбрасывается всегда;
+  - опорное значение — медиана последних MEDIAN_WINDOW правдоподобных
+    отсчётов (нужно хотя бы MIN_REFERENCE); отсчёт, отличающийся от неё
+    больше чем на MAX_JUMP_BPM + MAX_RATE_BPM_S x dt, отбрасывается;
+  - отброшенный отсчёт заменяется опорной медианой (без неё — хранится
+    с флагом и без значения, в зоны и рассылку не попадает).
+
+Правдоподобные отсчёты попадают в окно медианы, даже если отброшены, —
+поэтому настоящий резкий скачок ЧСС принимается через пару ударов, а
+решение зависит только от сырых значений. Окно сбрасывается после
+паузы дольше RESET_GAP_S и при смене сессии или спортсмена на датчике.
+
+filter_series() — тот же фильтр векторно: при пересчёте сохранённой
+сессии (refilter_session) он даёт ровно те же значения и флаги, что и
+поток, — в hr_readings хранятся и сырое значение, и отфильтрованное.
+"""
+
+import logging
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Hashable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.orm import Session
+
+from ..hr_zones import calc_zone
+from ..models import Athlete, HrReading
+from .effort import _epoch
+
+_logger = logging.getLogger(__name__)
+
+# Физиологически возможная ЧСС
+HR_MIN = 30
+HR_MAX = 240
+
+# Окно медианы (отсчётов) и минимум отсчётов для опорного значения
+MEDIAN_WINDOW = 5
+MIN_REFERENCE = 3
+
+# Допустимое отличие от медианы: скачок + скорость изменения за время с
+# предыдущего правдоподобного отсчёта
+MAX_JUMP_BPM = 25.0
+MAX_RATE_BPM_S = 5.0
+
+# Пауза в данных, после которой окно начинается заново (сек)
+RESET_GAP_S = 10.0
+
+
+@dataclass
+class FilteredHr:
+    """Результат фильтра для одного отсчёта."""
+    raw: int
+    # Значение для зон и записи; None — отброшен и заменить нечем
+    heart_rate: int | None
+    rejected: bool
+
+
+@dataclass
+class _SensorFilter:
+    key: Hashable
+    window: deque = field(default_factory=lambda: deque(maxlen=MEDIAN_WINDOW))
+    last_ts: float | None = None
+
+
+def _filter_step(state: _SensorFilter, ts: float, raw: int) -> FilteredHr:
+    if state.last_ts is not None and ts - state.last_ts > RESET_GAP_S:
+        state.window.clear()
+    ref = statistics.median(state.window) if len(state.window) >= MIN_REFERENCE else None
+
+    plausible = HR_MIN <= raw <= HR_MAX
+    rejected = not plausible or (
+        ref is not None
+        and abs(raw - ref) > MAX_JUMP_BPM + MAX_RATE_BPM_S * (ts - state.last_ts)
+    )
+    if plausible:
+        state.window.append(raw)
+        state.last_ts = ts
+
+    if not rejected:
+        return FilteredHr(raw, raw, False)
+    return FilteredHr(raw, round(ref) if ref is not None else None, True)
+
+
+class HrFilter:
+    """Потоковый фильтр для всех датчиков (O(1) на отсчёт, вызывается из потока collector'а)."""
+
+    def __init__(self):
+        self._states: dict[int, _SensorFilter] = {}
+        self._lock = threading.Lock()
+
+    def update(self, device_id: int, key: Hashable, ts: float, raw: int) -> FilteredHr:
+        """Фильтрует отсчёт raw в ts (unix) датчика; смена key (сессия, спортсмен) сбрасывает окно."""
+        with self._lock:
+            state = self._states.get(device_id)
+            if state is None or state.key != key:
+                state = self._states[device_id] = _SensorFilter(key=key)
+            return _filter_step(state, ts, raw)
+
+    def reset(self, device_id: int):
+        with self._lock:
+            self._states.pop(device_id, None)
+
+
+def filter_series(timestamps, raw_values) -> tuple[np.ndarray, np.ndarray]:
+    """Векторный аналог HrFilter по ряду одного датчика.
+
+    Возвращает (heart_rate: float64, NaN — пропущен; rejected: bool).
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    raw = np.asarray(raw_values, dtype=np.float64)
+    n = ts.size
+    heart_rate = raw.copy()
+    rejected = np.zeros(n, dtype=bool)
+    if n == 0:
+        return heart_rate, rejected
+
+    plausible = (raw >= HR_MIN) & (raw <= HR_MAX)
+    p_idx = np.flatnonzero(plausible)
+    p_ts, p_raw = ts[p_idx], raw[p_idx]
+    # Сегменты между паузами дольше RESET_GAP_S (по правдоподобным отсчётам)
+    seg_start = np.r_[True, np.diff(p_ts) > RESET_GAP_S]
+    seg_id = np.cumsum(seg_start) - 1
+
+    # ref_end[e] — медиана окна из правдоподобных отсчётов [e-W, e) сегмента отсчёта e-1
+    pad = np.r_[np.full(MEDIAN_WINDOW, np.nan), p_raw]
+    seg_pad = np.r_[np.full(MEDIAN_WINDOW, -1), seg_id]
+    windows = sliding_window_view(pad, MEDIAN_WINDOW)[1:]
+    seg_windows = sliding_window_view(seg_pad, MEDIAN_WINDOW)[1:]
+    windows = np.where(seg_windows == seg_id[:, None], windows, np.nan)
+    counts = np.sum(~np.isnan(windows), axis=1)
+    ref_end = np.full(p_raw.size + 1, np.nan)
+    enough = counts >= MIN_REFERENCE
+    if enough.any():
+        ref_end[1:][enough] = np.nanmedian(windows[enough], axis=1)
+
+    # Для каждого отсчёта: сколько правдоподобных было до него
+    before = np.searchsorted(p_idx, np.arange(n))
+    has_prev = before > 0
+    prev_ts = np.where(has_prev, p_ts[np.maximum(before - 1, 0)] if p_ts.size else 0.0, np.nan)
+    dt = ts - prev_ts
+    ref = np.where(has_prev & (dt <= RESET_GAP_S), ref_end[before], np.nan)
+
+    rejected = ~plausible | (
+        ~np.isnan(ref) & (np.abs(raw - ref) > MAX_JUMP_BPM + MAX_RATE_BPM_S * dt)
+    )
+    heart_rate[rejected] = np.rint(ref[rejected])
+    return heart_rate, rejected
+
+
+def refilter_session(db: Session, session_id: str) -> dict:
+    """Пересчитывает фильтр по сырым значениям сохранённой сессии (без commit).
+
+    Возвращает {readings, rejected, changed, athletes}; athletes — у кого
+    изменились значения (их итоги надо пересчитать).
+    """
+    rows = (
+        db.query(HrReading)
+        .filter(HrReading.session_id == session_id)
+        .order_by(HrReading.athlete_id, HrReading.timestamp, HrReading.id)
+        .all()
+    )
+    by_athlete: dict[str, list[HrReading]] = {}
+    for row in rows:
+        by_athlete.setdefault(row.athlete_id, []).append(row)
+    max_hrs = dict(db.query(Athlete.id, Athlete.max_hr).filter(Athlete.id.in_(list(by_athlete))))
+
+    rejected_total = 0
+    changed = 0
+    changed_athletes = []
+    for athlete_id, readings in by_athlete.items():
+        raw = [r.raw_heart_rate if r.raw_heart_rate is not None else r.heart_rate for r in readings]
+        heart_rate, rejected = filter_series([_epoch(r.timestamp) for r in readings], raw)
+        rejected_total += int(rejected.sum())
+        athlete_changed = False
+        for row, raw_hr, hr, flag in zip(readings, raw, heart_rate, rejected):
+            # Заменить нечем — отсчёт хранится без значения и зоны
+            hr = None if np.isnan(hr) else int(hr)
+            flag = bool(flag)
+            if row.heart_rate != hr or row.rejected != flag or row.raw_heart_rate is None:
+                athlete_changed |= row.heart_rate != hr
+                row.raw_heart_rate = raw_hr
+                row.heart_rate = hr
+                row.rejected = flag
+                row.zone = calc_zone(hr, max_hrs.get(athlete_id) or 190) if hr is not None else None
+                changed += 1
+        if athlete_changed:
+            changed_athletes.append(athlete_id)
+
+    _logger.info(f"Refiltered session {session_id}: {len(rows)} readings, {changed} changed")
+    return {
+        "readings": len(rows),
+        "rejected": rejected_total,
+        "changed": changed,
+        "athletes": changed_athletes,
+    }
+
+
+hr_filter = HrFilter()
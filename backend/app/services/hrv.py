@@ -0,0 +1,407 @@
+"""Вариабельность ритма сердца (ВСР) — потоковый расчёт по RR-интервалам.
+
+RR-интервалы приходят от коллектора вместе с каждым ударом (по часам
+датчика, с учётом переполнения beat_time — services/beats.py).
+HrvEngine для каждого спортсмена:
+  - отбрасывает артефакты: интервал вне RR_MIN_MS..RR_MAX_MS или
+    отличающийся от последнего принятого больше чем на MAX_RR_CHANGE
+    (после ARTIFACT_RESET подряд отброшенных опорный интервал сбрасывается
+    — так не «залипает» реальный скачок ЧСС);
+  - держит скользящее окно WINDOW_S с суммами RR, RR² и квадратов
+    соседних разностей — RMSSD и SDNN обновляются за O(1) (суммы целые,
+    в мс, поэтому вычитание при выходе из окна не копит погрешность);
+  - копит те же суммы за всю сессию и за разминку (первые WARMUP_S
+    секунд данных спортсмена) — отсюда итоги в hrv_summaries;
+  - раз в FLUSH_INTERVAL_S дописывает интервалы в rr_series непрерывными
+    отрезками uint16 (2 байта на удар, старший бит — артефакт).
+
+Готовность к тренировке: ln(RMSSD разминки) сравнивается с базой по
+BASELINE_SESSIONS предыдущим сессиям спортсмена (z-оценка → 0..100).
+"""
+
+import logging
+import math
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from ..models import HrvSummary, RrSeries, Session as TrainingSession
+
+_logger = logging.getLogger(__name__)
+
+# Допустимые RR-интервалы (мс): 30..200 уд/мин
+RR_MIN_MS = 300
+RR_MAX_MS = 2000
+
+# Максимальное относительное отличие от предыдущего принятого интервала
+MAX_RR_CHANGE = 0.2
+
+# Столько отброшенных подряд — опорный интервал сбрасывается
+ARTIFACT_RESET = 5
+
+# Скользящее окно живой ВСР (сек) и минимум интервалов для показа
+WINDOW_S = 60.0
+MIN_WINDOW_BEATS = 20
+
+# Разминка — первые WARMUP_S секунд данных спортсмена в сессии
+WARMUP_S = 300.0
+MIN_WARMUP_BEATS = 60
+
+# Как часто RR-ряды и итоги сбрасываются в БД (сек)
+FLUSH_INTERVAL_S = 15.0
+
+# Признак артефакта в сохранённом интервале
+ARTIFACT_FLAG = 0x8000
+
+# Допуск стыка соседних отрезков при восстановлении (сек)
+SERIES_GAP_S = 0.5
+
+# База готовности: предыдущие сессии с разминкой
+BASELINE_SESSIONS = 7
+MIN_BASELINE_SESSIONS = 3
+# Нижняя граница разброса ln(RMSSD) базы
+MIN_BASELINE_SD = 0.05
+
+
+@dataclass
+class _Sums:
+    """Суммы для RMSSD/SDNN (целые, мс)."""
+    n: int = 0
+    s: int = 0
+    ss: int = 0
+    d_n: int = 0
+    d_ss: int = 0
+
+    def add(self, rr: int, diff_sq: int | None):
+        self.n += 1
+        self.s += rr
+        self.ss += rr * rr
+        if diff_sq is not None:
+            self.d_n += 1
+            self.d_ss += diff_sq
+
+    def remove(self, rr: int, diff_sq: int | None):
+        self.n -= 1
+        self.s -= rr
+        self.ss -= rr * rr
+        if diff_sq is not None:
+            self.d_n -= 1
+            self.d_ss -= diff_sq
+
+    def rmssd(self, min_beats: int = 2) -> float | None:
+        if self.d_n < max(min_beats - 1, 1):
+            return None
+        return math.sqrt(self.d_ss / self.d_n)
+
+    def sdnn(self, min_beats: int = 2) -> float | None:
+        if self.n < max(min_beats, 2):
+            return None
+        return math.sqrt(max(self.ss - self.s * self.s / self.n, 0) / (self.n - 1))
+
+
+@dataclass
+class HrvSnapshot:
+    """Живая ВСР спортсмена (скользящее окно)."""
+    rmssd: float | None = None
+    sdnn: float | None = None
+
+    def to_payload(self) -> dict:
+        return {
+            "rmssd": round(self.rmssd, 1) if self.rmssd is not None else None,
+            "sdnn": round(self.sdnn, 1) if self.sdnn is not None else None,
+        }
+
+
+@dataclass
+class _AthleteHrv:
+    session_id: str | None
+    first_ts: float | None = None
+    # Последний принятый интервал (для соседней разности) и опорный для фильтра
+    prev_rr: int | None = None
+    ref_rr: int | None = None
+    rejected_run: int = 0
+    window: deque = field(default_factory=deque)
+    window_sums: _Sums = field(default_factory=_Sums)
+    total: _Sums = field(default_factory=_Sums)
+    warmup: _Sums = field(default_factory=_Sums)
+    artifacts: int = 0
+    # Несохранённый отрезок: время первого удара и интервалы
+    chunk_start: float | None = None
+    chunk: array = field(default_factory=lambda: array("H"))
+    chunks: list = field(default_factory=list)
+
+
+class HrvEngine:
+    """Потоковый расчёт ВСР для всех спортсменов (вызывается из потока collector'а)."""
+
+    def __init__(self, flush_interval_s: float = FLUSH_INTERVAL_S):
+        self._flush_interval_s = flush_interval_s
+        self._states: dict[str, _AthleteHrv] = {}
+        self._dirty: set[str] = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(
+        self, session_id: str | None, athlete_id: str, ts: float, rr_ms: int | None,
+    ) -> HrvSnapshot:
+        """Учитывает удар в ts (unix) с RR-интервалом rr_ms (None — неизвестен)."""
+        with self._lock:
+            state = self._states.get(athlete_id)
+            if state is None or state.session_id != session_id:
+                state = self._states[athlete_id] = _AthleteHrv(session_id=session_id)
+            self._add(state, ts, rr_ms)
+            if session_id is not None:
+                self._dirty.add(athlete_id)
+            return HrvSnapshot(
+                state.window_sums.rmssd(MIN_WINDOW_BEATS),
+                state.window_sums.sdnn(MIN_WINDOW_BEATS),
+            )
+
+    def _add(self, state: _AthleteHrv, ts: float, rr_ms: int | None):
+        if state.first_ts is None:
+            state.first_ts = ts
+        if rr_ms is None:
+            # Удар без интервала: непрерывность ряда прервана
+            state.prev_rr = None
+            self._close_chunk(state)
+            return
+
+        accepted = RR_MIN_MS <= rr_ms <= RR_MAX_MS and (
+            state.ref_rr is None or abs(rr_ms - state.ref_rr) <= MAX_RR_CHANGE * state.ref_rr
+        )
+        if state.chunk_start is None:
+            state.chunk_start = ts
+        state.chunk.append(min(rr_ms, ARTIFACT_FLAG - 1) | (0 if accepted else ARTIFACT_FLAG))
+
+        if not accepted:
+            state.artifacts += 1
+            state.prev_rr = None
+            state.rejected_run += 1
+            if state.rejected_run >= ARTIFACT_RESET:
+                state.ref_rr = None
+            return
+
+        state.rejected_run = 0
+        diff_sq = (rr_ms - state.prev_rr) ** 2 if state.prev_rr is not None else None
+        state.prev_rr = state.ref_rr = rr_ms
+
+        state.window.append((ts, rr_ms, diff_sq))
+        state.window_sums.add(rr_ms, diff_sq)
+        while state.window and state.window[0][0] < ts - WINDOW_S:
+            _, old_rr, old_diff = state.window.popleft()
+            state.window_sums.remove(old_rr, old_diff)
+
+        state.total.add(rr_ms, diff_sq)
+        if ts - state.first_ts <= WARMUP_S:
+            state.warmup.add(rr_ms, diff_sq)
+
+    @staticmethod
+    def _close_chunk(state: _AthleteHrv):
+        if state.chunk:
+            state.chunks.append((state.chunk_start, state.chunk))
+        state.chunk_start = None
+        state.chunk = array("H")
+
+    def load(self, db: Session):
+        """Восстанавливает состояние активной сессии по сохранённым RR-рядам."""
+        active = db.query(TrainingSession.id).filter(TrainingSession.ended_at.is_(None)).first()
+        if not active:
+            return
+        rows = (
+            db.query(RrSeries)
+            .filter(RrSeries.session_id == active.id)
+            .order_by(RrSeries.athlete_id, RrSeries.started_at, RrSeries.id)
+            .all()
+        )
+        last_ts: dict[str, float] = {}
+        with self._lock:
+            for row in rows:
+                state = self._states.get(row.athlete_id)
+                if state is None:
+                    state = self._states[row.athlete_id] = _AthleteHrv(session_id=active.id)
+                for i, (ts, rr_ms, _) in enumerate(decode_series(row.started_at, row.rr_ms)):
+                    prev = last_ts.get(row.athlete_id)
+                    if i == 0 and prev is not None and ts - prev > rr_ms / 1000 + SERIES_GAP_S:
+                        # Отрезок начат после разрыва ряда
+                        state.prev_rr = None
+                    self._add(state, ts, rr_ms)
+                    last_ts[row.athlete_id] = ts
+                # Восстановленные интервалы уже сохранены
+                state.chunk_start = None
+                state.chunk = array("H")
+        if rows:
+            _logger.info(f"HRV state restored from {len(rows)} RR chunks")
+
+    def flush_if_due(self, db: Session):
+        """Сбрасывает RR-ряды и итоги в БД не чаще FLUSH_INTERVAL_S."""
+        if time.monotonic() - self._last_flush < self._flush_interval_s:
+            return
+        self.flush(db)
+
+    def flush(self, db: Session):
+        """Дописывает накопленные отрезки RR и обновляет hrv_summaries."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            chunks = []
+            summaries = []
+            for athlete_id in self._dirty:
+                state = self._states.get(athlete_id)
+                if state is None or state.session_id is None:
+                    continue
+                self._close_chunk(state)
+                chunks += [(state.session_id, athlete_id, start, rr) for start, rr in state.chunks]
+                state.chunks = []
+                summaries.append(_summary_row(state.session_id, athlete_id, state))
+            self._dirty.clear()
+
+        if not chunks and not summaries:
+            return
+        try:
+            if chunks:
+                db.execute(insert(RrSeries.__table__), [
+                    {
+                        "session_id": session_id,
+                        "athlete_id": athlete_id,
+                        "started_at": datetime.fromtimestamp(start, timezone.utc),
+                        "beats": len(rr),
+                        "rr_ms": _encode(rr),
+                    }
+                    for session_id, athlete_id, start, rr in chunks
+                ])
+            for row in summaries:
+                db.execute(delete(HrvSummary).where(
+                    HrvSummary.session_id == row["session_id"],
+                    HrvSummary.athlete_id == row["athlete_id"],
+                ))
+            if summaries:
+                db.execute(insert(HrvSummary.__table__), summaries)
+            db.commit()
+        except Exception as e:
+            _logger.error(f"HRV flush error: {e}")
+            db.rollback()
+
+    def end_session(self, db: Session, session_id: str):
+        """Финальный сброс ВСР сессии и очистка живого состояния."""
+        self.flush(db)
+        with self._lock:
+            for athlete_id in [a for a, s in self._states.items() if s.session_id == session_id]:
+                del self._states[athlete_id]
+
+
+def _summary_row(session_id: str, athlete_id: str, state: _AthleteHrv) -> dict:
+    rmssd = state.total.rmssd()
+    sdnn = state.total.sdnn()
+    warmup = state.warmup.rmssd(MIN_WARMUP_BEATS)
+    return {
+        "session_id": session_id,
+        "athlete_id": athlete_id,
+        "beats": state.total.n,
+        "artifacts": state.artifacts,
+        "rmssd": round(rmssd, 2) if rmssd is not None else None,
+        "sdnn": round(sdnn, 2) if sdnn is not None else None,
+        "warmup_beats": state.warmup.n,
+        "warmup_rmssd": round(warmup, 2) if warmup is not None else None,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+
+def _encode(rr: array) -> bytes:
+    """uint16 little-endian независимо от платформы."""
+    if sys.byteorder == "big":
+        rr = array("H", rr)
+        rr.byteswap()
+    return rr.tobytes()
+
+
+def decode_series(started_at: datetime, raw: bytes):
+    """Отрезок rr_series → (unix-время удара, RR мс, артефакт)."""
+    data = array("H")
+    data.frombytes(raw)
+    if sys.byteorder == "big":
+        data.byteswap()
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    ts = started_at.timestamp()
+    for i, value in enumerate(data):
+        rr = value & (ARTIFACT_FLAG - 1)
+        if i:
+            ts += rr / 1000
+        yield ts, rr, bool(value & ARTIFACT_FLAG)
+
+
+# ── Готовность ──────────────────────────────────────────────
+
+def readiness_score(ln_rmssd: float, baseline: list[float]) -> dict:
+    """Оценка готовности по ln(RMSSD) разминки относительно базы спортсмена."""
+    if len(baseline) < MIN_BASELINE_SESSIONS:
+        return {"baseline_ln_rmssd": None, "z": None, "score": None, "status": "baseline"}
+    mean = sum(baseline) / len(baseline)
+    sd = math.sqrt(sum((x - mean) ** 2 for x in baseline) / (len(baseline) - 1))
+    z = (ln_rmssd - mean) / max(sd, MIN_BASELINE_SD)
+    score = round(50 * (1 + math.erf(z / math.sqrt(2))))
+    status = "ready" if z >= -0.5 else "caution" if z >= -1.5 else "low"
+    return {"baseline_ln_rmssd": round(mean, 3), "z": round(z, 2), "score": score, "status": status}
+
+
+def _warmups(db: Session, athlete_ids: list[str] | None = None):
+    """Разминки спортсменов по времени начала сессии: (athlete_id, session_id, started_at, rmssd)."""
+    query = (
+        db.query(HrvSummary.athlete_id, HrvSummary.session_id, TrainingSession.started_at,
+                 HrvSummary.warmup_rmssd)
+        .join(TrainingSession, TrainingSession.id == HrvSummary.session_id)
+        .filter(HrvSummary.warmup_rmssd > 0)
+    )
+    if athlete_ids is not None:
+        query = query.filter(HrvSummary.athlete_id.in_(athlete_ids))
+    return query.order_by(HrvSummary.athlete_id, TrainingSession.started_at).all()
+
+
+def athlete_readiness(db: Session, athlete_id: str, limit: int) -> list[dict]:
+    """Готовность спортсмена по последним limit сессиям (новые первыми)."""
+    rows = _warmups(db, [athlete_id])
+    items = []
+    for i, (_, session_id, started_at, rmssd) in enumerate(rows):
+        baseline = [math.log(r[3]) for r in rows[max(0, i - BASELINE_SESSIONS):i]]
+        items.append({
+            "athlete_id": athlete_id,
+            "session_id": session_id,
+            "started_at": started_at,
+            "warmup_rmssd": rmssd,
+            **readiness_score(math.log(rmssd), baseline),
+        })
+    return items[::-1][:limit]
+
+
+def session_readiness(db: Session, session_id: str) -> list[dict]:
+    """Готовность участников сессии относительно их предыдущих сессий."""
+    athlete_ids = [
+        a for (a,) in db.query(HrvSummary.athlete_id).filter(HrvSummary.session_id == session_id)
+    ]
+    by_athlete: dict[str, list] = {}
+    for row in _warmups(db, athlete_ids):
+        by_athlete.setdefault(row[0], []).append(row)
+    items = []
+    for athlete_id, rows in by_athlete.items():
+        index = next((i for i, r in enumerate(rows) if r[1] == session_id), None)
+        if index is None:
+            continue
+        baseline = [math.log(r[3]) for r in rows[max(0, index - BASELINE_SESSIONS):index]]
+        _, _, started_at, rmssd = rows[index]
+        items.append({
+            "athlete_id": athlete_id,
+            "session_id": session_id,
+            "started_at": started_at,
+            "warmup_rmssd": rmssd,
+            **readiness_score(math.log(rmssd), baseline),
+        })
+    return items
+
+
+hrv_engine = HrvEngine()
@@ -0,0 +1,380 @@
+"""Фоновые задачи: тяжёлые отчёты и пересчёты в пуле процессов.
+
+Отчёты за несколько месяцев, экспорт и пересчёт истории не должны
+конкурировать с event loop, который рассылает живые ЧСС. Задачи уходят
+в ProcessPoolExecutor (процессы с пониженным приоритетом), воркеры
+читают БД через read-only соединения SQLite и пишут результат в файл
+кэша. Запись в БД (для пересчётов) выполняет основной процесс после
+завершения задачи.
+
+Результаты кэшируются на диске по (тип задачи, параметры). Клиент
+опрашивает /api/jobs/{id} или получает WebSocket-событие job_done.
+"""
+
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..database import DB_PATH, SessionLocal
+from ..models import (
+    Athlete, HrReading, HrRecovery, SessionTotal, Session as TrainingSession,
+)
+from .effort import EffortTotals, compute_athlete_sessions, effort_engine, save_totals
+from .leaderboard import leaderboards, period_key
+from .training_load import rebuild_athlete as rebuild_athlete_load
+from .ws_manager import manager
+
+_logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("CF_CACHE_DIR", "/tmp/cf_monitor_cache")
+
+# Воркеров немного: на 4-ядерном Pi остальные ядра — для живого потока
+JOB_WORKERS = int(os.environ.get("CF_JOB_WORKERS", "1"))
+
+# Понижение приоритета процессов-воркеров (nice)
+WORKER_NICE = 10
+
+# Сколько завершённых задач помнить в памяти
+MAX_JOBS = 100
+
+
+# ── Выполняется в процессах-воркерах ─────────────────────────
+
+_ro_factory: sessionmaker | None = None
+
+
+def _worker_init():
+    """Инициализация воркера: пониженный приоритет процесса."""
+    try:
+        os.nice(WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def _ro_session() -> Session:
+    """Сессия БД поверх read-only соединения SQLite (mode=ro)."""
+    global _ro_factory
+    if _ro_factory is None:
+        engine = create_engine(
+            "sqlite://",
+            creator=lambda: sqlite3.connect(
+                f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False
+            ),
+        )
+        _ro_factory = sessionmaker(bind=engine, autoflush=False)
+    return _ro_factory()
+
+
+def _write_json(path: str, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+
+def _iso_week(day: str) -> str:
+    """ISO-неделя дня 'YYYY-MM-DD' — тот же ключ, что у недельных рейтингов."""
+    return period_key("week", datetime.fromisoformat(day))
+
+
+def _athlete_report(params: dict, out_path: str):
+    """Понедельный отчёт спортсмена: калории, баллы, TRIMP, ЧСС, HRR60.
+
+    SQLite группирует по дням (strftime %W — неделя не по ISO, а %G/%V
+    есть не во всех версиях), дни сводятся в ISO-недели здесь.
+    """
+    athlete_id = params["athlete_id"]
+    since = datetime.now(timezone.utc) - timedelta(weeks=int(params.get("weeks", 26)))
+    day = func.date(TrainingSession.started_at)
+
+    db = _ro_session()
+    try:
+        totals = (
+            db.query(
+                day,
+                func.count(SessionTotal.id),
+                func.sum(SessionTotal.calories),
+                func.sum(SessionTotal.effort_points),
+                func.sum(SessionTotal.trimp),
+                func.sum(SessionTotal.active_seconds),
+            )
+            .join(SessionTotal, SessionTotal.session_id == TrainingSession.id)
+            .filter(SessionTotal.athlete_id == athlete_id, TrainingSession.started_at >= since)
+            .group_by(day)
+            .all()
+        )
+        hr = (
+            db.query(
+                day, func.sum(HrReading.heart_rate), func.count(HrReading.heart_rate),
+                func.max(HrReading.heart_rate),
+            )
+            .join(HrReading, HrReading.session_id == TrainingSession.id)
+            .filter(HrReading.athlete_id == athlete_id, TrainingSession.started_at >= since)
+            .group_by(day)
+            .all()
+        )
+        hrr_day = func.date(HrRecovery.ended_at)
+        hrr = (
+            db.query(hrr_day, func.sum(HrRecovery.hrr60), func.count(HrRecovery.hrr60))
+            .filter(HrRecovery.athlete_id == athlete_id, HrRecovery.ended_at >= since)
+            .group_by(hrr_day)
+            .all()
+        )
+    finally:
+        db.close()
+
+    weeks: dict[str, dict] = {}
+    for d, sessions, calories, points, trimp, seconds in totals:
+        w = weeks.setdefault(_iso_week(d), {
+            "sessions": 0, "calories": 0.0, "effort_points": 0.0, "trimp": 0.0, "active_seconds": 0,
+        })
+        w["sessions"] += sessions
+        w["calories"] += calories or 0
+        w["effort_points"] += points or 0
+        w["trimp"] += trimp or 0
+        w["active_seconds"] += seconds or 0
+    hr_weeks: dict[str, list] = {}
+    for d, hr_sum, hr_count, hr_max in hr:
+        acc = hr_weeks.setdefault(_iso_week(d), [0, 0, None])
+        acc[0] += hr_sum or 0
+        acc[1] += hr_count
+        if hr_max is not None:
+            acc[2] = max(acc[2] or 0, hr_max)
+    hrr_weeks: dict[str, list] = {}
+    for d, hrr_sum, hrr_count in hrr:
+        acc = hrr_weeks.setdefault(_iso_week(d), [0.0, 0])
+        acc[0] += hrr_sum or 0
+        acc[1] += hrr_count
+
+    report = []
+    for week, w in sorted(weeks.items()):
+        hr_sum, hr_count, max_hr = hr_weeks.get(week, (0, 0, None))
+        hrr_sum, hrr_count = hrr_weeks.get(week, (0.0, 0))
+        report.append({
+            "week": week,
+            "sessions": w["sessions"],
+            "calories": round(w["calories"], 1),
+            "effort_points": round(w["effort_points"], 1),
+            "trimp": round(w["trimp"], 1),
+            "active_seconds": int(w["active_seconds"]),
+            "avg_hr": round(hr_sum / hr_count, 1) if hr_count else None,
+            "max_hr": max_hr,
+            "avg_hrr60": round(hrr_sum / hrr_count, 1) if hrr_count else None,
+        })
+    _write_json(out_path, {"athlete_id": athlete_id, "weeks": report})
+
+
+def _session_export(params: dict, out_path: str):
+    """CSV-экспорт всех отсчётов ЧСС сессии."""
+    db = _ro_session()
+    try:
+        rows = (
+            db.query(HrReading.timestamp, HrReading.athlete_id, Athlete.name,
+                     HrReading.heart_rate, HrReading.raw_heart_rate, HrReading.rejected,
+                     HrReading.zone)
+            .join(Athlete, Athlete.id == HrReading.athlete_id)
+            .filter(HrReading.session_id == params["session_id"])
+            .order_by(HrReading.timestamp)
+            .yield_per(1000)
+        )
+        tmp = f"{out_path}.tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                "timestamp", "athlete_id", "athlete_name", "heart_rate", "raw_heart_rate",
+                "rejected", "zone",
+            ])
+            for row in rows:
+                writer.writerow(row)
+        os.replace(tmp, out_path)
+    finally:
+        db.close()
+
+
+def _recompute_athlete(params: dict, out_path: str):
+    """Пересчёт итогов сессий спортсмена; запись в БД — в основном процессе."""
+    db = _ro_session()
+    try:
+        result = compute_athlete_sessions(db, params["athlete_id"])
+    finally:
+        db.close()
+    _write_json(out_path, {sid: asdict(t) for sid, t in result.items()})
+
+
+# ── Применение результатов в основном процессе ──────────────
+
+def _apply_recompute(params: dict, out_path: str):
+    """Сохраняет пересчитанные итоги и обновляет зависящие от них сводки."""
+    athlete_id = params["athlete_id"]
+    with open(out_path, encoding="utf-8") as f:
+        recomputed = {sid: EffortTotals(**t) for sid, t in json.load(f).items()}
+
+    db = SessionLocal()
+    try:
+        for session_id, totals in recomputed.items():
+            save_totals(db, session_id, athlete_id, totals)
+        db.commit()
+
+        active = db.query(TrainingSession.id).filter(TrainingSession.ended_at.is_(None)).first()
+        if active and active.id in recomputed:
+            effort_engine.replace(active.id, athlete_id, recomputed[active.id])
+        leaderboards.rebuild_athlete(db, athlete_id)
+        rebuild_athlete_load(db, athlete_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+@dataclass(frozen=True)
+class JobKind:
+    run: Callable[[dict, str], None]
+    required: tuple[str, ...]
+    suffix: str = "json"
+    # None — результат не кэшируется; иначе срок жизни кэша (сек)
+    cache_ttl_s: float | None = None
+    apply: Callable[[dict, str], None] | None = None
+
+
+JOB_KINDS: dict[str, JobKind] = {
+    "athlete_report": JobKind(_athlete_report, ("athlete_id",), cache_ttl_s=600),
+    "session_export": JobKind(_session_export, ("session_id",), suffix="csv", cache_ttl_s=3600),
+    "recompute_athlete": JobKind(_recompute_athlete, ("athlete_id",), apply=_apply_recompute),
+}
+
+
+# ── Менеджер задач ───────────────────────────────────────────
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    status: str = "queued"  # queued | running | done | failed
+    cached: bool = False
+    error: str | None = None
+    result_path: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+
+
+def cache_key(kind: str, params: dict) -> str:
+    """Ключ кэша: хэш типа задачи и отсортированных параметров."""
+    raw = json.dumps([kind, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class JobManager:
+    """Очередь задач поверх ProcessPoolExecutor с кэшем результатов на диске."""
+
+    def __init__(self, workers: int = JOB_WORKERS, cache_dir: str = CACHE_DIR):
+        self._workers = workers
+        self._cache_dir = cache_dir
+        self._pool: ProcessPoolExecutor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None):
+        """Создаёт пул процессов (spawn — без наследования потоков collector'а)."""
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._loop = loop
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+        )
+
+    def stop(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def submit(self, kind: str, params: dict, force: bool = False) -> Job:
+        """Ставит задачу в очередь или сразу отдаёт свежий результат из кэша."""
+        spec = JOB_KINDS.get(kind)
+        if spec is None:
+            raise ValueError(f"Unknown job kind: {kind}")
+        missing = [p for p in spec.required if p not in params]
+        if missing:
+            raise ValueError(f"Missing job params: {', '.join(missing)}")
+        if self._pool is None:
+            raise RuntimeError("Job manager is not started")
+
+        key = cache_key(kind, params)
+        if spec.cache_ttl_s is not None:
+            path = os.path.join(self._cache_dir, f"{key}.{spec.suffix}")
+        else:
+            path = os.path.join(self._cache_dir, f"{key}-{uuid.uuid4().hex[:8]}.{spec.suffix}")
+        job = Job(id=str(uuid.uuid4()), kind=kind, params=params, result_path=path)
+
+        if (spec.cache_ttl_s is not None and not force and os.path.exists(path)
+                and time.time() - os.path.getmtime(path) < spec.cache_ttl_s):
+            job.status = "done"
+            job.cached = True
+            job.finished_at = job.created_at
+            self._remember(job)
+            return job
+
+        self._remember(job)
+        future = self._pool.submit(spec.run, params, path)
+        job.status = "running"
+        future.add_done_callback(lambda f: self._on_done(job, spec, f))
+        return job
+
+    def _remember(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job
+            if len(self._jobs) > MAX_JOBS:
+                finished = [j for j in self._jobs.values() if j.finished_at]
+                for old in sorted(finished, key=lambda j: j.finished_at)[:len(self._jobs) - MAX_JOBS]:
+                    del self._jobs[old.id]
+
+    def _on_done(self, job: Job, spec: JobKind, future: Future):
+        """Вызывается в служебном потоке пула по завершении задачи."""
+        try:
+            future.result()
+            if spec.apply:
+                spec.apply(job.params, job.result_path)
+                if spec.cache_ttl_s is None:
+                    os.remove(job.result_path)
+                    job.result_path = None
+            job.status = "done"
+        except Exception as e:
+            _logger.error(f"Job {job.kind} ({job.id}) failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = datetime.now(timezone.utc)
+
+        if self._loop and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(manager.broadcast({
+                "type": "job_done",
+                "job_id": job.id,
+                "kind": job.kind,
+                "status": job.status,
+            }), self._loop)
+
+
+job_manager = JobManager()
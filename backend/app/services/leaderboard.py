@@ -0,0 +1,295 @@
+"""Лидерборды по баллам усилий: текущая сессия, неделя, месяц.
+
+Рейтинги держатся в памяти в отсортированном виде и обновляются по мере
+начисления баллов (EffortEngine), поэтому top-N и «моё место» не требуют
+GROUP BY по hr_readings. Недельные и месячные суммы дополнительно
+сохраняются в leaderboard_totals — из них рейтинги восстанавливаются
+при старте и читаются архивные периоды.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import LeaderboardTotal, SessionTotal, Session as TrainingSession
+
+_logger = logging.getLogger(__name__)
+
+PERIODS = ("session", "week", "month")
+
+# Как часто недельные/месячные суммы сбрасываются в БД (сек)
+FLUSH_INTERVAL_S = 15.0
+
+
+def period_key(period: str, ts: datetime) -> str:
+    """Ключ периода: '2026-W42' для недели, '2026-10' для месяца."""
+    if period == "week":
+        year, week, _ = ts.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return f"{ts.year}-{ts.month:02d}"
+    raise ValueError(f"Unknown period: {period}")
+
+
+class RankedBoard:
+    """Рейтинг, упорядоченный по убыванию баллов.
+
+    Место спортсмена ищется бинарным поиском — O(log n); вставка сдвигает
+    список (memmove), что для размеров зала (десятки–сотни) дешевле дерева.
+    """
+
+    def __init__(self, key: str | None = None):
+        self.key = key
+        self._scores: dict[str, float] = {}
+        self._order: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def score(self, athlete_id: str) -> float | None:
+        return self._scores.get(athlete_id)
+
+    def rank(self, athlete_id: str) -> int | None:
+        """Место спортсмена (с 1) или None, если его нет в рейтинге."""
+        score = self._scores.get(athlete_id)
+        if score is None:
+            return None
+        return bisect_left(self._order, (-score, athlete_id)) + 1
+
+    def set(self, athlete_id: str, score: float) -> tuple[int | None, int]:
+        """Устанавливает баллы спортсмена; возвращает (старое место, новое место)."""
+        prev_rank = None
+        old = self._scores.get(athlete_id)
+        if old is not None:
+            i = bisect_left(self._order, (-old, athlete_id))
+            prev_rank = i + 1
+            del self._order[i]
+        self._scores[athlete_id] = score
+        insort(self._order, (-score, athlete_id))
+        return prev_rank, self.rank(athlete_id)
+
+    def top(self, limit: int) -> list[tuple[str, float]]:
+        """Первые limit спортсменов: [(athlete_id, баллы), ...]."""
+        return [(aid, -neg) for neg, aid in self._order[:limit]]
+
+
+class Leaderboards:
+    """Живые лидерборды сессии, недели и месяца."""
+
+    def __init__(self, flush_interval_s: float = FLUSH_INTERVAL_S):
+        self._flush_interval_s = flush_interval_s
+        self._boards: dict[str, RankedBoard] = {p: RankedBoard() for p in PERIODS}
+        # Последние учтённые баллы спортсмена в текущей сессии — для расчёта приращения
+        self._session_points: dict[str, float] = {}
+        self._dirty: set[str] = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def board(self, period: str) -> RankedBoard:
+        return self._boards[period]
+
+    def load(self, db: Session):
+        """Восстанавливает рейтинги из сводных таблиц (при старте)."""
+        now = datetime.now(timezone.utc)
+        active = (
+            db.query(TrainingSession.id, TrainingSession.started_at)
+            .filter(TrainingSession.ended_at.is_(None))
+            .first()
+        )
+        with self._lock:
+            for period in ("week", "month"):
+                ts = active.started_at if active else now
+                self._boards[period] = self._load_period(db, period, period_key(period, ts))
+
+            board = RankedBoard(active.id if active else None)
+            self._session_points.clear()
+            if active:
+                rows = db.query(SessionTotal.athlete_id, SessionTotal.effort_points).filter(
+                    SessionTotal.session_id == active.id
+                ).all()
+                for athlete_id, points in rows:
+                    board.set(athlete_id, points)
+                    self._session_points[athlete_id] = points
+            self._boards["session"] = board
+
+    @staticmethod
+    def _load_period(db: Session, period: str, key: str) -> RankedBoard:
+        board = RankedBoard(key)
+        rows = db.query(LeaderboardTotal.athlete_id, LeaderboardTotal.effort_points).filter(
+            LeaderboardTotal.period == period,
+            LeaderboardTotal.period_key == key,
+        ).all()
+        for athlete_id, points in rows:
+            board.set(athlete_id, points)
+        return board
+
+    def on_points(
+        self, session_id: str, session_started_at: datetime,
+        athlete_id: str, points: float,
+    ) -> list[dict]:
+        """Учитывает новые баллы спортсмена в сессии.
+
+        Возвращает WebSocket-дельты для рейтингов, где изменилось место
+        или целое число баллов.
+        """
+        deltas = []
+        with self._lock:
+            session_board = self._boards["session"]
+            if session_board.key != session_id:
+                session_board = self._boards["session"] = RankedBoard(session_id)
+                self._session_points.clear()
+
+            increment = points - self._session_points.get(athlete_id, 0.0)
+            self._session_points[athlete_id] = points
+
+            for period in PERIODS:
+                board = self._boards[period]
+                if period == "session":
+                    new_score = points
+                else:
+                    key = period_key(period, session_started_at)
+                    if board.key != key:
+                        board = self._boards[period] = RankedBoard(key)
+                    new_score = (board.score(athlete_id) or 0.0) + increment
+                    self._dirty.add(athlete_id)
+
+                old_score = board.score(athlete_id)
+                prev_rank, rank = board.set(athlete_id, new_score)
+                if prev_rank != rank or old_score is None or int(old_score) != int(new_score):
+                    deltas.append({
+                        "type": "leaderboard_delta",
+                        "period": period,
+                        "period_key": board.key,
+                        "athlete_id": athlete_id,
+                        "effort_points": round(new_score, 1),
+                        "rank": rank,
+                        "prev_rank": prev_rank,
+                    })
+        return deltas
+
+    def flush_if_due(self, db: Session):
+        """Сохраняет недельные/месячные суммы не чаще FLUSH_INTERVAL_S."""
+        if time.monotonic() - self._last_flush < self._flush_interval_s:
+            return
+        self.flush(db)
+
+    def flush(self, db: Session):
+        """Записывает суммы изменившихся спортсменов в leaderboard_totals."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            pending = [
+                (period, self._boards[period].key, athlete_id, self._boards[period].score(athlete_id))
+                for period in ("week", "month")
+                for athlete_id in self._dirty
+                if self._boards[period].score(athlete_id) is not None
+            ]
+            self._dirty.clear()
+
+        try:
+            for period, key, athlete_id, points in pending:
+                _save_period_total(db, period, key, athlete_id, points)
+            db.commit()
+        except Exception as e:
+            _logger.error(f"Leaderboard flush error: {e}")
+            db.rollback()
+
+    def end_session(self, db: Session, session_id: str):
+        """Финальный сброс сумм и очистка рейтинга сессии."""
+        self.flush(db)
+        with self._lock:
+            if self._boards["session"].key == session_id:
+                self._boards["session"] = RankedBoard()
+                self._session_points.clear()
+
+    def rebuild_athlete(self, db: Session, athlete_id: str):
+        """Пересобирает недельные/месячные суммы спортсмена из session_totals.
+
+        Вызывается после пакетного пересчёта итогов (изменение профиля).
+        """
+        rows = (
+            db.query(TrainingSession.id, TrainingSession.started_at, TrainingSession.ended_at,
+                     SessionTotal.effort_points)
+            .join(SessionTotal, SessionTotal.session_id == TrainingSession.id)
+            .filter(SessionTotal.athlete_id == athlete_id)
+            .all()
+        )
+        sums: dict[tuple[str, str], float] = {}
+        active_points = None
+        for session_id, started_at, ended_at, points in rows:
+            for period in ("week", "month"):
+                key = (period, period_key(period, started_at))
+                sums[key] = sums.get(key, 0.0) + points
+            if ended_at is None:
+                active_points = (session_id, points)
+
+        db.query(LeaderboardTotal).filter(LeaderboardTotal.athlete_id == athlete_id).delete()
+        for (period, key), points in sums.items():
+            _save_period_total(db, period, key, athlete_id, points)
+        db.commit()
+
+        with self._lock:
+            for period in ("week", "month"):
+                board = self._boards[period]
+                points = sums.get((period, board.key))
+                if points is not None:
+                    board.set(athlete_id, points)
+            if active_points and self._boards["session"].key == active_points[0]:
+                self._boards["session"].set(athlete_id, active_points[1])
+                self._session_points[athlete_id] = active_points[1]
+
+
+def _save_period_total(db: Session, period: str, key: str, athlete_id: str, points: float):
+    """Создаёт или обновляет строку leaderboard_totals (без commit)."""
+    row = db.query(LeaderboardTotal).filter(
+        LeaderboardTotal.period == period,
+        LeaderboardTotal.period_key == key,
+        LeaderboardTotal.athlete_id == athlete_id,
+    ).first()
+    if not row:
+        row = LeaderboardTotal(period=period, period_key=key, athlete_id=athlete_id)
+        db.add(row)
+    row.effort_points = points
+
+
+def archived_top(db: Session, period: str, key: str, limit: int) -> list[tuple[str, float]]:
+    """Top-N архивного периода — по индексу (period, period_key, effort_points)."""
+    rows = (
+        db.query(LeaderboardTotal.athlete_id, LeaderboardTotal.effort_points)
+        .filter(LeaderboardTotal.period == period, LeaderboardTotal.period_key == key)
+        .order_by(LeaderboardTotal.effort_points.desc(), LeaderboardTotal.athlete_id)
+        .limit(limit)
+        .all()
+    )
+    return [(r.athlete_id, r.effort_points) for r in rows]
+
+
+def archived_count(db: Session, period: str, key: str) -> int:
+    """Число участников архивного периода."""
+    return db.query(func.count(LeaderboardTotal.id)).filter(
+        LeaderboardTotal.period == period, LeaderboardTotal.period_key == key,
+    ).scalar() or 0
+
+
+def archived_rank(db: Session, period: str, key: str, athlete_id: str) -> tuple[int | None, float | None, int]:
+    """Место спортсмена в архивном периоде: (место, баллы, всего участников)."""
+    base = db.query(LeaderboardTotal).filter(
+        LeaderboardTotal.period == period, LeaderboardTotal.period_key == key,
+    )
+    total = archived_count(db, period, key)
+    row = base.filter(LeaderboardTotal.athlete_id == athlete_id).first()
+    if not row:
+        return None, None, total
+    above = base.filter(
+        (LeaderboardTotal.effort_points > row.effort_points)
+        | ((LeaderboardTotal.effort_points == row.effort_points)
+           & (LeaderboardTotal.athlete_id < athlete_id))
+    ).with_entities(func.count(LeaderboardTotal.id)).scalar()
+    return above + 1, row.effort_points, total
+
+
+leaderboards = Leaderboards()
@@ -0,0 +1,155 @@
+"""Отслеживание живости датчиков: sensor_lost / sensor_recovered.
+
+Каждый отсчёт датчика продлевает его срок до last_seen + timeout. Сроки
+лежат в одной куче (не больше одной записи на датчик): отсчёт только
+обновляет last_seen за O(1), а когда запись всплывает, поток таймера
+либо объявляет датчик потерянным, либо кладёт её заново с настоящим
+сроком. Один поток на все датчики, без опроса БД.
+
+Потерянный датчик восстанавливается первым же отсчётом — seen()
+возвращает разрыв (последний отсчёт до потери → первый после), который
+сохраняется в sensor_gaps. Интервал между отсчётами длиннее таймаута —
+мёртвое время: расчёт зон и нагрузки его не засчитывает (services/effort.py).
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+_logger = logging.getLogger(__name__)
+
+# Через сколько секунд без отсчётов датчик считается потерянным
+SENSOR_TIMEOUT_S = float(os.environ.get("CF_SENSOR_TIMEOUT_S", "5"))
+
+
+@dataclass(frozen=True)
+class SensorGap:
+    """Разрыв данных датчика (unix-время последнего отсчёта и первого после потери)."""
+    device_id: int
+    started_at: float
+    ended_at: float
+
+    @property
+    def seconds(self) -> float:
+        return self.ended_at - self.started_at
+
+
+@dataclass
+class _Liveness:
+    last_seen: float  # monotonic
+    last_ts: float  # unix-время последнего отсчёта
+    scheduled: bool = False
+    lost: bool = False
+    gaps: int = 0
+    gap_seconds: float = 0.0
+
+
+class LivenessTracker:
+    """Сроки датчиков в куче и поток, объявляющий потерю по таймауту."""
+
+    def __init__(
+        self,
+        timeout_s: float = SENSOR_TIMEOUT_S,
+        on_lost: Optional[Callable[[int, float], None]] = None,
+    ):
+        self.timeout_s = timeout_s
+        self.on_lost = on_lost
+        self._states: dict[int, _Liveness] = {}
+        self._heap: list[tuple[float, int]] = []
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sensor-liveness")
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def seen(self, device_id: int, ts: float) -> SensorGap | None:
+        """Отсчёт датчика в ts (unix). Возвращает разрыв, если датчик был потерян."""
+        now = time.monotonic()
+        with self._cond:
+            state = self._states.get(device_id)
+            if state is None:
+                state = self._states[device_id] = _Liveness(last_seen=now, last_ts=ts)
+            gap = None
+            if state.lost:
+                gap = SensorGap(device_id, state.last_ts, ts)
+                state.lost = False
+                state.gaps += 1
+                state.gap_seconds += gap.seconds
+            state.last_seen = now
+            state.last_ts = ts
+            if not state.scheduled:
+                state.scheduled = True
+                heapq.heappush(self._heap, (now + self.timeout_s, device_id))
+                self._cond.notify()
+            return gap
+
+    def is_lost(self, device_id: int) -> bool:
+        with self._cond:
+            state = self._states.get(device_id)
+            return bool(state and state.lost)
+
+    def status(self) -> list[dict]:
+        """Состояние всех отслеживаемых датчиков."""
+        with self._cond:
+            return [
+                {
+                    "device_id": device_id,
+                    "last_seen": datetime.fromtimestamp(s.last_ts, timezone.utc),
+                    "lost": s.lost,
+                    "gaps": s.gaps,
+                    "gap_seconds": round(s.gap_seconds, 1),
+                }
+                for device_id, s in sorted(self._states.items())
+            ]
+
+    def _run(self):
+        while True:
+            lost = []
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    _, device_id = heapq.heappop(self._heap)
+                    state = self._states[device_id]
+                    deadline = state.last_seen + self.timeout_s
+                    if deadline > now:
+                        heapq.heappush(self._heap, (deadline, device_id))
+                    else:
+                        state.scheduled = False
+                        state.lost = True
+                        lost.append((device_id, state.last_ts))
+                if not lost:
+                    wait = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(wait)
+                    continue
+
+            for device_id, last_ts in lost:
+                _logger.info(f"Sensor {device_id} lost (no data for {self.timeout_s:.0f}s)")
+                if self.on_lost:
+                    try:
+                        self.on_lost(device_id, last_ts)
+                    except Exception as e:
+                        _logger.error(f"Sensor lost callback error: {e}")
+
+
+liveness = LivenessTracker()
@@ -0,0 +1,233 @@
+"""Планировщик программы тренировок на неделю или месяц.
+
+План строится поиском с возвратом по индексу каталога (services/catalog.py):
+день за днём выбирается шаблон, доступный с инвентарём зала, при жёстких
+ограничениях — шаблон не повторяется чаще, чем раз в template_gap_days дней,
+преобладающая группа мышц — чаще, чем раз в muscle_gap_days дней (с учётом
+уже проведённых WoD из истории). Среди допустимых кандидатов предпочтение
+получают темы, форматы и целевые пульсовые зоны, которые в плане пока
+представлены реже. Если ограничения невыполнимы, они последовательно
+ослабляются. Одинаковый seed даёт одинаковый план.
+"""
+
+import logging
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy.orm import Session
+
+from ..models import Wod
+from .catalog import CatalogTemplate, catalog_index
+from .wod_generator import FORMAT_TARGET_ZONES, build_wod_from_template
+
+_logger = logging.getLogger(__name__)
+
+# Ограничение перебора: узлов дерева поиска на одну попытку
+MAX_SEARCH_NODES = 20_000
+
+# Сколько лучших кандидатов пробовать на каждом дне
+BRANCH_WIDTH = 6
+
+# Веса мягких критериев (меньше — лучше)
+W_THEME = 3.0
+W_THEME_REPEAT = 4.0
+W_FORMAT = 1.0
+W_FORMAT_REPEAT = 3.0
+W_ZONE = 0.5
+W_HIGH_STREAK = 4.0
+W_MUSCLE_OVERLAP = 1.0
+
+
+@dataclass(frozen=True)
+class _Constraints:
+    template_gap_days: int
+    muscle_gap_days: int
+
+
+def _zones(template: CatalogTemplate) -> list[int]:
+    return FORMAT_TARGET_ZONES.get(template.format, [2, 3])
+
+
+def _load_history(db: Session, start: date, days_back: int) -> list[tuple[int, CatalogTemplate]]:
+    """Проведённые WoD за days_back дней до start: [(смещение дня < 0, шаблон)].
+
+    WoD, созданные до появления Wod.template_id, сопоставляются по имени.
+    """
+    if days_back <= 0:
+        return []
+    catalog = catalog_index.current
+    by_name = {t.name: t for t in catalog.templates.values()}
+    since = datetime.combine(start - timedelta(days=days_back), time.min)
+    until = datetime.combine(start, time.min)
+    rows = db.query(Wod.template_id, Wod.name, Wod.created_at).filter(
+        Wod.created_at >= since, Wod.created_at < until,
+    ).all()
+    history = []
+    for template_id, name, created_at in rows:
+        template = catalog.template(template_id) if template_id else by_name.get(name)
+        if template:
+            history.append(((created_at.date() - start).days, template))
+    return history
+
+
+class _Search:
+    """Поиск с возвратом по дням плана."""
+
+    def __init__(
+        self, days: int, candidates: dict[str, tuple[CatalogTemplate, ...]],
+        history: list[tuple[int, CatalogTemplate]], constraints: _Constraints,
+        rng: random.Random,
+    ):
+        self.days = days
+        self.candidates = candidates
+        self.themes = sorted(candidates)
+        self.constraints = constraints
+        self.rng = rng
+        self.nodes = 0
+        # Смещение дня → шаблон; история — отрицательные смещения
+        self.placed: dict[int, CatalogTemplate] = {}
+        for offset, template in history:
+            self.placed.setdefault(offset, template)
+        self.plan: list[CatalogTemplate] = []
+        self.theme_count: Counter = Counter()
+        self.format_count: Counter = Counter()
+        self.zone_count: Counter = Counter()
+
+    def _allowed(self, day: int, template: CatalogTemplate) -> bool:
+        c = self.constraints
+        for offset in range(day - max(c.template_gap_days, c.muscle_gap_days), day):
+            other = self.placed.get(offset)
+            if other is None:
+                continue
+            if day - offset <= c.template_gap_days and other.id == template.id:
+                return False
+            if (day - offset <= c.muscle_gap_days
+                    and other.primary_muscle == template.primary_muscle):
+                return False
+        return True
+
+    def _score(self, day: int, template: CatalogTemplate) -> float:
+        prev = self.placed.get(day - 1)
+        prev2 = self.placed.get(day - 2)
+        # Доля темы в плане относительно равномерного распределения
+        score = W_THEME * self.theme_count[template.theme] * len(self.themes) / max(day + 1, 1)
+        score += W_FORMAT * self.format_count[template.format]
+        score += W_ZONE * sum(self.zone_count[z] for z in _zones(template))
+        if prev is not None:
+            if prev.theme == template.theme:
+                score += W_THEME_REPEAT
+            if prev.format == template.format:
+                score += W_FORMAT_REPEAT
+            score += W_MUSCLE_OVERLAP * len(prev.muscle_groups & template.muscle_groups - {"full_body"})
+            # Третий подряд день с выходом в 4-ю зону
+            if prev2 is not None and 4 in _zones(template) and 4 in _zones(prev) and 4 in _zones(prev2):
+                score += W_HIGH_STREAK
+        return score + self.rng.random()
+
+    def _place(self, day: int, template: CatalogTemplate):
+        self.placed[day] = template
+        self.plan.append(template)
+        self.theme_count[template.theme] += 1
+        self.format_count[template.format] += 1
+        self.zone_count.update(_zones(template))
+
+    def _unplace(self, day: int):
+        template = self.placed.pop(day)
+        self.plan.pop()
+        self.theme_count[template.theme] -= 1
+        self.format_count[template.format] -= 1
+        self.zone_count.subtract(_zones(template))
+
+    def run(self, day: int = 0) -> bool:
+        if day == self.days:
+            return True
+        self.nodes += 1
+        if self.nodes > MAX_SEARCH_NODES:
+            return False
+
+        scored = [
+            (self._score(day, t), t.id, t)
+            for theme in self.themes
+            for t in self.candidates[theme]
+            if self._allowed(day, t)
+        ]
+        scored.sort(key=lambda x: (x[0], x[1]))
+        for _, _, template in scored[:BRANCH_WIDTH]:
+            self._place(day, template)
+            if self.run(day + 1):
+                return True
+            self._unplace(day)
+            if self.nodes > MAX_SEARCH_NODES:
+                return False
+        return False
+
+
+def _relaxations(template_gap_days: int, muscle_gap_days: int) -> list[_Constraints]:
+    """Ограничения от заданных до полностью снятых."""
+    steps = [_Constraints(template_gap_days, muscle_gap_days)]
+    if muscle_gap_days:
+        steps.append(_Constraints(template_gap_days, 0))
+    gap = template_gap_days
+    while gap > 0:
+        gap //= 2
+        steps.append(_Constraints(gap, 0))
+    return steps
+
+
+def plan_program(
+    db: Session,
+    start: date,
+    days: int,
+    group_level: str = "intermediate",
+    seed: int | None = None,
+    themes: list[str] | None = None,
+    template_gap_days: int = 14,
+    muscle_gap_days: int = 1,
+) -> dict:
+    """Строит план тренировок на days дней начиная с start.
+
+    Возвращает словарь с seed (для воспроизведения), фактически
+    применёнными ограничениями и WoD на каждый день.
+    """
+    if seed is None:
+        seed = random.randrange(2**31)
+
+    candidates = {
+        theme: catalog_index.feasible(theme)
+        for theme in (themes or catalog_index.current.by_theme.keys())
+    }
+    candidates = {theme: ts for theme, ts in candidates.items() if ts}
+    if not candidates:
+        _logger.warning(f"No suitable templates for plan (themes={themes})")
+        return {"seed": seed, "start_date": start, "days": []}
+
+    history = _load_history(db, start, max(template_gap_days, muscle_gap_days))
+
+    search = None
+    for constraints in _relaxations(template_gap_days, muscle_gap_days):
+        search = _Search(days, candidates, history, constraints, random.Random(seed))
+        if search.run():
+            break
+        _logger.info(
+            f"Plan search failed with template_gap={constraints.template_gap_days}, "
+            f"muscle_gap={constraints.muscle_gap_days} ({search.nodes} nodes), relaxing"
+        )
+    else:
+        return {"seed": seed, "start_date": start, "days": []}
+
+    catalog = catalog_index.current
+    return {
+        "seed": seed,
+        "start_date": start,
+        "template_gap_days": constraints.template_gap_days,
+        "muscle_gap_days": constraints.muscle_gap_days,
+        "days": [
+            {
+                "date": start + timedelta(days=i),
+                **build_wod_from_template(template, group_level, catalog),
+            }
+            for i, template in enumerate(search.plan)
+        ],
+    }
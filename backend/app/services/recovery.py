@@ -0,0 +1,184 @@
+"""Восстановление ЧСС после нагрузки (HRR60) — детекция в живом потоке.
+
+RecoveryTracker держит для каждого спортсмена короткий буфер отсчётов
+(последние BUFFER_S секунд). Конец усилия фиксируется тремя способами:
+завершение активного WoD, завершение сессии или устойчивое падение ЧСС
+после длительной работы выше 80% max_hr. Через 60 с после конца усилия
+окно берётся из буфера, и метрики сохраняются в hr_recoveries — без
+последующих сканирований hr_readings.
+"""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from ..models import HrRecovery
+
+_logger = logging.getLogger(__name__)
+
+# Глубина буфера отсчётов на спортсмена (сек)
+BUFFER_S = 180.0
+
+# Пик в конце усилия ищется в этом окне перед моментом окончания (сек)
+END_WINDOW_S = 10.0
+
+# Допустимое отклонение отсчёта от точки +30/+60 с (сек)
+SAMPLE_TOLERANCE_S = 5.0
+
+# Захват без данных дольше этого времени после окончания считается брошенным (сек)
+CAPTURE_TIMEOUT_S = 90.0
+
+# Отсчёты старше этого не считаются «текущими» при ручном триггере (сек)
+ACTIVE_WINDOW_S = 10.0
+
+# Автодетекция: работа выше EFFORT_PCT не меньше MIN_EFFORT_S и падение на DROP_BPM
+EFFORT_PCT = 80
+MIN_EFFORT_S = 120.0
+DROP_BPM = 20
+BOUT_GAP_S = 30.0
+
+
+@dataclass
+class _Capture:
+    trigger: str
+    end_ts: float
+    session_id: str | None
+    wod_id: str | None
+
+
+@dataclass
+class _AthleteBuffer:
+    session_id: str | None = None
+    samples: deque = field(default_factory=deque)
+    bout_start: float | None = None
+    peak_hr: int = 0
+    peak_ts: float = 0.0
+    below_since: float | None = None
+    pending: _Capture | None = None
+
+
+def _nearest(samples, target: float) -> int | None:
+    """ЧСС отсчёта, ближайшего к target (в пределах SAMPLE_TOLERANCE_S)."""
+    best = None
+    for ts, hr in samples:
+        diff = abs(ts - target)
+        if diff <= SAMPLE_TOLERANCE_S and (best is None or diff < best[0]):
+            best = (diff, hr)
+    return best[1] if best else None
+
+
+class RecoveryTracker:
+    """Детектор конца усилия и захват окна восстановления ЧСС."""
+
+    def __init__(self):
+        self._buffers: dict[str, _AthleteBuffer] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self, athlete_id: str, session_id: str | None,
+        hr: int, ts: float, max_hr: int,
+    ) -> list[dict]:
+        """Добавляет отсчёт; возвращает завершённые замеры восстановления."""
+        with self._lock:
+            buf = self._buffers.setdefault(athlete_id, _AthleteBuffer())
+            buf.session_id = session_id
+            buf.samples.append((ts, hr))
+            while buf.samples and buf.samples[0][0] < ts - BUFFER_S:
+                buf.samples.popleft()
+
+            self._detect_drop(buf, hr, ts, max_hr)
+
+            capture = buf.pending
+            if capture is None:
+                return []
+            if ts < capture.end_ts + 60:
+                return []
+            buf.pending = None
+            result = self._measure(athlete_id, buf, capture)
+            return [result] if result else []
+
+    def _detect_drop(self, buf: _AthleteBuffer, hr: int, ts: float, max_hr: int):
+        """Автодетекция конца усилия по устойчивому падению ЧСС."""
+        if hr / max_hr * 100 > EFFORT_PCT:
+            if buf.bout_start is None:
+                buf.bout_start = ts
+                buf.peak_hr, buf.peak_ts = hr, ts
+            elif hr >= buf.peak_hr:
+                buf.peak_hr, buf.peak_ts = hr, ts
+            buf.below_since = None
+            return
+
+        if buf.bout_start is None:
+            return
+        if buf.below_since is None:
+            buf.below_since = ts
+
+        sustained = buf.peak_ts - buf.bout_start >= MIN_EFFORT_S
+        if sustained and buf.peak_hr - hr >= DROP_BPM and buf.pending is None:
+            buf.pending = _Capture("hr_drop", buf.peak_ts, buf.session_id, None)
+            buf.bout_start = None
+        elif ts - buf.below_since > BOUT_GAP_S:
+            buf.bout_start = None
+
+    @staticmethod
+    def _measure(athlete_id: str, buf: _AthleteBuffer, capture: _Capture) -> dict | None:
+        end_samples = [
+            hr for ts, hr in buf.samples
+            if capture.end_ts - END_WINDOW_S <= ts <= capture.end_ts
+        ]
+        hr_60 = _nearest(buf.samples, capture.end_ts + 60)
+        if not end_samples or hr_60 is None:
+            _logger.info(f"HRR capture for athlete {athlete_id} dropped: not enough samples")
+            return None
+
+        hr_end = max(end_samples)
+        hr_30 = _nearest(buf.samples, capture.end_ts + 30)
+        return {
+            "athlete_id": athlete_id,
+            "session_id": capture.session_id,
+            "wod_id": capture.wod_id,
+            "trigger": capture.trigger,
+            "ended_at": datetime.fromtimestamp(capture.end_ts, timezone.utc),
+            "hr_end": hr_end,
+            "hr_30": hr_30,
+            "hr_60": hr_60,
+            "hrr30": hr_end - hr_30 if hr_30 is not None else None,
+            "hrr60": hr_end - hr_60,
+        }
+
+    def trigger(
+        self, trigger: str, ts: float,
+        session_id: str | None = None, wod_id: str | None = None,
+    ) -> int:
+        """Фиксирует конец усилия для всех спортсменов с текущими данными.
+
+        session_id ограничивает триггер участниками этой сессии.
+        Возвращает число начатых захватов.
+        """
+        started = 0
+        with self._lock:
+            for buf in self._buffers.values():
+                if not buf.samples or ts - buf.samples[-1][0] > ACTIVE_WINDOW_S:
+                    continue
+                if session_id is not None and buf.session_id != session_id:
+                    continue
+                if buf.pending is not None and ts - buf.pending.end_ts <= CAPTURE_TIMEOUT_S:
+                    continue
+                buf.pending = _Capture(trigger, ts, buf.session_id, wod_id)
+                buf.bout_start = None
+                started += 1
+        return started
+
+
+def save_recovery(db: Session, result: dict) -> HrRecovery:
+    """Сохраняет замер восстановления (без commit)."""
+    row = HrRecovery(**result)
+    db.add(row)
+    return row
+
+
+recovery_tracker = RecoveryTracker()
@@ -0,0 +1,123 @@
+"""Воспроизведение записи страниц ANT+ (services/ant_recording.py).
+
+ReplayCollector — замена AntCollector/MockCollector с тем же интерфейсом
+(start/stop, on_hr_data, on_new_sensor). Страницы проходят тот же путь
+обработки, что и в AntCollector, с записанным временем приёма, поэтому
+один и тот же лог даёт один и тот же поток данных — его можно
+использовать как воспроизводимый нагрузочный тест всего бэкенда.
+
+Скорость: 1 — в реальном времени, N — в N раз быстрее, 0 — без пауз.
+Запускается через env CF_ANT_REPLAY=<файл> (CF_ANT_REPLAY_SPEED).
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from .ant_collector import AntCollector
+from .ant_recording import read_pages
+from .rf_quality import RfQuality
+
+_logger = logging.getLogger(__name__)
+
+# Максимальная пауза между страницами (стыки сеансов записи в одном файле)
+MAX_GAP_S = 10.0
+
+
+class ReplayCollector(AntCollector):
+    """Воспроизводит лог страниц ANT+ в отдельном потоке."""
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 1.0,
+        loop: bool = False,
+        on_hr_data: Optional[Callable] = None,
+        on_new_sensor: Optional[Callable] = None,
+        on_sensor_quality: Optional[Callable] = None,
+    ):
+        super().__init__(
+            on_hr_data=on_hr_data, on_new_sensor=on_new_sensor,
+            on_sensor_quality=on_sensor_quality,
+        )
+        self._path = path
+        self._speed = speed
+        self._loop = loop
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._log_time = 0.0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._refresh_sensors()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ant-replay")
+        self._thread.start()
+        _logger.info(f"Replay collector started ({self._path}, speed {self._speed or 'max'})")
+
+    def stop(self):
+        self._running = False
+        self._stop_event.set()
+        _logger.info("Replay collector stopped")
+
+    def _run(self):
+        try:
+            while self._running:
+                self._replay_once()
+                if not self._loop:
+                    break
+                self._reset_replay_state()
+        except Exception as e:
+            _logger.error(f"Replay error: {e}")
+        self._running = False
+
+    def _replay_once(self):
+        """Один проход по логу: датчик → свой слот, паузы по записанному времени."""
+        slots: dict[int, int] = {}
+        # Время лога, приведённое к непрерывной шкале, и момент начала прохода
+        log_time = 0.0
+        prev_ts: float | None = None
+        wall_start = time.monotonic()
+        pages = 0
+        self._started = 0.0
+        # Время ударов — шкала записи от момента начала прохода
+        self._wall_offset = time.time()
+        for ts, device_id, data in read_pages(self._path):
+            if not self._running:
+                return
+            if prev_ts is not None:
+                log_time += min(max(ts - prev_ts, 0.0), MAX_GAP_S)
+            prev_ts = ts
+            if self._speed > 0:
+                delay = wall_start + log_time / self._speed - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    return
+
+            slot = slots.get(device_id)
+            if slot is None:
+                slot = slots[device_id] = len(slots)
+                self._handle_found(slot, device_id)
+            self._log_time = log_time
+            self._handle_page(slot, log_time, data)
+            self._report_quality(log_time)
+            pages += 1
+        _logger.info(
+            f"Replay finished: {pages} pages, {len(slots)} sensors, "
+            f"{log_time:.0f}s of recording in {time.monotonic() - wall_start:.1f}s"
+        )
+
+    def _reset_replay_state(self):
+        """Сбрасывает привязки перед повтором лога."""
+        self._owners.clear()
+        self._slot_device.clear()
+        self._beats.clear()
+        self._sensor_written.clear()
+        self._first_reading.clear()
+        self._quality = RfQuality()
+        self._next_quality = 0.0
+
+    def _clock(self) -> float:
+        return self._log_time
@@ -0,0 +1,128 @@
+"""Качество радиоприёма по датчикам: темп страниц, потери, гистограмма пауз.
+
+Датчик ЧСС шлёт страницу каждые HRM_PAGE_PERIOD_S (~4 в секунду), поэтому
+по паузе между принятыми страницами видно, сколько страниц потеряно:
+round(пауза / период) - 1. Пауза длиннее DROPOUT_S — выпадение (датчик
+вне зоны или снят), потерянными страницами она не считается, только
+попадает в последнюю корзину гистограммы.
+
+Все счётчики обновляются за O(1) на страницу в потоке диспетчера
+коллектора. Раз в REPORT_INTERVAL_S коллектор закрывает текущий период —
+темп и потери за период показывают, что происходит сейчас, а счётчики
+с запуска — общую картину. Вместе с номером стика и канала это позволяет
+выбрать, куда ставить стики и удлинитель.
+"""
+
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+
+from .ant_hardware import HRM_PAGE_PERIOD_S
+
+# Границы корзин гистограммы пауз между страницами (мс): последняя корзина —
+# паузы от GAP_BUCKETS_MS[-1] и дольше
+GAP_BUCKETS_MS = (300, 600, 1000, 2000, 5000)
+
+# Пауза дольше — выпадение датчика, а не потерянные страницы (сек)
+DROPOUT_S = 10.0
+
+# Период отчёта о качестве (сек)
+REPORT_INTERVAL_S = 5.0
+
+# Батарея не передаётся
+NO_BATTERY = 0xFF
+
+
+@dataclass
+class _SensorQuality:
+    stick: int
+    channel: int
+    first_page: float
+    last_page: float
+    battery: int | None = None
+    pages: int = 0
+    missed: int = 0
+    dropouts: int = 0
+    gaps: list = field(default_factory=lambda: [0] * (len(GAP_BUCKETS_MS) + 1))
+    # Текущий период и последний закрытый
+    period_start: float = 0.0
+    period_pages: int = 0
+    period_missed: int = 0
+    rate_hz: float | None = None
+    recent_loss: float | None = None
+
+
+def _loss(pages: int, missed: int) -> float | None:
+    total = pages + missed
+    return missed / total if total else None
+
+
+class RfQuality:
+    """Счётчики качества приёма по всем датчикам коллектора."""
+
+    def __init__(self, page_period_s: float = HRM_PAGE_PERIOD_S):
+        self._period_s = page_period_s
+        self._sensors: dict[int, _SensorQuality] = {}
+        self._lock = threading.Lock()
+
+    def on_page(self, device_id: int, stick: int, channel: int, ts: float, battery: int):
+        """Принятая страница датчика; ts — monotonic-время приёма."""
+        with self._lock:
+            q = self._sensors.get(device_id)
+            if q is None:
+                q = self._sensors[device_id] = _SensorQuality(stick, channel, ts, ts, period_start=ts)
+            else:
+                gap = ts - q.last_page
+                q.gaps[bisect_right(GAP_BUCKETS_MS, gap * 1000)] += 1
+                if gap > DROPOUT_S:
+                    q.dropouts += 1
+                else:
+                    missed = max(round(gap / self._period_s) - 1, 0)
+                    q.missed += missed
+                    q.period_missed += missed
+            q.stick, q.channel = stick, channel
+            q.last_page = ts
+            q.pages += 1
+            q.period_pages += 1
+            if battery != NO_BATTERY:
+                q.battery = battery
+
+    def roll(self, now: float):
+        """Закрывает текущий период: темп и потери за период."""
+        with self._lock:
+            for q in self._sensors.values():
+                elapsed = now - q.period_start
+                if elapsed <= 0:
+                    continue
+                q.rate_hz = q.period_pages / elapsed
+                q.recent_loss = _loss(q.period_pages, q.period_missed)
+                q.period_start = now
+                q.period_pages = 0
+                q.period_missed = 0
+
+    def snapshot(self, now: float) -> list[dict]:
+        """Качество приёма по датчикам (now — monotonic)."""
+        with self._lock:
+            items = sorted(self._sensors.items())
+            return [
+                {
+                    "device_id": device_id,
+                    "stick": q.stick,
+                    "channel": q.channel,
+                    "battery": q.battery,
+                    "pages": q.pages,
+                    "missed": q.missed,
+                    "loss_pct": _pct(_loss(q.pages, q.missed)),
+                    "page_rate_hz": round(q.rate_hz, 2) if q.rate_hz is not None else None,
+                    "expected_rate_hz": round(1 / self._period_s, 2),
+                    "recent_loss_pct": _pct(q.recent_loss),
+                    "dropouts": q.dropouts,
+                    "gap_histogram": list(q.gaps),
+                    "last_page_s": round(now - q.last_page, 1),
+                }
+                for device_id, q in items
+            ]
+
+
+def _pct(value: float | None) -> float | None:
+    return round(value * 100, 1) if value is not None else None
@@ -0,0 +1,206 @@
+"""Поиск по каталогу движений и шаблонов — инвертированный индекс в памяти.
+
+Документы — движения и шаблоны из снимка каталога (services/catalog.py).
+Текстовые поля (русские/английские названия, ключи движений) разбиваются
+на токены, каждый токен индексируется всеми префиксами от MIN_PREFIX
+символов — поиск работает по мере набора. Фасетные поля (тип, тема,
+формат, инвентарь, сложность...) индексируются как точные значения
+"поле:значение". Запрос — пересечение множеств, фасетные счётчики
+считаются по найденным документам.
+
+Индекс строится из текущего снимка каталога и автоматически
+пересобирается, когда снимок подменяется.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .catalog import Catalog, catalog_index
+
+_logger = logging.getLogger(__name__)
+
+# Минимальная длина индексируемого префикса
+MIN_PREFIX = 2
+
+FACETS = ("type", "theme", "format", "intensity", "equipment", "difficulty", "modality", "muscle_group")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Токены в нижнем регистре; ключи вида pull_up дают pull_up, pull, up."""
+    if not text:
+        return []
+    text = text.lower().replace("ё", "е")
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(t for t in token.split("_") if t)
+    return tokens
+
+
+@dataclass
+class _Doc:
+    type: str
+    id: str
+    name: str
+    payload: dict
+    facets: dict[str, set[str]] = field(default_factory=dict)
+
+
+class SearchIndex:
+    """Неизменяемый после построения индекс одного снимка каталога."""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self._docs: list[_Doc] = []
+        # Префикс токена → номера документов; отдельно — для названий (для ранжирования)
+        self._text: dict[str, set[int]] = {}
+        self._names: dict[str, set[int]] = {}
+        # "поле:значение" → номера документов
+        self._facets: dict[str, set[int]] = {}
+        self._build()
+
+    def _add(self, doc: _Doc, name_text: list[str], other_text: list[str]):
+        n = len(self._docs)
+        self._docs.append(doc)
+        for index, texts in ((self._names, name_text), (self._text, name_text + other_text)):
+            for text in texts:
+                for token in tokenize(text):
+                    for end in range(min(MIN_PREFIX, len(token)), len(token) + 1):
+                        index.setdefault(token[:end], set()).add(n)
+        for facet, values in doc.facets.items():
+            for value in values:
+                self._facets.setdefault(f"{facet}:{value}", set()).add(n)
+
+    def _build(self):
+        catalog = self.catalog
+        for mv in sorted(catalog.movements.values(), key=lambda m: m.name):
+            self._add(
+                _Doc("movement", mv.key, mv.name, {
+                    "type": "movement",
+                    "id": mv.key,
+                    "name": mv.name,
+                    "modality": mv.modality,
+                    "muscle_group": mv.muscle_group,
+                    "difficulty": mv.difficulty,
+                    "themes": sorted(mv.themes),
+                    "equipment": sorted(mv.equipment),
+                }, {
+                    "type": {"movement"},
+                    "theme": set(mv.themes),
+                    "equipment": set(mv.equipment),
+                    "difficulty": {mv.difficulty},
+                    "modality": {mv.modality},
+                    "muscle_group": {mv.muscle_group},
+                }),
+                [mv.name, mv.key],
+                [],
+            )
+        for t in sorted(catalog.templates.values(), key=lambda t: t.name):
+            movements = [catalog.movement(tm.movement_key) for tm in t.movements]
+            self._add(
+                _Doc("template", t.id, t.name, {
+                    "type": "template",
+                    "id": t.id,
+                    "name": t.name,
+                    "format": t.format,
+                    "theme": t.theme,
+                    "intensity": t.intensity,
+                    "duration_min": t.duration_min,
+                    "is_benchmark": t.is_benchmark,
+                    "movements": [tm.movement_key for tm in t.movements],
+                    "equipment": sorted(t.equipment),
+                }, {
+                    "type": {"template"},
+                    "theme": {t.theme},
+                    "format": {t.format},
+                    "intensity": {t.intensity},
+                    "equipment": set(t.equipment),
+                    "difficulty": {mv.difficulty for mv in movements if mv},
+                    "modality": {mv.modality for mv in movements if mv},
+                    "muscle_group": set(t.muscle_groups),
+                }),
+                [t.name],
+                [t.description or "", t.theme, t.format]
+                + [tm.movement_key for tm in t.movements]
+                + [tm.movement_name for tm in t.movements]
+                + [mv.name for mv in movements if mv],
+            )
+
+    def search(
+        self, q: str = "", filters: dict[str, list[str]] | None = None,
+        feasible_only: bool = False, limit: int = 20, offset: int = 0,
+    ) -> dict:
+        """Поиск: все токены q (как префиксы) и все фильтры (значения в фасете — ИЛИ)."""
+        matched: set[int] | None = None
+        tokens = tokenize(q)
+        for token in tokens:
+            postings = self._text.get(token, set())
+            matched = set(postings) if matched is None else matched & postings
+            if not matched:
+                break
+        for facet, values in (filters or {}).items():
+            if not values:
+                continue
+            postings = set().union(*(self._facets.get(f"{facet}:{v}", set()) for v in values))
+            matched = postings if matched is None else matched & postings
+        if matched is None:
+            matched = set(range(len(self._docs)))
+        if feasible_only:
+            matched = {
+                n for n in matched
+                if self._docs[n].type != "template"
+                or catalog_index.is_feasible(self.catalog.templates[self._docs[n].id])
+            }
+
+        # Совпадение по названию выше, затем по алфавиту (порядок построения)
+        name_hits = sum((Counter(self._names.get(t, ())) for t in tokens), Counter())
+        ranked = sorted(matched, key=lambda n: (-name_hits[n], n))
+
+        facets: dict[str, Counter] = {f: Counter() for f in FACETS}
+        for n in matched:
+            for facet, values in self._docs[n].facets.items():
+                facets[facet].update(values)
+
+        return {
+            "total": len(ranked),
+            "items": [self._docs[n].payload for n in ranked[offset:offset + limit]],
+            "facets": {f: dict(c.most_common()) for f, c in facets.items() if c},
+        }
+
+
+class SearchService:
+    """Держатель индекса: пересобирает его, когда меняется снимок каталога."""
+
+    def __init__(self):
+        self._index: SearchIndex | None = None
+        self._lock = threading.Lock()
+
+    def current(self) -> SearchIndex:
+        """Индекс текущего снимка каталога (строится при первом обращении)."""
+        catalog = catalog_index.current
+        index = self._index
+        if index is None or index.catalog is not catalog:
+            with self._lock:
+                index = self._index
+                if index is None or index.catalog is not catalog:
+                    started = time.perf_counter()
+                    index = SearchIndex(catalog)
+                    self._index = index
+                    _logger.info(
+                        f"Search index built: {len(index._docs)} docs, {len(index._text)} "
+                        f"prefixes in {(time.perf_counter() - started) * 1000:.1f} ms"
+                    )
+        return index
+
+    def search(self, *args, **kwargs) -> dict:
+        return self.current().search(*args, **kwargs)
+
+
+search_service = SearchService()
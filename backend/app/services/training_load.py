@@ -0,0 +1,200 @@
+"""Тренировочная нагрузка: острая/хроническая EWMA по Banister TRIMP.
+
+TRIMP сессии считает EffortEngine (session_totals.trimp). Здесь дневные
+нагрузки сворачиваются в экспоненциальные средние — острую (7 дней) и
+хроническую (28 дней). Состояние спортсмена хранится в training_loads,
+поэтому завершение сессии — O(1) обновление без пересчёта истории.
+Соотношение острой к хронической (ACWR) выше AT_RISK_ACWR — признак
+перегрузки.
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Athlete, SessionTotal, TrainingLoad, TrainingLoadDay, Session as TrainingSession,
+)
+
+_logger = logging.getLogger(__name__)
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+_ACUTE_ALPHA = 2 / (ACUTE_DAYS + 1)
+_CHRONIC_ALPHA = 2 / (CHRONIC_DAYS + 1)
+
+# ACWR выше этого значения — зона риска перетренированности
+AT_RISK_ACWR = 1.5
+
+# Минимальная хроническая нагрузка, при которой ACWR имеет смысл
+MIN_CHRONIC_LOAD = 5.0
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _advance(acute: float, chronic: float, days: int) -> tuple[float, float]:
+    """Затухание EWMA на days дней без нагрузки."""
+    if days <= 0:
+        return acute, chronic
+    return acute * (1 - _ACUTE_ALPHA) ** days, chronic * (1 - _CHRONIC_ALPHA) ** days
+
+
+def acwr(acute: float, chronic: float) -> float | None:
+    """Acute:Chronic Workload Ratio или None при малой хронической нагрузке."""
+    if chronic < MIN_CHRONIC_LOAD:
+        return None
+    return acute / chronic
+
+
+def current_load(state: TrainingLoad, today: date | None = None) -> tuple[float, float]:
+    """Острая и хроническая нагрузка, приведённые к сегодняшнему дню."""
+    today = today or _today()
+    return _advance(state.acute, state.chronic, (today - state.last_day).days)
+
+
+def _add_day_load(db: Session, athlete_id: str, day: date, load: float):
+    """O(1) обновление состояния спортсмена дневной нагрузкой (без commit)."""
+    state = db.query(TrainingLoad).filter(TrainingLoad.athlete_id == athlete_id).first()
+    if state and day < state.last_day:
+        # Сессия задним числом — дешевле пересобрать историю спортсмена
+        rebuild_athlete(db, athlete_id)
+        return
+
+    if not state:
+        state = TrainingLoad(athlete_id=athlete_id, acute=0.0, chronic=0.0, last_day=day)
+        db.add(state)
+    acute, chronic = _advance(state.acute, state.chronic, (day - state.last_day).days)
+    state.acute = acute + _ACUTE_ALPHA * load
+    state.chronic = chronic + _CHRONIC_ALPHA * load
+    state.last_day = day
+
+    point = db.query(TrainingLoadDay).filter(
+        TrainingLoadDay.athlete_id == athlete_id, TrainingLoadDay.day == day,
+    ).first()
+    if not point:
+        point = TrainingLoadDay(athlete_id=athlete_id, day=day, load=0.0)
+        db.add(point)
+    point.load += load
+    point.acute = state.acute
+    point.chronic = state.chronic
+
+
+def record_session(db: Session, session_id: str):
+    """Учитывает TRIMP завершённой сессии в нагрузке всех её участников."""
+    session = db.query(TrainingSession).filter(TrainingSession.id == session_id).first()
+    if not session:
+        return
+    day = session.started_at.date()
+    rows = db.query(SessionTotal.athlete_id, SessionTotal.trimp).filter(
+        SessionTotal.session_id == session_id
+    ).all()
+    try:
+        for athlete_id, trimp in rows:
+            _add_day_load(db, athlete_id, day, trimp)
+        db.commit()
+    except Exception as e:
+        _logger.error(f"Training load update error: {e}")
+        db.rollback()
+
+
+def rebuild_athlete(db: Session, athlete_id: str):
+    """Пересобирает кривую нагрузки спортсмена из session_totals (без commit).
+
+    Нужна после пересчёта TRIMP (изменился профиль) или сессии задним числом.
+    """
+    rows = (
+        db.query(func.date(TrainingSession.started_at), func.sum(SessionTotal.trimp))
+        .join(SessionTotal, SessionTotal.session_id == TrainingSession.id)
+        .filter(SessionTotal.athlete_id == athlete_id, TrainingSession.ended_at.isnot(None))
+        .group_by(func.date(TrainingSession.started_at))
+        .order_by(func.date(TrainingSession.started_at))
+        .all()
+    )
+
+    db.query(TrainingLoadDay).filter(TrainingLoadDay.athlete_id == athlete_id).delete()
+    db.query(TrainingLoad).filter(TrainingLoad.athlete_id == athlete_id).delete()
+    if not rows:
+        return
+
+    acute = chronic = 0.0
+    last_day = None
+    for day_str, load in rows:
+        day = date.fromisoformat(day_str)
+        if last_day is not None:
+            acute, chronic = _advance(acute, chronic, (day - last_day).days)
+        acute += _ACUTE_ALPHA * load
+        chronic += _CHRONIC_ALPHA * load
+        last_day = day
+        db.add(TrainingLoadDay(
+            athlete_id=athlete_id, day=day, load=load, acute=acute, chronic=chronic,
+        ))
+    db.add(TrainingLoad(athlete_id=athlete_id, acute=acute, chronic=chronic, last_day=last_day))
+
+
+def load_curve(db: Session, athlete_id: str, days: int = 56) -> list[dict]:
+    """Дневная кривая нагрузки за последние days дней (дни отдыха — затухание)."""
+    today = _today()
+    start = today - timedelta(days=days - 1)
+
+    before = (
+        db.query(TrainingLoadDay)
+        .filter(TrainingLoadDay.athlete_id == athlete_id, TrainingLoadDay.day < start)
+        .order_by(TrainingLoadDay.day.desc())
+        .first()
+    )
+    points = {
+        p.day: p for p in db.query(TrainingLoadDay).filter(
+            TrainingLoadDay.athlete_id == athlete_id, TrainingLoadDay.day >= start,
+        ).all()
+    }
+
+    acute, chronic = (before.acute, before.chronic) if before else (0.0, 0.0)
+    prev_day = before.day if before else start - timedelta(days=1)
+    result = []
+    day = start
+    while day <= today:
+        point = points.get(day)
+        if point:
+            acute, chronic, load = point.acute, point.chronic, point.load
+        else:
+            acute, chronic = _advance(acute, chronic, (day - prev_day).days)
+            load = 0.0
+        prev_day = day
+        ratio = acwr(acute, chronic)
+        result.append({
+            "day": day,
+            "load": round(load, 1),
+            "acute": round(acute, 1),
+            "chronic": round(chronic, 1),
+            "acwr": round(ratio, 2) if ratio is not None else None,
+        })
+        day += timedelta(days=1)
+    return result
+
+
+def at_risk(db: Session, threshold: float = AT_RISK_ACWR) -> list[dict]:
+    """Спортсмены с ACWR выше порога, по убыванию ACWR."""
+    today = _today()
+    rows = db.query(TrainingLoad, Athlete.name).join(
+        Athlete, Athlete.id == TrainingLoad.athlete_id
+    ).all()
+
+    result = []
+    for state, name in rows:
+        acute, chronic = current_load(state, today)
+        ratio = acwr(acute, chronic)
+        if ratio is not None and ratio > threshold:
+            result.append({
+                "athlete_id": state.athlete_id,
+                "athlete_name": name,
+                "acute": round(acute, 1),
+                "chronic": round(chronic, 1),
+                "acwr": round(ratio, 2),
+            })
+    result.sort(key=lambda r: r["acwr"], reverse=True)
+    return result
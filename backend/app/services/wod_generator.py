@@ -1,22 +1,24 @@
 """Генератор тренировок — подбирает 3 варианта WoD по теме и инвентарю.
 
 Алгоритм:
-1. Получить доступный инвентарь зала
-2. Отфильтровать шаблоны по теме
-3. Проверить, что все движения шаблона доступны с имеющимся инвентарём
-4. Выбрать 3 варианта: бенчмарк / сбалансированный / высокоинтенсивный
-5. Отскалировать повторения по уровню группы
+1. Взять из индекса каталога шаблоны темы, выполнимые с инвентарём зала
+   (битовые маски, см. services/catalog.py)
+2. Выбрать 3 варианта: бенчмарк / сбалансированный / высокоинтенсивный
+3. Отскалировать повторения по уровню группы
 """
 
+import math
 import random
 import logging
+import uuid
+from datetime import datetime, timezone
 
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
-from ..models import (
-    WodTemplate, WodTemplateMovement,
-    Movement, GymInventory, Wod, WodMovement,
-)
+from ..models import Wod, WodMovement
+from .catalog import Catalog, CatalogTemplate, catalog_index
+from .zone_profiles import zone_profiles
 
 _logger = logging.getLogger(__name__)
 
@@ -65,29 +67,6 @@ LEVEL_NAMES = {
 }
 
 
-def _get_available_equipment_keys(db: Session) -> set[str]:
-    """Возвращает множество ключей инвентаря, доступного в зале."""
-    items = db.query(GymInventory).all()
-    return {item.equipment_key for item in items}
-
-
-def _template_has_equipment(
-    db: Session, template: WodTemplate, available: set[str]
-) -> bool:
-    """Проверяет, что все движения шаблона доступны с имеющимся инвентарём."""
-    movements = db.query(WodTemplateMovement).filter(
-        WodTemplateMovement.template_id == template.id
-    ).all()
-
-    for tm in movements:
-        mv = db.query(Movement).filter(Movement.key == tm.movement_key).first()
-        if mv and mv.equipment_keys:
-            needed = {k.strip() for k in mv.equipment_keys.split(",") if k.strip()}
-            if not needed.issubset(available):
-                return False
-    return True
-
-
 def _scale_reps(reps: int | None, level: str) -> int | None:
     """Масштабирует количество повторений по уровню группы."""
     if reps is None:
@@ -108,30 +87,21 @@ def _scale_weight(weight: int | None, level: str) -> int | None:
     return int(rounded) if rounded == int(rounded) else int(rounded)
 
 
-def _get_scaling_note(movement_key: str, level: str, db: Session) -> str | None:
+def _get_scaling_note(movement_key: str, level: str, catalog: Catalog) -> str | None:
     """Возвращает текстовое описание скалирования для движения."""
-    mv = db.query(Movement).filter(Movement.key == movement_key).first()
-    if not mv:
-        return None
-    if level == "beginner" and mv.scaling_beginner:
-        return mv.scaling_beginner
-    if level == "intermediate" and mv.scaling_intermediate:
-        return mv.scaling_intermediate
-    return None
+    mv = catalog.movement(movement_key)
+    return mv.scaling_note(level) if mv else None
 
 
-def _build_wod_from_template(
-    template: WodTemplate,
+def build_wod_from_template(
+    template: CatalogTemplate,
     level: str,
-    db: Session,
+    catalog: Catalog,
 ) -> dict:
     """Создаёт словарь WoD из шаблона с учётом скалирования."""
-    movements = db.query(WodTemplateMovement).filter(
-        WodTemplateMovement.template_id == template.id
-    ).order_by(WodTemplateMovement.sort_order).all()
-
+    observed = zone_profiles.get(template.id, level)
     wod_movements = []
-    for tm in movements:
+    for tm in template.movements:
         wod_movements.append({
             "movement_key": tm.movement_key,
             "movement_name": tm.movement_name,
@@ -139,7 +109,7 @@ def _build_wod_from_template(
             "weight_male": _scale_weight(tm.weight_male, level),
             "weight_female": _scale_weight(tm.weight_female, level),
             "sort_order": tm.sort_order,
-            "scaling_note": _get_scaling_note(tm.movement_key, level, db),
+            "scaling_note": _get_scaling_note(tm.movement_key, level, catalog),
             "rounds_note": tm.rounds_note,
         })
 
@@ -155,37 +125,49 @@ def _build_wod_from_template(
         "is_benchmark": template.is_benchmark,
         "description": template.description,
         "target_zones": FORMAT_TARGET_ZONES.get(template.format, [2, 3]),
+        "observed": observed.to_payload() if observed else None,
         "movements": wod_movements,
     }
 
 
-def generate_wods(db: Session, theme: str, group_level: str = "intermediate") -> list[dict]:
-    """Генерирует 3 варианта WoD по теме и уровню.
+def _rank_by_intensity(
+    templates: list[CatalogTemplate], group_level: str, intensity: str,
+) -> list[CatalogTemplate]:
+    """Оставляет лучшую половину шаблонов по близости к запрошенной интенсивности.
 
-    Возвращает список словарей с полной информацией о тренировке,
-    включая отскалированные движения.
+    Интенсивность шаблона — наблюдаемый профиль ЧСС для уровня группы,
+    сглаженный к априорной оценке по FORMAT_TARGET_ZONES.
     """
-    available = _get_available_equipment_keys(db)
+    ranked = sorted(templates, key=lambda t: zone_profiles.match(
+        t.id, group_level, FORMAT_TARGET_ZONES.get(t.format, [2, 3]), intensity,
+    ))
+    return ranked[:max(3, math.ceil(len(ranked) / 2))]
 
-    # Все шаблоны по теме
-    templates = db.query(WodTemplate).filter(
-        WodTemplate.theme == theme
-    ).all()
 
-    # Фильтр по доступному инвентарю
-    suitable = [
-        t for t in templates
-        if _template_has_equipment(db, t, available)
-    ]
+def generate_wods(
+    theme: str, group_level: str = "intermediate", intensity: str | None = None,
+) -> list[dict]:
+    """Генерирует 3 варианта WoD по теме и уровню.
 
-    # Если инвентарь не настроен — показываем всё
-    if not available:
-        suitable = templates
+    Возвращает список словарей с полной информацией о тренировке,
+    включая отскалированные движения. Шаблоны и движения берутся
+    из индекса каталога в памяти. Если задана intensity (low/medium/high),
+    варианты выбираются из шаблонов, чей наблюдаемый профиль ЧСС ей
+    ближе всего.
+    """
+    catalog = catalog_index.current
+
+    # Шаблоны темы, доступные с инвентарём зала (если инвентарь
+    # не настроен — все); индекс пересчитывается при изменении инвентаря
+    suitable = list(catalog_index.feasible(theme))
 
     if not suitable:
         _logger.warning(f"No suitable templates for theme={theme}")
         return []
 
+    if intensity:
+        suitable = _rank_by_intensity(suitable, group_level, intensity)
+
     # Разделяем на категории
     benchmarks = [t for t in suitable if t.is_benchmark]
     medium = [t for t in suitable if t.intensity == "medium" and not t.is_benchmark]
@@ -196,15 +178,15 @@ def generate_wods(db: Session, theme: str, group_level: str = "intermediate") ->
 
     # Вариант A: Классический бенчмарк
     if benchmarks:
-        result.append(_build_wod_from_template(
-            random.choice(benchmarks), group_level, db
+        result.append(build_wod_from_template(
+            random.choice(benchmarks), group_level, catalog
         ))
 
     # Вариант B: Сбалансированный
     pool_b = medium + low + (benchmarks if not result else [])
     if pool_b:
         choice = random.choice(pool_b)
-        wod = _build_wod_from_template(choice, group_level, db)
+        wod = build_wod_from_template(choice, group_level, catalog)
         if not result or wod["name"] != result[0]["name"]:
             result.append(wod)
 
@@ -212,7 +194,7 @@ def generate_wods(db: Session, theme: str, group_level: str = "intermediate") ->
     pool_c = high + medium + (benchmarks if len(result) < 2 else [])
     if pool_c:
         choice = random.choice(pool_c)
-        wod = _build_wod_from_template(choice, group_level, db)
+        wod = build_wod_from_template(choice, group_level, catalog)
         if not any(w["name"] == wod["name"] for w in result):
             result.append(wod)
 
@@ -221,7 +203,7 @@ def generate_wods(db: Session, theme: str, group_level: str = "intermediate") ->
     while len(result) < 3 and remaining:
         choice = random.choice(remaining)
         remaining.remove(choice)
-        result.append(_build_wod_from_template(choice, group_level, db))
+        result.append(build_wod_from_template(choice, group_level, catalog))
 
     return result[:3]
 
@@ -231,46 +213,69 @@ def create_wod_from_template(
     template_id: str,
     group_level: str = "intermediate",
     session_id: str | None = None,
-) -> Wod:
-    """Создаёт активный WoD из выбранного шаблона."""
-    template = db.query(WodTemplate).filter(WodTemplate.id == template_id).first()
+) -> dict:
+    """Создаёт активный WoD из выбранного шаблона.
+
+    Всё в одной транзакции: деактивация предыдущего WoD, вставка WoD
+    и пакетная (executemany) вставка его движений по данным индекса
+    каталога. Возвращает готовое представление WoD (как WodOut) —
+    повторно читать созданные строки не нужно.
+    """
+    catalog = catalog_index.current
+    template = catalog.template(template_id)
     if not template:
         raise ValueError(f"Template {template_id} not found")
 
-    # Деактивируем предыдущие активные WoD
-    db.query(Wod).filter(Wod.is_active == True).update({"is_active": False})
-
-    wod = Wod(
-        name=template.name,
-        format=template.format,
-        duration_min=template.duration_min,
-        intensity=template.intensity,
-        theme=template.theme,
-        group_level=group_level,
-        description=template.description,
-        is_active=True,
-        session_id=session_id,
-    )
-    db.add(wod)
-    db.flush()
-
-    movements = db.query(WodTemplateMovement).filter(
-        WodTemplateMovement.template_id == template_id
-    ).order_by(WodTemplateMovement.sort_order).all()
-
-    for tm in movements:
-        db.add(WodMovement(
-            wod_id=wod.id,
-            movement_key=tm.movement_key,
-            movement_name=tm.movement_name,
-            reps=_scale_reps(tm.reps, group_level),
-            weight_male=_scale_weight(tm.weight_male, group_level),
-            weight_female=_scale_weight(tm.weight_female, group_level),
-            sort_order=tm.sort_order,
-            scaling_note=_get_scaling_note(tm.movement_key, group_level, db),
-            rounds_note=tm.rounds_note,
-        ))
+    now = datetime.now(timezone.utc)
+    # SQLite хранит время без зоны — отдаём так же, как при чтении из БД
+    created_at = now.replace(tzinfo=None)
+    wod = {
+        "id": str(uuid.uuid4()),
+        "name": template.name,
+        "format": template.format,
+        "duration_min": template.duration_min,
+        "intensity": template.intensity,
+        "theme": template.theme,
+        "group_level": group_level,
+        "description": template.description,
+        "is_active": True,
+        "created_at": created_at,
+        "session_id": session_id,
+        "template_id": template.id,
+    }
+    movements = [
+        {
+            "movement_key": tm.movement_key,
+            "movement_name": tm.movement_name,
+            "reps": _scale_reps(tm.reps, group_level),
+            "weight_male": _scale_weight(tm.weight_male, group_level),
+            "weight_female": _scale_weight(tm.weight_female, group_level),
+            "sort_order": tm.sort_order,
+            "scaling_note": _get_scaling_note(tm.movement_key, group_level, catalog),
+            "rounds_note": tm.rounds_note,
+        }
+        for tm in template.movements
+    ]
+
+    try:
+        # Деактивируем предыдущие активные WoD
+        db.execute(
+            update(Wod).where(Wod.is_active == True).values(is_active=False, ended_at=now)
+        )
+        db.execute(insert(Wod.__table__), [wod])
+        if movements:
+            db.execute(insert(WodMovement.__table__), [
+                {"id": str(uuid.uuid4()), "wod_id": wod["id"], **m} for m in movements
+            ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    db.commit()
-    db.refresh(wod)
-    return wod
+    return {
+        **{k: wod[k] for k in (
+            "id", "name", "format", "duration_min", "intensity", "theme",
+            "group_level", "description", "is_active", "created_at",
+        )},
+        "movements": movements,
+    }
@@ -0,0 +1,258 @@
+"""Серверные часы активного WoD и разбивка ЧСС по интервалам тренировки.
+
+Часы — единственный источник времени тренировки: старт, пауза и стоп
+приходят через API, дисплеи получают состояние событием wod_clock и
+досчитывают секунды локально. Время на паузе в тренировку не входит.
+
+Структура WoD задаётся форматом: EMOM и Death By — минуты, Tabata —
+раунды 30 с (20 с работы + 10 с отдыха), остальные форматы — минутные
+отрезки. Каждый отсчёт ЧСС попадает в интервал по времени часов, и
+аккумулятор (спортсмен, интервал) обновляется за O(1) — без сырых
+отсчётов. Средняя/пиковая ЧСС и восстановление (пик работы минус ЧСС
+в конце интервала) сохраняются в wod_interval_stats одним пакетом при
+остановке часов или завершении WoD.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from ..models import WodIntervalStat
+
+_logger = logging.getLogger(__name__)
+
+# Длина интервала (сек) по формату; остальные форматы — минутные отрезки
+INTERVAL_SECONDS = {"tabata": 30.0}
+DEFAULT_INTERVAL_SECONDS = 60.0
+
+# Рабочая часть интервала (сек); None — весь интервал
+WORK_SECONDS = {"tabata": 20.0}
+
+
+@dataclass(frozen=True)
+class Interval:
+    index: int
+    start_s: float
+    end_s: float
+    # Конец рабочей фазы (для Tabata — 20 с от начала раунда)
+    work_end_s: float
+
+
+def interval_plan(wod_format: str, duration_min: int) -> list[Interval]:
+    """Интервалы WoD от начала тренировки; последний обрезается по длительности."""
+    length = INTERVAL_SECONDS.get(wod_format, DEFAULT_INTERVAL_SECONDS)
+    work = WORK_SECONDS.get(wod_format)
+    total = duration_min * 60.0
+    intervals = []
+    for i in range(math.ceil(total / length)):
+        start = i * length
+        end = min(start + length, total)
+        intervals.append(Interval(i, start, end, min(start + work, end) if work else end))
+    return intervals
+
+
+@dataclass
+class _Acc:
+    """Накопитель отсчётов спортсмена в одном интервале."""
+    samples: int = 0
+    hr_sum: int = 0
+    pct_sum: float = 0.0
+    peak_hr: int = 0
+    work_peak_hr: int = 0
+    end_hr: int = 0
+
+    def add(self, hr: int, pct: float, in_work: bool):
+        self.samples += 1
+        self.hr_sum += hr
+        self.pct_sum += pct
+        self.peak_hr = max(self.peak_hr, hr)
+        if in_work:
+            self.work_peak_hr = max(self.work_peak_hr, hr)
+        self.end_hr = hr
+
+    def to_row(self) -> dict:
+        peak = self.work_peak_hr or self.peak_hr
+        return {
+            "samples": self.samples,
+            "avg_hr": round(self.hr_sum / self.samples, 1),
+            "avg_pct": round(self.pct_sum / self.samples, 1),
+            "peak_hr": self.peak_hr,
+            "end_hr": self.end_hr,
+            "recovery_bpm": peak - self.end_hr,
+        }
+
+
+class WorkoutClock:
+    """Часы активного WoD и накопители интервалов по спортсменам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset(None, None, 0)
+
+    def _reset(self, wod_id: str | None, wod_format: str | None, duration_min: int):
+        self.wod_id = wod_id
+        self.format = wod_format
+        self.duration_s = duration_min * 60.0
+        self.intervals = interval_plan(wod_format, duration_min) if wod_id else []
+        self.status = "idle"
+        self.started_at: float | None = None
+        # Время тренировки до последнего запуска и момент этого запуска
+        self._elapsed_before = 0.0
+        self._running_since: float | None = None
+        self._acc: dict[tuple[str, int], _Acc] = {}
+        self._dirty = False
+
+    def attach(self, wod_id: str, wod_format: str, duration_min: int):
+        """Привязывает часы к новому активному WoD (в состоянии idle)."""
+        with self._lock:
+            self._reset(wod_id, wod_format, duration_min)
+
+    def detach(self):
+        with self._lock:
+            self._reset(None, None, 0)
+
+    def _elapsed(self, now: float) -> float:
+        elapsed = self._elapsed_before
+        if self._running_since is not None:
+            elapsed += now - self._running_since
+        return min(elapsed, self.duration_s)
+
+    def _interval_at(self, elapsed: float) -> Interval | None:
+        if not self.intervals or elapsed < 0 or elapsed >= self.duration_s:
+            return None
+        length = INTERVAL_SECONDS.get(self.format, DEFAULT_INTERVAL_SECONDS)
+        return self.intervals[min(int(elapsed // length), len(self.intervals) - 1)]
+
+    def start(self, now: float | None = None) -> dict:
+        """Запуск или продолжение после паузы; после финиша — заново с нуля."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.wod_id is None:
+                raise ValueError("Нет активного WoD")
+            if self.status == "finished":
+                self._reset(self.wod_id, self.format, int(self.duration_s // 60))
+            if self.status != "running":
+                if self.started_at is None:
+                    self.started_at = now
+                self._running_since = now
+                self.status = "running"
+            return self._snapshot(now)
+
+    def pause(self, now: float | None = None) -> dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.status == "running":
+                self._elapsed_before = self._elapsed(now)
+                self._running_since = None
+                self.status = "paused"
+            return self._snapshot(now)
+
+    def _finish(self, now: float):
+        self._elapsed_before = self._elapsed(now)
+        self._running_since = None
+        self.status = "finished"
+
+    def on_sample(self, athlete_id: str, hr: int, pct: float, ts: float) -> bool:
+        """Относит отсчёт к интервалу. True — часы только что дошли до конца WoD."""
+        with self._lock:
+            # Удар раньше запуска или продолжения (время удара по часам датчика
+            # раньше времени приёма) — не относится ни к одному интервалу
+            if self.status != "running" or ts < self._running_since:
+                return False
+            elapsed = self._elapsed(ts)
+            interval = self._interval_at(elapsed)
+            if interval is None:
+                self._finish(ts)
+                return True
+            acc = self._acc.get((athlete_id, interval.index))
+            if acc is None:
+                acc = self._acc[(athlete_id, interval.index)] = _Acc()
+            acc.add(hr, pct, elapsed < interval.work_end_s)
+            self._dirty = True
+            return False
+
+    def stop(self, db: Session, now: float | None = None) -> dict:
+        """Останавливает часы и сохраняет интервалы."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.status in ("running", "paused"):
+                self._finish(now)
+            snapshot = self._snapshot(now)
+        self.flush(db)
+        return snapshot
+
+    def flush(self, db: Session):
+        """Сохраняет накопленные интервалы WoD (заменяя ранее сохранённые)."""
+        with self._lock:
+            if self.wod_id is None or not self._dirty:
+                return
+            wod_id = self.wod_id
+            rows = self._rows()
+            self._dirty = False
+        try:
+            db.execute(delete(WodIntervalStat).where(WodIntervalStat.wod_id == wod_id))
+            if rows:
+                db.execute(insert(WodIntervalStat.__table__), [{"wod_id": wod_id, **r} for r in rows])
+            db.commit()
+            _logger.info(f"Saved {len(rows)} interval stats for WoD {wod_id}")
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                if self.wod_id == wod_id:
+                    self._dirty = True
+            _logger.error(f"Interval stats save error: {e}")
+
+    def _rows(self) -> list[dict]:
+        return [
+            {
+                "athlete_id": athlete_id,
+                "interval_index": index,
+                "start_s": self.intervals[index].start_s,
+                "end_s": self.intervals[index].end_s,
+                **acc.to_row(),
+            }
+            for (athlete_id, index), acc in sorted(self._acc.items(), key=lambda x: (x[0][1], x[0][0]))
+        ]
+
+    def live_rows(self, wod_id: str) -> list[dict] | None:
+        """Текущие (ещё не сохранённые) интервалы, если часы идут по этому WoD."""
+        with self._lock:
+            if self.wod_id != wod_id or not self._dirty:
+                return None
+            return self._rows()
+
+    def _snapshot(self, now: float) -> dict:
+        elapsed = self._elapsed(now)
+        status = self.status
+        if status == "running" and elapsed >= self.duration_s:
+            # Время вышло, но отсчётов после этого ещё не было
+            status = "finished"
+        interval = self._interval_at(elapsed) if status != "finished" else None
+        phase = None
+        if interval is not None and self.format in WORK_SECONDS:
+            phase = "work" if elapsed < interval.work_end_s else "rest"
+        return {
+            "wod_id": self.wod_id,
+            "format": self.format,
+            "status": status,
+            "elapsed_s": round(elapsed, 3),
+            "duration_s": self.duration_s,
+            "interval_index": interval.index if interval else None,
+            "interval_count": len(self.intervals),
+            "interval_s": INTERVAL_SECONDS.get(self.format, DEFAULT_INTERVAL_SECONDS),
+            "phase": phase,
+            "server_time": now,
+        }
+
+    def snapshot(self, now: float | None = None) -> dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._snapshot(now)
+
+
+workout_clock = WorkoutClock()
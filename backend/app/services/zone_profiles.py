@@ -0,0 +1,227 @@
+"""Наблюдаемые профили нагрузки шаблонов WoD по реальным данным ЧСС.
+
+FORMAT_TARGET_ZONES — априорная оценка. По мере проведения тренировок
+для каждой пары (шаблон, уровень группы) копятся время в зонах и средняя
+интенсивность (% от max_hr) всех участников. Профиль обновляется один раз
+при завершении сессии (окна WoD внутри сессии), хранится в
+template_zone_profiles и держится в памяти — генератор ранжирует шаблоны
+без обращения к сырым отсчётам.
+
+Оценка интенсивности сглаживается к априорной: пока наблюдений мало,
+вес имеет FORMAT_TARGET_ZONES, с ростом набранного времени — факт.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..models import Athlete, HrReading, TemplateZoneProfile, Wod, Session as TrainingSession
+from .effort import AthleteProfile, _epoch, compute_totals, sample_intervals
+
+_logger = logging.getLogger(__name__)
+
+# Целевая средняя интенсивность (% от max_hr) для запрошенного уровня нагрузки
+INTENSITY_TARGET_PCT = {"low": 65.0, "medium": 75.0, "high": 85.0}
+
+# Середины зон (% от max_hr) — для априорной оценки по FORMAT_TARGET_ZONES
+ZONE_MID_PCT = {1: 55.0, 2: 70.0, 3: 90.0, 4: 105.0}
+
+# Вес априорной оценки в «спортсмено-секундах» наблюдений
+PRIOR_WEIGHT_S = 600.0
+
+
+@dataclass(frozen=True)
+class ZoneProfile:
+    """Накопленный профиль шаблона для уровня группы."""
+    wods: int = 0
+    zone_seconds: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+    pct_seconds: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.zone_seconds)
+
+    @property
+    def avg_intensity(self) -> float | None:
+        """Средний % от max_hr за всё наблюдённое время."""
+        return self.pct_seconds / self.seconds if self.seconds else None
+
+    def distribution(self) -> list[float]:
+        """Доли времени в зонах 1–4."""
+        total = self.seconds
+        return [s / total if total else 0.0 for s in self.zone_seconds]
+
+    def to_payload(self) -> dict:
+        avg = self.avg_intensity
+        return {
+            "wods": self.wods,
+            "zone_distribution": [round(p, 3) for p in self.distribution()],
+            "avg_intensity": round(avg, 1) if avg is not None else None,
+        }
+
+
+def prior_intensity(target_zones: list[int]) -> float:
+    """Априорная средняя интенсивность по целевым зонам формата."""
+    return sum(ZONE_MID_PCT[z] for z in target_zones) / len(target_zones)
+
+
+class ZoneProfiles:
+    """Профили шаблонов в памяти с инкрементальным обновлением."""
+
+    def __init__(self):
+        self._profiles: dict[tuple[str, str], ZoneProfile] = {}
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        """Загружает все профили из БД (при старте)."""
+        rows = db.query(TemplateZoneProfile).all()
+        with self._lock:
+            self._profiles = {
+                (r.template_id, r.group_level): ZoneProfile(
+                    r.wods,
+                    (r.zone_1_seconds, r.zone_2_seconds, r.zone_3_seconds, r.zone_4_seconds),
+                    r.pct_seconds,
+                )
+                for r in rows
+            }
+
+    def get(self, template_id: str, group_level: str) -> ZoneProfile | None:
+        return self._profiles.get((template_id, group_level))
+
+    def estimate(self, template_id: str, group_level: str, target_zones: list[int]) -> float:
+        """Ожидаемая средняя интенсивность шаблона, сглаженная к априорной."""
+        prior = prior_intensity(target_zones)
+        profile = self.get(template_id, group_level)
+        if profile is None or not profile.seconds:
+            return prior
+        return (prior * PRIOR_WEIGHT_S + profile.pct_seconds) / (PRIOR_WEIGHT_S + profile.seconds)
+
+    def match(self, template_id: str, group_level: str, target_zones: list[int], intensity: str) -> float:
+        """Расстояние между ожидаемой и запрошенной интенсивностью (меньше — лучше)."""
+        target = INTENSITY_TARGET_PCT[intensity]
+        return abs(self.estimate(template_id, group_level, target_zones) - target)
+
+    def record_session(self, db: Session, session_id: str):
+        """Добавляет в профили WoD, проведённые в завершённой сессии."""
+        session = db.query(TrainingSession).filter(TrainingSession.id == session_id).first()
+        if not session or not session.ended_at:
+            return
+        start, end = _epoch(session.started_at), _epoch(session.ended_at)
+
+        wods = (
+            db.query(Wod)
+            .filter(
+                Wod.template_id.isnot(None),
+                Wod.created_at < session.ended_at,
+                or_(Wod.ended_at.is_(None), Wod.ended_at > session.started_at),
+                or_(Wod.session_id.is_(None), Wod.session_id == session_id),
+            )
+            .order_by(Wod.created_at)
+            .all()
+        )
+        if not wods:
+            return
+
+        # Окна WoD внутри сессии; следующий WoD закрывает окно предыдущего
+        windows = []
+        for i, wod in enumerate(wods):
+            w_start = max(_epoch(wod.created_at), start)
+            w_end = min(_epoch(wod.ended_at) if wod.ended_at else end, end)
+            if i + 1 < len(wods):
+                w_end = min(w_end, _epoch(wods[i + 1].created_at))
+            if w_end > w_start:
+                windows.append((wod, w_start, w_end))
+        if not windows:
+            return
+
+        rows = (
+            db.query(HrReading.athlete_id, HrReading.timestamp, HrReading.heart_rate)
+            .filter(HrReading.session_id == session_id, HrReading.heart_rate.isnot(None))
+            .order_by(HrReading.athlete_id, HrReading.timestamp)
+            .all()
+        )
+        grouped: dict[str, tuple[list[float], list[int]]] = {}
+        for athlete_id, ts, hr in rows:
+            s = grouped.setdefault(athlete_id, ([], []))
+            s[0].append(_epoch(ts))
+            s[1].append(hr)
+        series = {
+            athlete_id: (np.asarray(ts), np.asarray(hr, dtype=np.float64))
+            for athlete_id, (ts, hr) in grouped.items()
+        }
+        athletes = {
+            a.id: AthleteProfile.from_athlete(a)
+            for a in db.query(Athlete).filter(Athlete.id.in_(series.keys())).all()
+        }
+
+        # (шаблон, уровень) → [число WoD, время в зонах, сумма % × сек]
+        observed: dict[tuple[str, str], list] = {}
+        for wod, w_start, w_end in windows:
+            zone_seconds = np.zeros(4)
+            pct_seconds = 0.0
+            for athlete_id, (ts, hr) in series.items():
+                lo, hi = np.searchsorted(ts, [w_start, w_end])
+                if hi - lo < 2:
+                    continue
+                profile = athletes.get(athlete_id, AthleteProfile())
+                totals = compute_totals(ts[lo:hi], hr[lo:hi], profile)
+                zone_seconds += totals.zone_seconds
+                dt = sample_intervals(ts[lo:hi])
+                pct_seconds += float(np.sum(hr[lo:hi - 1] / profile.max_hr * 100 * dt))
+            if not zone_seconds.any():
+                continue
+            acc = observed.setdefault((wod.template_id, wod.group_level), [0, np.zeros(4), 0.0])
+            acc[0] += 1
+            acc[1] += zone_seconds
+            acc[2] += pct_seconds
+            if wod.session_id is None:
+                wod.session_id = session_id
+
+        updated = []
+        try:
+            for (template_id, group_level), (count, zone_seconds, pct_seconds) in observed.items():
+                updated.append(self._add(db, template_id, group_level, count, zone_seconds, pct_seconds))
+            db.commit()
+        except Exception as e:
+            _logger.error(f"Zone profile update error: {e}")
+            db.rollback()
+            return
+
+        with self._lock:
+            for row in updated:
+                self._profiles[(row.template_id, row.group_level)] = ZoneProfile(
+                    row.wods,
+                    (row.zone_1_seconds, row.zone_2_seconds, row.zone_3_seconds, row.zone_4_seconds),
+                    row.pct_seconds,
+                )
+
+    def _add(self, db: Session, template_id: str, group_level: str, wods: int,
+             zone_seconds: np.ndarray, pct_seconds: float) -> TemplateZoneProfile:
+        """Прибавляет наблюдения WoD к строке профиля (без commit)."""
+        row = db.query(TemplateZoneProfile).filter(
+            TemplateZoneProfile.template_id == template_id,
+            TemplateZoneProfile.group_level == group_level,
+        ).first()
+        if not row:
+            row = TemplateZoneProfile(
+                template_id=template_id, group_level=group_level, wods=0,
+                zone_1_seconds=0.0, zone_2_seconds=0.0, zone_3_seconds=0.0,
+                zone_4_seconds=0.0, pct_seconds=0.0,
+            )
+            db.add(row)
+        row.wods += wods
+        row.zone_1_seconds += float(zone_seconds[0])
+        row.zone_2_seconds += float(zone_seconds[1])
+        row.zone_3_seconds += float(zone_seconds[2])
+        row.zone_4_seconds += float(zone_seconds[3])
+        row.pct_seconds += pct_seconds
+        row.updated_at = datetime.now(timezone.utc)
+        return row
+
+
+zone_profiles = ZoneProfiles()
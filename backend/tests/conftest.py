@@ -0,0 +1,20 @@
+"""Общие настройки тестов: временная БД SQLite и кэш задач на весь запуск."""
+
+import os
+import sys
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="cf_test_")
+os.environ["CF_DB_PATH"] = os.path.join(_TMP_DIR, "test.db")
+os.environ["CF_CACHE_DIR"] = os.path.join(_TMP_DIR, "cache")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from app import models  # noqa: E402,F401 — таблицы регистрируются при импорте
+from app.database import init_db  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
@@ -0,0 +1,104 @@
+"""AntCollector на симуляторе нескольких стиков: каналы, дубли, слияние потока."""
+
+import time
+
+from app.services import ant_collector
+from app.services.ant_collector import AntCollector
+from app.services.ant_hardware import HrPage
+from app.services.ant_simulated import SimulatedAntBackend
+
+
+def _collect(backend, seconds, check=None, **kwargs):
+    """Запускает коллектор на seconds; check(collector) вызывается каждые 0,1 с."""
+    samples = []
+    collector = AntCollector(
+        backend=backend,
+        on_hr_data=lambda device_id, hr, battery, beat_ts=None, rr_ms=None:
+            samples.append((device_id, hr, beat_ts, rr_ms)),
+        **kwargs,
+    )
+    collector.start()
+    try:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if check:
+                check(collector)
+            time.sleep(0.1)
+        status = collector.channel_status()
+    finally:
+        collector.stop()
+    return samples, status
+
+
+def test_channels_spread_across_sticks():
+    backend = SimulatedAntBackend(sticks=2, straps=4, seed=1)
+    _, status = _collect(backend, 1.0, max_sensors=6, wildcards=6)
+
+    assert status["sticks"] == 2
+    assert len(status["channels"]) == 6
+    for channel in status["channels"]:
+        assert channel["stick"] == (channel["channel"] - 1) % 2
+
+
+def test_device_never_owned_on_two_sticks(monkeypatch):
+    monkeypatch.setattr(ant_collector, "DUPLICATE_RETRY_S", 0.5)
+    # Оба стика слышат все датчики, все каналы — wildcard: дубли неизбежны
+    backend = SimulatedAntBackend(sticks=2, straps=3, seed=2)
+    violations = []
+
+    def check(collector):
+        receiving = [c["device_id"] for c in collector.channel_status()["channels"] if c["device_id"]]
+        if len(receiving) != len(set(receiving)):
+            violations.append(receiving)
+
+    _, status = _collect(backend, 3.0, check=check, max_sensors=6, wildcards=6)
+
+    assert not violations
+    receiving = {c["device_id"] for c in status["channels"] if c["device_id"]}
+    assert receiving == {1001, 1002, 1003}
+
+
+def test_merged_stream_from_both_sticks():
+    # По каналу на стик, стики слышат разные датчики
+    backend = SimulatedAntBackend(
+        sticks=2, straps=4, seed=3, coverage={0: {1001, 1003}, 1: {1002, 1004}},
+    )
+    samples, status = _collect(backend, 3.0, max_sensors=2, wildcards=2)
+
+    assert {c["stick"] for c in status["channels"] if c["device_id"]} == {0, 1}
+    by_device: dict[int, list[float]] = {}
+    for device_id, hr, beat_ts, _ in samples:
+        assert 50 <= hr <= 200
+        by_device.setdefault(device_id, []).append(beat_ts)
+    receiving = {c["device_id"] for c in status["channels"] if c["device_id"]}
+    assert len(receiving) == 2 and set(by_device) == receiving
+    # Один отсчёт на удар: время ударов датчика строго растёт
+    for beats in by_device.values():
+        assert all(b > a for a, b in zip(beats, beats[1:]))
+
+
+def test_page_snapshot_survives_in_place_update():
+    """openant меняет один объект страницы на месте — в очереди должен лежать снимок."""
+    samples = []
+    collector = AntCollector(
+        on_hr_data=lambda device_id, hr, battery, beat_ts=None, rr_ms=None:
+            samples.append((hr, rr_ms)),
+    )
+    collector._handle_found(0, 4242)
+    on_page = collector._make_on_page(0)
+
+    shared = HrPage(heart_rate=60, beat_count=1, beat_time=1.0,
+                    previous_heart_beat_time=0.0, battery_percentage=90)
+    on_page(shared)
+    for count, hr in ((2, 61), (3, 62)):
+        # Следующие страницы приходят раньше, чем диспетчер разобрал очередь
+        shared.heart_rate, shared.beat_count = hr, count
+        shared.previous_heart_beat_time, shared.beat_time = shared.beat_time, shared.beat_time + 1.0
+        on_page(shared)
+
+    while not collector._events.empty():
+        _, slot, (ts, page) = collector._events.get()
+        collector._handle_page(slot, ts, page)
+
+    assert [hr for hr, _ in samples] == [60, 61, 62]
+    assert [rr for _, rr in samples] == [None, 1000, 1000]
@@ -0,0 +1,53 @@
+"""Запись страниц ANT+: лог совпадает с принятыми страницами и воспроизводится."""
+
+from app.services.ant_collector import AntCollector
+from app.services.ant_hardware import HrPage
+from app.services.ant_recording import PageRecorder, read_pages
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "pages.antlog")
+    recorder = PageRecorder(path)
+    pages = [
+        (10.0, 1001, HrPage(72, 5, 12.5, 11.75, 90)),
+        (10.25, 1002, HrPage(150, 255, 63.999, 63.6, 40)),
+        (10.5, 1001, HrPage(73, 6, 13.3, 12.5, 0xFF)),
+    ]
+    for ts, device_id, page in pages:
+        recorder.write(ts, device_id, page)
+    recorder.close()
+
+    read = list(read_pages(path))
+    assert [(ts, d) for ts, d, _ in read] == [(ts, d) for ts, d, _ in pages]
+    for (_, _, got), (_, _, page) in zip(read, pages):
+        assert (got.heart_rate, got.beat_count, got.battery_percentage) == (
+            page.heart_rate, page.beat_count, page.battery_percentage,
+        )
+        assert abs(got.beat_time - page.beat_time) <= 1 / 1024
+        assert abs(got.previous_heart_beat_time - page.previous_heart_beat_time) <= 1 / 1024
+
+
+def test_collector_records_received_pages_not_shared_object(tmp_path):
+    """Страница пишется такой, какой была принята, даже если openant уже её перезаписал."""
+    path = str(tmp_path / "pages.antlog")
+    collector = AntCollector()
+    collector._recorder = PageRecorder(path)
+    collector._handle_found(0, 5151)
+    on_page = collector._make_on_page(0)
+
+    shared = HrPage(heart_rate=60, beat_count=1, beat_time=1.0,
+                    previous_heart_beat_time=0.0, battery_percentage=90)
+    sent = []
+    for count in range(1, 5):
+        shared.heart_rate, shared.beat_count = 59 + count, count
+        shared.previous_heart_beat_time, shared.beat_time = shared.beat_time, float(count)
+        on_page(shared)
+        sent.append((shared.heart_rate, shared.beat_count, shared.beat_time))
+    while not collector._events.empty():
+        _, slot, (ts, page) = collector._events.get()
+        collector._handle_page(slot, ts, page)
+    collector._recorder.close()
+
+    read = list(read_pages(path))
+    assert [(p.heart_rate, p.beat_count, p.beat_time) for _, _, p in read] == sent
+    assert all(b[0] > a[0] for a, b in zip(read, read[1:]))
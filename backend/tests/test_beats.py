@@ -0,0 +1,75 @@
+"""BeatTracker: новые удары по beat_count, развёртка beat_time, перепривязка часов."""
+
+import pytest
+
+from app.services.beats import BEAT_TIME_WRAP_S, MAX_BEAT_LAG_S, BeatTracker
+
+
+def test_first_page_anchors_to_receive_time():
+    tracker = BeatTracker()
+    assert tracker.update(100.0, beat_count=5, beat_time=10.0) == pytest.approx(100.0)
+    assert tracker.rr_ms is None
+
+
+def test_repeated_beat_count_is_not_a_new_beat():
+    tracker = BeatTracker()
+    tracker.update(100.0, 5, 10.0)
+    # Та же страница повторяется ~4 раза в секунду
+    assert tracker.update(100.25, 5, 10.0) is None
+    assert tracker.update(100.5, 5, 10.0) is None
+    beat = tracker.update(100.75, 6, 10.7)
+    assert beat == pytest.approx(100.7)
+    assert tracker.rr_ms == 700
+
+
+def test_beat_time_wraparound():
+    tracker = BeatTracker()
+    tracker.update(100.0, 255, BEAT_TIME_WRAP_S - 0.3)
+    # beat_count 255 → 0 и beat_time через переполнение 64 с
+    beat = tracker.update(100.5, 0, 0.2)
+    assert beat == pytest.approx(100.5)
+    assert tracker.rr_ms == 500
+
+
+def test_skipped_beat_gives_unknown_rr():
+    tracker = BeatTracker()
+    tracker.update(100.0, 5, 10.0)
+    beat = tracker.update(101.5, 7, 11.4)
+    assert beat == pytest.approx(101.4)
+    assert tracker.rr_ms is None
+
+
+def test_reanchor_when_sensor_clock_runs_ahead():
+    tracker = BeatTracker()
+    tracker.update(100.0, 1, 10.0)
+    # Часы датчика ушли вперёд приёма — удар не может быть в будущем
+    beat = tracker.update(100.5, 2, 11.0)
+    assert beat == pytest.approx(100.5)
+    assert tracker.update(101.5, 3, 12.0) == pytest.approx(101.5)
+    assert tracker.rr_ms == 1000
+
+
+def test_reanchor_when_sensor_clock_lags():
+    tracker = BeatTracker()
+    tracker.update(100.0, 1, 10.0)
+    # Удар старше приёма больше чем на MAX_BEAT_LAG_S — привязка обновляется
+    beat = tracker.update(100.0 + MAX_BEAT_LAG_S + 3.0, 2, 10.8)
+    assert beat == pytest.approx(100.0 + MAX_BEAT_LAG_S + 3.0)
+
+
+def test_long_gap_reanchors_even_with_same_beat_count():
+    tracker = BeatTracker()
+    tracker.update(100.0, 9, 10.0)
+    # Пауза дольше периода beat_time: тот же beat_count — уже другой удар
+    beat = tracker.update(100.0 + BEAT_TIME_WRAP_S + 5.0, 9, 20.0)
+    assert beat == pytest.approx(100.0 + BEAT_TIME_WRAP_S + 5.0)
+    assert tracker.rr_ms is None
+
+
+def test_beat_times_strictly_increase():
+    tracker = BeatTracker()
+    tracker.update(100.0, 1, 10.0)
+    first = tracker.update(100.9, 2, 10.9)
+    # Перепривязка не может вернуть удар раньше предыдущего
+    second = tracker.update(100.9, 3, 11.5)
+    assert second > first
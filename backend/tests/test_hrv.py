@@ -0,0 +1,102 @@
+"""HrvEngine: скользящее окно RMSSD/SDNN и отбраковка артефактов RR."""
+
+import math
+import random
+import statistics
+
+import pytest
+
+from app.services.ant_collector import AntCollector
+from app.services.ant_hardware import HrPage
+from app.services.hrv import (
+    ARTIFACT_RESET, MIN_WINDOW_BEATS, WINDOW_S, HrvEngine,
+)
+
+
+def _feed(engine, rrs, athlete_id="a", start=1000.0):
+    """Удары подряд с интервалами rrs (мс); возвращает время ударов и последний снимок."""
+    ts, snapshot, times = start, None, []
+    for rr in rrs:
+        ts += rr / 1000
+        times.append(ts)
+        snapshot = engine.update(None, athlete_id, ts, rr)
+    return times, snapshot
+
+
+def test_window_matches_direct_calculation_after_eviction():
+    rng = random.Random(7)
+    rrs = [round(800 + 40 * math.sin(i / 5) + rng.uniform(-15, 15)) for i in range(300)]
+    engine = HrvEngine()
+    times, snapshot = _feed(engine, rrs)
+
+    # В окне — удары за последние WINDOW_S секунд; старые вычтены из сумм.
+    # Разность принадлежит удару, поэтому у первого удара окна она с предыдущим
+    first = next(i for i, t in enumerate(times) if t >= times[-1] - WINDOW_S)
+    assert first > 0
+    window = rrs[first:]
+    diffs = [(rrs[i] - rrs[i - 1]) ** 2 for i in range(first, len(rrs))]
+    assert snapshot.rmssd == pytest.approx(math.sqrt(statistics.fmean(diffs)))
+    assert snapshot.sdnn == pytest.approx(statistics.stdev(window))
+
+
+def test_no_values_until_enough_beats():
+    engine = HrvEngine()
+    times, snapshot = _feed(engine, [800] * (MIN_WINDOW_BEATS - 1))
+    assert snapshot.rmssd is None and snapshot.sdnn is None
+    snapshot = engine.update(None, "a", times[-1] + 0.81, 810)
+    assert snapshot.rmssd is not None and snapshot.sdnn is not None
+
+
+def test_artifacts_are_rejected():
+    engine = HrvEngine()
+    clean = [800, 820, 790, 810] * 8
+    # Пропущенный удар (двойной интервал), лишний удар и невозможный интервал
+    noisy = clean[:10] + [1610] + clean[10:20] + [400] + clean[20:] + [2500]
+    _, snapshot = _feed(engine, noisy)
+
+    state = engine._states["a"]
+    assert state.artifacts == 3
+    assert state.window_sums.n == len(clean)
+    # Соседние разности не берутся через отброшенный интервал
+    diffs = [
+        (b - a) ** 2 for seg in (clean[:10], clean[10:20], clean[20:])
+        for a, b in zip(seg, seg[1:])
+    ]
+    assert snapshot.rmssd == pytest.approx(math.sqrt(statistics.fmean(diffs)))
+    assert snapshot.sdnn == pytest.approx(statistics.stdev(clean))
+
+
+def test_reference_resets_after_sustained_change():
+    engine = HrvEngine()
+    # Реальный скачок ЧСС: после ARTIFACT_RESET отброшенных новый уровень принимается
+    _feed(engine, [1000] * 10 + [600] * (ARTIFACT_RESET + 5))
+    state = engine._states["a"]
+    assert state.artifacts == ARTIFACT_RESET
+    assert state.ref_rr == 600
+
+
+def test_rr_from_collector_uses_snapshotted_pages():
+    engine = HrvEngine()
+    collector = AntCollector(
+        on_hr_data=lambda device_id, hr, battery, beat_ts=None, rr_ms=None:
+            engine.update(None, "a", beat_ts, rr_ms),
+    )
+    collector._handle_found(0, 4343)
+    on_page = collector._make_on_page(0)
+
+    shared = HrPage(heart_rate=75, beat_count=0, beat_time=0.0,
+                    previous_heart_beat_time=0.0, battery_percentage=90)
+    rrs = [800, 820, 790, 810, 805]
+    on_page(shared)
+    for count, rr in enumerate(rrs, start=1):
+        # openant перезаписывает тот же объект, пока диспетчер не успел
+        shared.beat_count = count
+        shared.beat_time = (shared.beat_time + rr / 1024) % 64.0
+        on_page(shared)
+    while not collector._events.empty():
+        _, slot, (ts, page) = collector._events.get()
+        collector._handle_page(slot, ts, page)
+
+    state = engine._states["a"]
+    assert [rr for _, rr, _ in state.window] == [round(rr * 1000 / 1024) for rr in rrs]
+    assert state.artifacts == 0
@@ -17,9 +17,11 @@ interface HrPoint {
 interface Props {
   data: HrUpdate;
   history: HrPoint[];
+  // Датчик потерян: показываем последнее значение приглушённым
+  stale?: boolean;
 }
 
-export default function AthleteCard({ data, history }: Props) {
+export default function AthleteCard({ data, history, stale = false }: Props) {
   const { theme } = useTheme();
   const zone = data.zone;
   const colors = getZoneColors(theme);
@@ -41,7 +43,8 @@ export default function AthleteCard({ data, history }: Props) {
         background: gradient,
         borderColor: theme === "dark" ? "rgba(255,255,255,0.08)" : "rgba(0,0,0,0.08)",
         containerType: "inline-size",
-        transition: "background 0.8s ease, border-color 0.8s ease",
+        transition: "background 0.8s ease, border-color 0.8s ease, opacity 0.8s ease",
+        opacity: stale ? 0.45 : 1,
       }}
     >
       {/* Имя спортсмена */}
@@ -75,8 +78,8 @@ export default function AthleteCard({ data, history }: Props) {
         className="shrink-0 flex items-center justify-between mb-1 px-1"
         style={{ fontSize: "clamp(0.5rem, 1.4cqw, 0.95rem)" }}
       >
-        <span style={{ color: zoneColor }} className="font-bold truncate">
-          {zoneName}
+        <span style={{ color: stale ? secondaryColor : zoneColor }} className="font-bold truncate">
+          {stale ? "Нет сигнала" : zoneName}
         </span>
         <span style={{ color: secondaryColor }} className="shrink-0 ml-2">
           {Math.round(data.zone_percent)}% · Max {maxHr}
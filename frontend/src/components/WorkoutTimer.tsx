@@ -1,4 +1,6 @@
-import { useEffect, useRef, useState } from "react";
+import { useEffect, useState } from "react";
+import { api } from "../lib/api";
+import { useHrStore } from "../lib/store";
 
 interface WorkoutTimerProps {
   format: string;
@@ -15,36 +17,41 @@ export default function WorkoutTimer({ format, durationMin }: WorkoutTimerProps)
   const isCountdown = ["amrap", "chipper", "tabata"].includes(format);
   const totalSec = durationMin * 60;
 
-  const [elapsed, setElapsed] = useState(0);
-  const [running, setRunning] = useState(false);
-  const intervalRef = useRef<number | null>(null);
+  // Часы ведёт сервер (события wod_clock); здесь только досчёт секунд между снимками
+  const clock = useHrStore((s) => s.wodClock);
+  const receivedAt = useHrStore((s) => s.wodClockReceivedAt);
+  const setWodClock = useHrStore((s) => s.setWodClock);
+  const [now, setNow] = useState(Date.now());
 
   useEffect(() => {
-    if (running) {
-      intervalRef.current = window.setInterval(() => {
-        setElapsed((e) => {
-          if (isCountdown && e + 1 >= totalSec) {
-            setRunning(false);
-            return totalSec;
-          }
-          return e + 1;
-        });
-      }, 1000);
-    } else if (intervalRef.current) {
-      clearInterval(intervalRef.current);
-    }
-    return () => {
-      if (intervalRef.current) clearInterval(intervalRef.current);
-    };
-  }, [running, isCountdown, totalSec]);
-
-  const reset = () => {
-    setRunning(false);
-    setElapsed(0);
+    api.wods.clock().then(setWodClock);
+  }, [setWodClock]);
+
+  const running = clock?.status === "running";
+
+  useEffect(() => {
+    if (!running) return;
+    const id = window.setInterval(() => setNow(Date.now()), 250);
+    return () => clearInterval(id);
+  }, [running]);
+
+  const elapsed = Math.floor(
+    Math.min(
+      totalSec,
+      (clock?.elapsed_s ?? 0) + (running ? Math.max(0, now - receivedAt) / 1000 : 0),
+    ),
+  );
+
+  const toggle = async () => {
+    setWodClock(await (running ? api.wods.clockPause() : api.wods.clockStart()));
+  };
+
+  const reset = async () => {
+    setWodClock(await api.wods.clockStop());
   };
 
   const displaySec = isCountdown ? totalSec - elapsed : elapsed;
-  const isFinished = isCountdown && elapsed >= totalSec;
+  const isFinished = clock?.status === "finished" || elapsed >= totalSec;
 
   // EMOM minute indicator
   const emomMinute = format === "emom" ? Math.floor(elapsed / 60) + 1 : 0;
@@ -100,21 +107,20 @@ export default function WorkoutTimer({ format, durationMin }: WorkoutTimerProps)
 
       <div className="flex gap-2">
         <button
-          onClick={() => setRunning(!running)}
-          disabled={isFinished}
+          onClick={toggle}
           className={`px-4 py-2 rounded-lg font-medium text-sm transition-colors ${
             running
               ? "bg-amber-600 hover:bg-amber-500 text-white"
               : "bg-green-600 hover:bg-green-500 text-white disabled:opacity-50"
           }`}
         >
-          {running ? "Пауза" : isFinished ? "Готово" : "Старт"}
+          {running ? "Пауза" : isFinished ? "Заново" : "Старт"}
         </button>
           <button
           onClick={reset}
           className="px-3 py-2 bg-slate-200 dark:bg-slate-700 hover:bg-slate-300 dark:hover:bg-slate-600 rounded-lg font-medium text-sm text-slate-700 dark:text-slate-200 transition-colors"
         >
-          Сброс
+          Стоп
         </button>
       </div>
     </div>
@@ -1,4 +1,8 @@
-import type { Athlete, Sensor, Session, SessionStats, AthleteStats, Equipment, GymInventoryItem, Wod, WodVariant } from "../types";
+import type {
+  Athlete, Sensor, SensorChannels, SensorDiagnostics, SensorLiveness, Session, SessionStats, AthleteStats, Benchmark, BenchmarkLeaderboard, Equipment,
+  GymInventoryItem, HrvReadiness, RefilterResult, SearchResult, Wod, WodClock, WodHistoryPage, WodIntervals,
+  WodResult, WodResultInput, WodVariant,
+} from "../types";
 
 const BASE = "/api";
 
@@ -27,6 +31,9 @@ export const api = {
   },
   sensors: {
     list: () => request<Sensor[]>("/sensors"),
+    channels: () => request<SensorChannels>("/sensors/channels"),
+    liveness: () => request<SensorLiveness[]>("/sensors/liveness"),
+    diagnostics: () => request<SensorDiagnostics>("/sensors/diagnostics"),
     assign: (deviceId: number, athleteId: string) =>
       request<Sensor>(`/sensors/${deviceId}/assign`, {
         method: "POST",
@@ -46,6 +53,8 @@ export const api = {
       request<Session>("/sessions", { method: "POST", body: JSON.stringify({ name }) }),
     end: (id: string) =>
       request<Session>(`/sessions/${id}/end`, { method: "POST" }),
+    refilter: (id: string) =>
+      request<RefilterResult>(`/sessions/${id}/refilter`, { method: "POST" }),
     addAthlete: (sessionId: string, athleteId: string) =>
       request<void>(`/sessions/${sessionId}/athletes`, {
         method: "POST",
@@ -57,6 +66,9 @@ export const api = {
   analytics: {
     athleteStats: (id: string) => request<AthleteStats>(`/analytics/athletes/${id}/stats`),
     athleteHistory: (id: string) => request<SessionStats[]>(`/analytics/athletes/${id}/history`),
+    athleteReadiness: (id: string, limit = 20) =>
+      request<HrvReadiness[]>(`/analytics/athletes/${id}/readiness?limit=${limit}`),
+    sessionReadiness: (id: string) => request<HrvReadiness[]>(`/analytics/sessions/${id}/readiness`),
   },
   equipment: {
     list: () => request<Equipment[]>("/equipment"),
@@ -80,6 +92,38 @@ export const api = {
       }),
     active: () => request<Wod | null>("/wods/active"),
     endActive: () => request<void>("/wods/active/end", { method: "POST" }),
-    history: (limit = 20) => request<Wod[]>(`/wods/history?limit=${limit}`),
+    clock: () => request<WodClock>("/wods/active/clock"),
+    clockStart: () => request<WodClock>("/wods/active/clock/start", { method: "POST" }),
+    clockPause: () => request<WodClock>("/wods/active/clock/pause", { method: "POST" }),
+    clockStop: () => request<WodClock>("/wods/active/clock/stop", { method: "POST" }),
+    intervals: (wodId: string) => request<WodIntervals>(`/wods/${wodId}/intervals`),
+    history: (limit = 20, cursor?: string, slim = false) => {
+      const params = new URLSearchParams({ limit: String(limit), slim: String(slim) });
+      if (cursor) params.set("cursor", cursor);
+      return request<WodHistoryPage>(`/wods/history?${params}`);
+    },
+    results: (wodId: string) => request<WodResult[]>(`/wods/${wodId}/results`),
+    saveResult: (wodId: string, result: WodResultInput) =>
+      request<WodResult>(`/wods/${wodId}/results`, {
+        method: "POST",
+        body: JSON.stringify(result),
+      }),
+    deleteResult: (wodId: string, athleteId: string) =>
+      request<void>(`/wods/${wodId}/results/${athleteId}`, { method: "DELETE" }),
+  },
+  benchmarks: {
+    list: () => request<Benchmark[]>("/benchmarks"),
+    leaderboard: (name: string, scaling = "intermediate", limit = 10) =>
+      request<BenchmarkLeaderboard>(
+        `/benchmarks/${encodeURIComponent(name)}/leaderboard?scaling=${scaling}&limit=${limit}`,
+      ),
+    records: (athleteId: string) => request<WodResult[]>(`/benchmarks/athletes/${athleteId}/records`),
+  },
+  search: (q: string, filters: Record<string, string[]> = {}, available = false, limit = 20) => {
+    const params = new URLSearchParams({ q, available: String(available), limit: String(limit) });
+    for (const [facet, values] of Object.entries(filters)) {
+      for (const value of values) params.append(facet, value);
+    }
+    return request<SearchResult>(`/search?${params}`);
   },
 };
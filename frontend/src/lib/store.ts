@@ -1,5 +1,5 @@
 import { create } from "zustand";
-import type { HrUpdate, Sensor } from "../types";
+import type { HrUpdate, Sensor, WodClock } from "../types";
 import { api } from "../lib/api";
 
 interface HrPoint {
@@ -12,11 +12,17 @@ interface HrState {
   hrHistory: Record<number, HrPoint[]>;
   sensors: Sensor[];
   newSensors: number[];
+  // Датчики без данных дольше таймаута (sensor_lost) — карточки устарели
+  lostSensors: number[];
+  // Часы активного WoD с сервера и локальное время получения снимка (мс)
+  wodClock: WodClock | null;
+  wodClockReceivedAt: number;
   ws: WebSocket | null;
   connectWs: () => void;
   disconnectWs: () => void;
   fetchSensors: () => Promise<void>;
   dismissNewSensor: (deviceId: number) => void;
+  setWodClock: (clock: WodClock) => void;
 }
 
 const FIFTEEN_MIN = 15 * 60 * 1000;
@@ -26,6 +32,9 @@ export const useHrStore = create<HrState>((set, get) => ({
   hrHistory: {},
   sensors: [],
   newSensors: [],
+  lostSensors: [],
+  wodClock: null,
+  wodClockReceivedAt: 0,
   ws: null,
 
   connectWs: () => {
@@ -47,6 +56,9 @@ export const useHrStore = create<HrState>((set, get) => ({
           return {
             hrData: { ...s.hrData, [msg.device_id]: msg },
             hrHistory: { ...s.hrHistory, [msg.device_id]: next },
+            lostSensors: s.lostSensors.includes(msg.device_id)
+              ? s.lostSensors.filter((id) => id !== msg.device_id)
+              : s.lostSensors,
           };
         });
       } else if (msg.type === "new_sensor") {
@@ -56,6 +68,18 @@ export const useHrStore = create<HrState>((set, get) => ({
             : [...s.newSensors, msg.device_id],
         }));
         get().fetchSensors();
+      } else if (msg.type === "sensor_lost") {
+        set((s) => ({
+          lostSensors: s.lostSensors.includes(msg.device_id)
+            ? s.lostSensors
+            : [...s.lostSensors, msg.device_id],
+        }));
+      } else if (msg.type === "sensor_recovered") {
+        set((s) => ({
+          lostSensors: s.lostSensors.filter((id) => id !== msg.device_id),
+        }));
+      } else if (msg.type === "wod_clock") {
+        get().setWodClock(msg);
       }
     };
 
@@ -82,4 +106,8 @@ export const useHrStore = create<HrState>((set, get) => ({
       newSensors: s.newSensors.filter((id) => id !== deviceId),
     }));
   },
+
+  setWodClock: (clock: WodClock) => {
+    set({ wodClock: clock, wodClockReceivedAt: Date.now() });
+  },
 }));
@@ -7,6 +7,7 @@ export default function Dashboard() {
   const hrData = useHrStore((s) => s.hrData);
   const hrHistory = useHrStore((s) => s.hrHistory);
   const sensors = useHrStore((s) => s.sensors);
+  const lostSensors = useHrStore((s) => s.lostSensors);
 
   const assignedDeviceIds = new Set(
     sensors.filter((s) => s.athlete_id).map((s) => s.device_id)
@@ -40,6 +41,7 @@ export default function Dashboard() {
             key={data.device_id}
             data={data}
             history={hrHistory[data.device_id] || []}
+            stale={lostSensors.includes(data.device_id)}
           />
         ))}
         {entries.length === 0 && (
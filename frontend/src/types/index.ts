@@ -2,6 +2,10 @@ export interface Athlete {
   id: string;
   name: string;
   max_hr: number;
+  weight_kg: number | null;
+  age: number | null;
+  sex: "male" | "female" | null;
+  resting_hr: number | null;
   created_at: string;
   updated_at: string;
 }
@@ -16,6 +20,71 @@ export interface Sensor {
   ignored: boolean;
 }
 
+export interface SensorChannel {
+  channel: number;
+  stick: number;
+  target_device_id: number | null;
+  device_id: number | null;
+  state: "receiving" | "searching" | "wildcard";
+}
+
+export interface SensorStickHealth {
+  stick: number;
+  state: "starting" | "running" | "restarting";
+  restarts: number;
+  last_error: string | null;
+  down_s: number | null;
+  last_recover_s: number | null;
+  max_recover_s: number | null;
+}
+
+export interface SensorCollectorProcess {
+  pid: number | null;
+  alive: boolean;
+  restarts: number;
+  last_exit: string | null;
+  samples: number;
+  lost: number;
+}
+
+export interface SensorChannels {
+  sticks: number;
+  wildcards: number;
+  channels: SensorChannel[];
+  stick_health: SensorStickHealth[];
+  process?: SensorCollectorProcess | null;
+  first_readings: { device_id: number; seconds: number; dedicated: boolean }[];
+}
+
+export interface SensorQuality {
+  device_id: number;
+  stick: number;
+  channel: number;
+  battery: number | null;
+  pages: number;
+  missed: number;
+  loss_pct: number | null;
+  page_rate_hz: number | null;
+  expected_rate_hz: number;
+  recent_loss_pct: number | null;
+  dropouts: number;
+  gap_histogram: number[];
+  last_page_s: number;
+}
+
+export interface SensorDiagnostics {
+  gap_buckets_ms: number[];
+  sensors: SensorQuality[];
+}
+
+export interface SensorLiveness {
+  device_id: number;
+  last_seen: string;
+  lost: boolean;
+  gaps: number;
+  gap_seconds: number;
+}
+
 export interface Session {
   id: string;
   name: string | null;
@@ -24,15 +93,29 @@ export interface Session {
   athlete_count: number;
 }
 
+export interface RefilterResult {
+  readings: number;
+  rejected: number;
+  changed: number;
+  recompute_pending: string[];
+}
+
 export interface HrUpdate {
   type: "hr_update";
   device_id: number;
   athlete_id: string | null;
   athlete_name: string | null;
   heart_rate: number;
+  raw_heart_rate?: number;
+  rejected?: boolean;
   zone: number;
   zone_percent: number;
   max_hr: number | null;
+  calories?: number;
+  effort_points?: number;
+  zone_seconds?: number[];
+  rmssd?: number | null;
+  sdnn?: number | null;
 }
 
 export interface NewSensorEvent {
@@ -40,7 +123,95 @@ export interface NewSensorEvent {
   device_id: number;
 }
 
-export type WsMessage = HrUpdate | NewSensorEvent;
+export interface SensorLostEvent {
+  type: "sensor_lost";
+  device_id: number;
+  athlete_id: string | null;
+  last_seen: string;
+}
+
+export interface SensorQualityEvent {
+  type: "sensor_quality";
+  sensors: SensorQuality[];
+}
+
+export interface SensorRecoveredEvent {
+  type: "sensor_recovered";
+  device_id: number;
+  athlete_id: string | null;
+  gap_seconds: number;
+}
+
+export interface LeaderboardDelta {
+  type: "leaderboard_delta";
+  period: "session" | "week" | "month";
+  period_key: string | null;
+  athlete_id: string;
+  effort_points: number;
+  rank: number;
+  prev_rank: number | null;
+}
+
+export interface HrRecoveryEvent {
+  type: "hr_recovery";
+  athlete_id: string;
+  trigger: "wod_end" | "session_end" | "hr_drop";
+  hr_end: number;
+  hr_60: number;
+  hrr60: number;
+}
+
+export interface JobDoneEvent {
+  type: "job_done";
+  job_id: string;
+  kind: string;
+  status: "done" | "failed";
+}
+
+export interface WodActiveEvent {
+  type: "wod_active";
+  wod: Wod | null;
+}
+
+export interface WodClock {
+  wod_id: string | null;
+  format: string | null;
+  status: "idle" | "running" | "paused" | "finished";
+  elapsed_s: number;
+  duration_s: number;
+  interval_index: number | null;
+  interval_count: number;
+  interval_s: number;
+  phase: "work" | "rest" | null;
+  server_time: number;
+}
+
+export interface WodClockEvent extends WodClock {
+  type: "wod_clock";
+}
+
+export interface BenchmarkPrEvent {
+  type: "benchmark_pr";
+  benchmark: string;
+  scaling: string;
+  athlete_id: string;
+  athlete_name: string | null;
+  display: string;
+  previous: string | null;
+}
+
+export type WsMessage =
+  | HrUpdate
+  | NewSensorEvent
+  | SensorLostEvent
+  | SensorRecoveredEvent
+  | SensorQualityEvent
+  | LeaderboardDelta
+  | HrRecoveryEvent
+  | JobDoneEvent
+  | WodActiveEvent
+  | WodClockEvent
+  | BenchmarkPrEvent;
 
 export interface SessionStats {
   session_id: string;
@@ -64,6 +235,18 @@ export interface AthleteStats {
   max_hr_ever: number;
 }
 
+export interface HrvReadiness {
+  athlete_id: string;
+  athlete_name: string | null;
+  session_id: string;
+  started_at: string;
+  warmup_rmssd: number;
+  baseline_ln_rmssd: number | null;
+  z: number | null;
+  score: number | null;
+  status: "ready" | "caution" | "low" | "baseline";
+}
+
 // ── WoD / Тренировки ───────────────────────────────────────
 
 export interface Equipment {
@@ -103,6 +286,132 @@ export interface Wod {
   movements: WodMovement[];
 }
 
+export interface WodSessionSummary {
+  id: string;
+  name: string | null;
+  started_at: string;
+  ended_at: string | null;
+  athlete_count: number;
+  total_calories: number;
+  total_effort_points: number;
+}
+
+export interface WodHistoryItem extends Omit<Wod, "movements"> {
+  ended_at: string | null;
+  template_id: string | null;
+  movements: WodMovement[] | null;
+  session: WodSessionSummary | null;
+}
+
+export interface WodHistoryPage {
+  items: WodHistoryItem[];
+  next_cursor: string | null;
+}
+
+export interface WodIntervalAthlete {
+  athlete_id: string;
+  athlete_name: string | null;
+  samples: number;
+  avg_hr: number;
+  avg_pct: number;
+  peak_hr: number;
+  end_hr: number;
+  recovery_bpm: number;
+}
+
+export interface WodInterval {
+  index: number;
+  start_s: number;
+  end_s: number;
+  avg_hr: number;
+  avg_pct: number;
+  peak_hr: number;
+  avg_recovery_bpm: number;
+  athletes: WodIntervalAthlete[];
+}
+
+export interface WodIntervals {
+  wod_id: string;
+  format: string;
+  live: boolean;
+  intervals: WodInterval[];
+}
+
+export type ScoreType = "time" | "rounds_reps" | "load";
+
+export interface WodResultInput {
+  athlete_id: string;
+  scaling?: string;
+  time_seconds?: number;
+  rounds?: number;
+  reps?: number;
+  load_kg?: number;
+}
+
+export interface WodResult {
+  id: number;
+  wod_id: string;
+  athlete_id: string;
+  athlete_name: string | null;
+  benchmark: string | null;
+  scaling: string;
+  score_type: ScoreType;
+  time_seconds: number | null;
+  rounds: number | null;
+  reps: number | null;
+  load_kg: number | null;
+  score: number;
+  display: string;
+  is_pr: boolean;
+  recorded_at: string;
+}
+
+export interface Benchmark {
+  name: string;
+  template_id: string;
+  format: string;
+  score_type: ScoreType;
+  description: string | null;
+}
+
+export interface BenchmarkLeaderboard {
+  benchmark: string;
+  scaling: string;
+  score_type: ScoreType;
+  total: number;
+  entries: (WodResult & { rank: number })[];
+}
+
+export interface SearchMovementHit {
+  type: "movement";
+  id: string;
+  name: string;
+  modality: string;
+  muscle_group: string;
+  difficulty: string;
+  themes: string[];
+  equipment: string[];
+}
+
+export interface SearchTemplateHit {
+  type: "template";
+  id: string;
+  name: string;
+  format: string;
+  theme: string;
+  intensity: string;
+  duration_min: number;
+  is_benchmark: boolean;
+  movements: string[];
+  equipment: string[];
+}
+
+export interface SearchResult {
+  total: number;
+  items: (SearchMovementHit | SearchTemplateHit)[];
+  facets: Record<string, Record<string, number>>;
+}
+
 export interface WodVariant {
   template_id: string;
   name: string;
@@ -115,9 +424,16 @@ export interface WodVariant {
   is_benchmark: boolean;
   description: string | null;
   target_zones: number[];
+  observed: WodObservedProfile | null;
   movements: WodMovement[];
 }
 
+export interface WodObservedProfile {
+  wods: number;
+  zone_distribution: number[];
+  avg_intensity: number | null;
+}
+
 export type WodTheme = "legs" | "arms_shoulders" | "clean_jerk" | "snatch" | "cardio_metcon" | "gymnastics" | "core" | "full_body";
 
 export const THEME_LABELS: Record<string, string> = {
@@ -22,6 +22,9 @@ node = None
 device = None
 running = True
 HEARTBEAT_INTERVAL = 3  # seconds
+SENSOR_TIMEOUT = 5  # seconds without data before a sensor is reported lost
+last_seen_by_sensor = {}
+lost_sensors = set()
 
 def on_found():
     """Callback when sensor is found"""
@@ -31,9 +34,13 @@ def on_found():
         emit_sensor_status('scanning')
 
 def check_sensor_timeouts():
-    """Check for sensor timeouts and send zero readings if needed"""
+    """Report sensors that have been silent longer than SENSOR_TIMEOUT as lost"""
     current_time = time.time()
-    # TODO: Implement timeout checking logic
+    for sensor_id, last_seen in list(last_seen_by_sensor.items()):
+        if sensor_id not in lost_sensors and current_time - last_seen > SENSOR_TIMEOUT:
+            lost_sensors.add(sensor_id)
+            logger.info(f"Sensor {sensor_id} lost: no data for {current_time - last_seen:.0f} s")
+            emit_sensor_status('lost', sensor_id)
 
 def on_device_data(page: int, page_name: str, data):
     """Handle incoming data from heart rate sensor"""
@@ -45,6 +52,11 @@ def on_device_data(page: int, page_name: str, data):
 
         logger.debug(f"Received data from sensor {sensor_id}: heart rate = {heart_rate} bpm")
 
+        last_seen_by_sensor[sensor_id] = current_time
+        if sensor_id in lost_sensors:
+            lost_sensors.discard(sensor_id)
+            logger.info(f"Sensor {sensor_id} recovered")
+
         # Update sensor data through web interface
         update_sensor_data(sensor_id, heart_rate, current_time)
 